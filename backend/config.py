@@ -19,11 +19,46 @@ class Settings(BaseSettings):
     # External Services
     GROQ_API_KEY: Optional[str] = None
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
+    GROQ_API_BASE: str = "https://api.groq.com/openai/v1"
+    # Client-side budget per API key; refined from x-ratelimit-* response headers
+    GROQ_REQUESTS_PER_MINUTE: int = 30
+    GROQ_TOKENS_PER_MINUTE: int = 6000
+    GROQ_MAX_RETRIES: int = 5
+    
+    # Background AI jobs
+    AI_JOB_WORKERS: int = 4
+    AI_JOB_LEASE_SECONDS: int = 300 # Visibility timeout; renewed while the job runs
+    AI_JOB_MAX_ATTEMPTS: int = 3
+    AI_JOB_TENANT_CONCURRENCY: int = 2 # Running jobs per user
+    AI_JOB_TYPE_CONCURRENCY: int = 4 # Running jobs per job type (heavy crews)
+    
+    # Cron jobs (emails, notifications); turn off when they run in a separate worker
+    SCHEDULER_ENABLED: bool = True
+    FANOUT_CONCURRENCY: int = 20 # Users processed at once by one email job
+    FANOUT_TENANT_DB_CONCURRENCY: int = 2 # Users at once per tenant database server
+    FANOUT_LLM_CONCURRENCY: int = 6 # Crews running at once across all email jobs
     
     GITHUB_TOKEN: Optional[str] = None
+    GITHUB_API_BASE: str = "https://api.github.com"
+    GITHUB_CONCURRENCY: int = 10 # In-flight requests per client
+    GITHUB_ANALYZER_MODE: str = "graphql" # graphql (falls back to REST) or rest
+    
+    # Scheduled GitHub refresh for all users (a cron job; runs where SCHEDULER_ENABLED)
+    GITHUB_TOKENS: str = "" # Comma-separated pool for the refresh; defaults to GITHUB_TOKEN
+    GITHUB_REFRESH_ENABLED: bool = True
+    GITHUB_REFRESH_INTERVAL_MINUTES: int = 60
+    GITHUB_REFRESH_IDLE_HOURS: int = 24 # Users inactive for a week are refreshed this often
+    GITHUB_REFRESH_BUDGET_FRACTION: float = 0.5 # Share of each token's hourly limit the refresh may use
+    GITHUB_WEBHOOK_SECRET: Optional[str] = None # Webhook deliveries are rejected until this is set
     
     RESEND_API_KEY: Optional[str] = None
     RESEND_FROM_EMAIL: str = "Sage <onboarding@resend.dev>"
+    RESEND_API_BASE: str = "https://api.resend.com"
+    RESEND_REQUESTS_PER_SECOND: float = 2 # Resend's default per-team limit
+    EMAIL_BATCH_SIZE: int = 100 # Messages per /emails/batch call (Resend's maximum)
+    EMAIL_BATCH_LINGER_MS: int = 200 # How long a batch waits to fill before it is sent
+    EMAIL_MAX_RETRIES: int = 4
+    EMAIL_HTTP2: bool = True
 
     class Config:
         env_file = ".env"
@@ -4,6 +4,7 @@ from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.pool import AsyncAdaptedQueuePool
 from fastapi import Depends, HTTPException
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -169,4 +170,13 @@ async def get_user_db(github_username: str, system_db: AsyncSession = Depends(ge
         try:
             yield db
         finally:
-            await db.close()
\ No newline at end of file
+            await db.close()
+
+@asynccontextmanager
+async def user_session_scope(database_url: str):
+    """User DB session outside a request (background jobs, schedulers)"""
+    engine = get_user_db_engine(database_url)
+    if not _tables_initialized(database_url):
+        await init_user_db(database_url)
+    async with AsyncSession(engine, expire_on_commit=False, autoflush=False) as db:
+        yield db
@@ -0,0 +1 @@
+"""Local stand-ins for external services and benchmarks that run against them."""
@@ -0,0 +1,129 @@
+"""Email delivery throughput against the fake Resend server.
+
+Sends the same burst of messages, ``--concurrency`` callers at a time (like
+an email fan-out), through three clients:
+- ``naive``: a new ``httpx.AsyncClient`` and one ``/emails`` request per
+  message, with no rate limiting or retries (the previous ``send_email``)
+- ``pooled``: ``EmailService`` with batches of one (pool, rate limit, retries)
+- ``batched``: ``EmailService`` with ``/emails/batch`` calls of up to 100
+
+Every message must arrive exactly once through ``EmailService``; the run
+fails otherwise. Run from ``backend/``:
+
+    python -m devtools.bench_email --emails 1000 --rps 2 --latency 0.05
+    python -m devtools.bench_email --modes pooled,batched --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+from devtools.bench_github import _free_port
+
+
+def _spawn_server(port: int, args) -> subprocess.Popen:
+    import httpx
+
+    process = subprocess.Popen([
+        sys.executable, "-m", "devtools.fake_resend", "--port", str(port),
+        "--rps", str(args.rps), "--latency", str(args.latency), "--fail-rate", str(args.fail_rate)
+    ])
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fake Resend server did not start")
+
+
+async def _naive_send(base_url: str, to: str) -> bool:
+    import httpx
+
+    payload = {"from": "Sage <bench@example.com>", "to": [to], "subject": "Bench", "html": "<p>Hi</p>"}
+    async with httpx.AsyncClient() as client:
+        try:
+            response = await client.post(f"{base_url}/emails", json=payload, headers={"Authorization": "Bearer bench-key"})
+            response.raise_for_status()
+            return True
+        except Exception:
+            return False
+
+
+async def _run(mode: str, args, base_url: str) -> dict:
+    import httpx
+    from services.email_service import EmailService
+
+    service = None
+    if mode == "naive":
+        send = lambda to: _naive_send(base_url, to)
+    else:
+        service = EmailService(
+            "bench-key", base_url=base_url, requests_per_second=args.rps,
+            batch_size=1 if mode == "pooled" else 100, max_retries=args.retries
+        )
+        send = lambda to: service.send_email(to, "Bench", "<p>Hi</p>")
+
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int) -> bool:
+        async with slots:
+            return await send(f"user{i}@example.com")
+
+    async with httpx.AsyncClient() as admin:
+        await admin.post(f"{base_url}/reset")
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(args.emails)))
+        elapsed = time.perf_counter() - started
+        if service is not None:
+            await service.close()
+        server = (await admin.get(f"{base_url}/stats")).json()
+    return {
+        "seconds": elapsed,
+        "delivered": sum(results),
+        "failed": len(results) - sum(results),
+        "server": server,
+        "client": service.stats() if service is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20, help="callers sending at once")
+    parser.add_argument("--rps", type=float, default=2, help="server requests per second (client is sized to match)")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests the server fails with a 500")
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--modes", default="naive,pooled,batched")
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = _spawn_server(port, args)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"📏 {args.emails} emails, {args.concurrency} callers, server {args.rps:g} req/s and {args.latency * 1000:.0f}ms per request")
+    failures = 0
+    try:
+        for mode in args.modes.split(","):
+            r = asyncio.run(_run(mode, args, base_url))
+            s = r["server"]
+            exact = r["delivered"] == s["recipients"] == args.emails and not s["duplicates"]
+            failures += not exact and mode != "naive"
+            batch = f", avg batch {r['client']['avg_batch_size']}" if r["client"] else ""
+            print(
+                f"  {mode:<8} {r['seconds']:7.2f}s | {r['delivered'] / r['seconds']:8.1f} emails/s | "
+                f"delivered {r['delivered']:>5}, failed {r['failed']:>5}, duplicates {s['duplicates']} | "
+                f"requests {s['requests']:>5}, connections {s['connections']:>5}, 429s {s['rate_limited']:>5}{batch} "
+                + ("✅" if exact else "❌")
+            )
+    finally:
+        server.terminate()
+        server.wait()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
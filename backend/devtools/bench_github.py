@@ -0,0 +1,238 @@
+"""Benchmark suite for the GitHub analyzer against the fake GitHub API.
+
+Runs every scenario for users with 10, 100 and 500 repos against
+``devtools.fake_github`` (started in a subprocess so its allocations stay out
+of the measurements). Each run reports wall-clock time, HTTP requests and
+GraphQL points seen by the server, and peak Python memory (``tracemalloc``,
+measured in a second identical run so tracing does not skew the timings).
+
+Scenarios and modes:
+- ``analyze``: profile analysis
+  - ``sync``: ``GitHubAnalyzer`` (PyGithub, one request at a time)
+  - ``rest``: ``AsyncGitHub`` over REST (concurrent pages and repos)
+  - ``graphql``: ``AsyncGitHub`` GraphQL mode (one query per 100 repos)
+- ``activity``: commits per day over the last 30 days
+  - ``sync``: ``GitHubAnalyzer.get_recent_activity``
+  - ``async``: ``github_activity.activity_windows``
+
+All modes of a scenario must return identical results. With ``--baseline``
+the run also fails when requests go up, or time or memory grow beyond the
+tolerances, so CI can catch regressions. Run from ``backend/``:
+
+    python -m devtools.bench_github --repos 10,100,500 --latency 0.05
+    python -m devtools.bench_github --modes rest,graphql --no-memory    # parity check only, fast
+    python -m devtools.bench_github --repos 10,100 --latency 0.01 --baseline devtools/bench_github_baseline.json
+
+Commit counts and events pages are cached in-process; the caches are cleared
+before every run unless ``--warm`` is given.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+ACTIVITY_DAYS = 30
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int):
+    """Fake GitHub in a thread of this process (for quick scripts)"""
+    import uvicorn
+    from devtools import fake_github
+
+    server = uvicorn.Server(uvicorn.Config(fake_github.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _spawn_server(port: int, latency: float, rate_limit: int) -> subprocess.Popen:
+    """Fake GitHub in a subprocess, once it accepts requests"""
+    import httpx
+
+    process = subprocess.Popen([
+        sys.executable, "-m", "devtools.fake_github",
+        "--port", str(port), "--latency", str(latency), "--rate-limit", str(rate_limit)
+    ])
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fake GitHub server did not start")
+
+
+def _server(base_url: str, path: str, method: str = "GET") -> dict:
+    import httpx
+    return httpx.request(method, f"{base_url}{path}").json()
+
+
+def _run_async(coroutine_factory: Callable, base_url: str, concurrency: int, mode: str = None):
+    from services.github_async import AsyncGitHub
+
+    async def run():
+        client = AsyncGitHub("bench-token", base_url=base_url, concurrency=concurrency, mode=mode)
+        try:
+            return await coroutine_factory(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def _runner(scenario: str, mode: str, username: str, base_url: str, concurrency: int) -> Callable[[], Dict]:
+    from services.github_activity import activity_windows
+    from services.github_integration import GitHubAnalyzer
+
+    if scenario == "analyze":
+        if mode == "sync":
+            return lambda: GitHubAnalyzer("bench-token", base_url=base_url).analyze_user(username)
+        return lambda: _run_async(lambda client: client.analyze_user(username), base_url, concurrency, mode)
+
+    if mode == "sync":
+        return lambda: GitHubAnalyzer("bench-token", base_url=base_url).get_recent_activity(username, ACTIVITY_DAYS)
+
+    async def windows(client):
+        return (await activity_windows(client, username, (ACTIVITY_DAYS,)))["windows"][ACTIVITY_DAYS]
+    return lambda: _run_async(windows, base_url, concurrency)
+
+
+def _measure(run: Callable[[], Dict], base_url: str, warm: bool, memory: bool) -> Tuple[Dict, Dict]:
+    from services.github_activity import event_page_cache
+    from services.github_integration import commit_count_cache
+
+    def prepare():
+        if not warm:
+            commit_count_cache.clear()
+            event_page_cache.clear()
+        _server(base_url, "/reset", "POST")
+
+    prepare()
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    stats = _server(base_url, "/stats")
+    measurement = {
+        "seconds": round(elapsed, 3),
+        "requests": stats["requests"],
+        "graphql_cost": stats["graphql_cost"],
+        "peak_in_flight": stats["peak_in_flight"],
+        "peak_kib": None,
+    }
+    if memory:
+        prepare()
+        tracemalloc.start()
+        try:
+            run()
+            measurement["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024)
+        finally:
+            tracemalloc.stop()
+    return result, measurement
+
+
+def _check_baseline(results: List[Dict], baseline: Dict, time_tolerance: float, memory_tolerance: float) -> List[str]:
+    """Regressions against a saved run; new scenarios are not checked"""
+    failures = []
+    for r in results:
+        key = f"{r['scenario']}/{r['mode']}/{r['repos']}"
+        base = baseline.get(key)
+        if not base:
+            continue
+        if r["requests"] > base["requests"]:
+            failures.append(f"{key}: {r['requests']} requests (baseline {base['requests']})")
+        # Small absolute slack so sub-100ms runs do not flap
+        if r["seconds"] > base["seconds"] * time_tolerance + 0.05:
+            failures.append(f"{key}: {r['seconds']:.2f}s (baseline {base['seconds']:.2f}s)")
+        if r["peak_kib"] and base.get("peak_kib") and r["peak_kib"] > base["peak_kib"] * memory_tolerance:
+            failures.append(f"{key}: {r['peak_kib']} KiB peak (baseline {base['peak_kib']} KiB)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", default="10,100,500", help="comma-separated repo counts")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request in seconds")
+    parser.add_argument("--concurrency", type=int, default=10, help="async client in-flight requests")
+    parser.add_argument("--scenarios", default="analyze,activity")
+    parser.add_argument("--modes", default="sync,rest,graphql", help="analyze modes")
+    parser.add_argument("--activity-modes", default="sync,async")
+    parser.add_argument("--warm", action="store_true", help="keep the commit count and events caches between runs")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--json", help="write the measurements to this file")
+    parser.add_argument("--baseline", help="fail on regressions against this file")
+    parser.add_argument("--save-baseline", help="write the measurements as a baseline")
+    parser.add_argument("--time-tolerance", type=float, default=2.0, help="allowed slowdown factor")
+    parser.add_argument("--memory-tolerance", type=float, default=1.5, help="allowed peak memory growth factor")
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = _spawn_server(port, args.latency, 10 ** 9)
+    base_url = f"http://127.0.0.1:{port}"
+    modes = {"analyze": args.modes.split(","), "activity": args.activity_modes.split(",")}
+    results: List[Dict] = []
+    mismatches = 0
+
+    print(f"📏 Server latency {args.latency * 1000:.0f}ms per request, async concurrency {args.concurrency}")
+    try:
+        for repos in (int(n) for n in args.repos.split(",")):
+            username = f"dev-{repos}"
+            for scenario in args.scenarios.split(","):
+                outputs = {}
+                for mode in modes[scenario]:
+                    run = _runner(scenario, mode, username, base_url, args.concurrency)
+                    outputs[mode], m = _measure(run, base_url, args.warm, not args.no_memory)
+                    results.append({"scenario": scenario, "mode": mode, "repos": repos, **m})
+                    memory = f"{m['peak_kib']:>7} KiB" if m["peak_kib"] is not None else "      - KiB"
+                    print(
+                        f"  {repos:>4} repos {scenario:<8} {mode:<7} {m['seconds']:7.2f}s | "
+                        f"requests {m['requests']:>4}, GraphQL points {m['graphql_cost']:>2}, "
+                        f"peak in flight {m['peak_in_flight']:>3}, peak memory {memory}"
+                        + (f" | error: {outputs[mode]['error']}" if "error" in outputs[mode] else "")
+                    )
+                reference_mode = modes[scenario][0]
+                for mode in modes[scenario][1:]:
+                    same = outputs[mode] == outputs[reference_mode]
+                    mismatches += not same
+                    print(f"  {repos:>4} repos {scenario:<8} {mode} vs {reference_mode}: {'identical ✅' if same else 'DIFFERENT ❌'}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({f"{r['scenario']}/{r['mode']}/{r['repos']}": r for r in results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.save_baseline}")
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = _check_baseline(results, json.load(f), args.time_tolerance, args.memory_tolerance)
+        for failure in failures:
+            print(f"  ❌ Regression: {failure}")
+        if not failures:
+            print(f"  ✅ No regressions against {args.baseline}")
+    sys.exit(1 if mismatches or failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Throughput of the Groq client against the fake rate-limited server.
+
+Fires a burst of concurrent chat completions at ``devtools.fake_groq`` and
+compares two clients:
+- ``naive``: no client-side budget, only backoff after a 429
+- ``budgeted``: the production limiter sized to the server's limits
+
+Run from ``backend/``:
+
+    python -m devtools.bench_groq --calls 120 --rpm 60 --tpm 12000 --window 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int):
+    import uvicorn
+    from devtools import fake_groq
+
+    server = uvicorn.Server(uvicorn.Config(fake_groq.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _run(mode: str, args, base_url: str) -> dict:
+    import httpx
+    from services.groq_client import GroqClient, GroqRateLimiter, RateLimitExceeded
+
+    if mode == "naive":
+        # Effectively unlimited local budget: every call goes straight out
+        limiter = GroqRateLimiter(10 ** 9, 10 ** 12, max_retries=args.retries, base_delay=0.2, max_delay=args.window, period=args.window)
+    else:
+        limiter = GroqRateLimiter(args.rpm, args.tpm, max_retries=args.retries, base_delay=0.2, max_delay=args.window, period=args.window)
+    client = GroqClient(base_url=base_url, limiter=limiter)
+
+    async with httpx.AsyncClient() as admin:
+        await admin.post(base_url.replace("/openai/v1", "/reset"))
+
+    messages = [{"role": "user", "content": "x" * (args.prompt_chars)}]
+    failed = 0
+
+    async def one():
+        nonlocal failed
+        try:
+            await client.chat_completion(messages, api_key="bench-key", model="fake", max_tokens=args.max_tokens)
+        except RateLimitExceeded:
+            failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.calls)))
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    async with httpx.AsyncClient() as admin:
+        server = (await admin.get(base_url.replace("/openai/v1", "/stats"))).json()
+
+    stats = next(iter(limiter.stats().values()))
+    return {
+        "mode": mode,
+        "elapsed": elapsed,
+        "succeeded": args.calls - failed,
+        "failed": failed,
+        "http_requests": server["requests"],
+        "server_429s": server["rate_limited"],
+        "retries": stats["retries"],
+        "waited": stats["waited_seconds"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=120)
+    parser.add_argument("--rpm", type=int, default=60, help="requests per window")
+    parser.add_argument("--tpm", type=int, default=12000, help="tokens per window")
+    parser.add_argument("--window", type=float, default=5.0, help="rate-limit window in seconds (Groq uses 60)")
+    parser.add_argument("--prompt-chars", type=int, default=400)
+    parser.add_argument("--max-tokens", type=int, default=100)
+    parser.add_argument("--retries", type=int, default=8)
+    parser.add_argument("--modes", default="naive,budgeted")
+    args = parser.parse_args()
+
+    os.environ["FAKE_GROQ_RPM"] = str(args.rpm)
+    os.environ["FAKE_GROQ_TPM"] = str(args.tpm)
+    os.environ["FAKE_GROQ_WINDOW"] = str(args.window)
+
+    port = _free_port()
+    server = _start_server(port)
+    base_url = f"http://127.0.0.1:{port}/openai/v1"
+
+    tokens_per_call = args.prompt_chars // 4 + args.max_tokens
+    ideal_rate = min(args.rpm, args.tpm / tokens_per_call) / args.window
+    print(f"📏 Limit: {args.rpm} req / {args.tpm} tok per {args.window:g}s → ideal {ideal_rate:.1f} calls/s")
+
+    for mode in args.modes.split(","):
+        r = asyncio.run(_run(mode, args, base_url))
+        rate = r["succeeded"] / r["elapsed"] if r["elapsed"] else 0
+        print(
+            f"  {r['mode']:<9} {r['succeeded']:>4}/{args.calls} ok in {r['elapsed']:6.2f}s "
+            f"({rate:5.1f} calls/s, {rate / ideal_rate * 100:3.0f}% of limit) | "
+            f"HTTP requests {r['http_requests']:>4}, 429s {r['server_429s']:>4}, "
+            f"retries {r['retries']:>4}, failed {r['failed']:>3}, queued {r['waited']:.1f}s"
+        )
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Stats and analytics reads: full ORM objects vs column projections.
+
+Seeds one user's goals, action plans, pomodoro sessions and check-ins in a
+scratch SQLite database, with AI analysis text and JSON the size the crews
+write, then reads each of them the way the endpoints do with:
+- ``orm``: ``select(Model)``, every column hydrated into a tracked object
+- ``projection``: ``models.projections.load``, the declared columns only
+
+and reports the best time of ``--rounds`` reads and the peak memory
+allocated during one (``tracemalloc``). Both sides must find the same rows.
+Run from ``backend/``:
+
+    python -m devtools.bench_projections --rows 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import models
+from models.base import UserBase
+from models.projections import CheckInSignal, GoalStatus, PlanFocus, PomodoroStat, load
+
+USER_ID = 1
+NOW = datetime(2026, 3, 2, 12)
+ANALYSIS = "Break the work into weekly deliverables and review them on Sundays. " * 40
+INSIGHTS = {"strengths": ["consistency"] * 20, "risks": [{"risk": "scope creep", "mitigation": "weekly scope review"}] * 20}
+
+
+def _seed(rows: int):
+    yield from (
+        models.Goal(
+            user_id=USER_ID, title=f"Goal {i}", description=ANALYSIS, goal_type="process",
+            status="active" if i % 3 else "completed", progress=i % 100, target_date=NOW + timedelta(days=i % 90),
+            updated_at=NOW - timedelta(days=i % 14), ai_analysis=ANALYSIS, ai_insights=INSIGHTS,
+            potential_obstacles=INSIGHTS, success_criteria=INSIGHTS, obstacles_identified=INSIGHTS
+        )
+        for i in range(rows)
+    )
+    yield from (
+        models.ActionPlan(
+            user_id=USER_ID, title=f"Plan {i}", description=ANALYSIS, focus_area=f"area-{i % 5}",
+            strategy=ANALYSIS, daily_routine=INSIGHTS, weekly_milestones=INSIGHTS, ai_analysis=ANALYSIS
+        )
+        for i in range(rows)
+    )
+    yield from (
+        models.PomodoroSession(
+            user_id=USER_ID, session_type="focus", duration_minutes=25, started_at=NOW - timedelta(hours=i),
+            completed=bool(i % 4), focus_rating=i % 5 + 1, commitment_description=f"Task {i}", notes=ANALYSIS
+        )
+        for i in range(rows)
+    )
+    yield from (
+        models.CheckIn(
+            user_id=USER_ID, timestamp=NOW - timedelta(hours=i), energy_level=i % 10 + 1, commitment=f"Ship {i}",
+            avoiding_what=ANALYSIS, shipped=bool(i % 3), ai_analysis=ANALYSIS, agent_debate=INSIGHTS
+        )
+        for i in range(rows)
+    )
+
+
+def _reads():
+    since = NOW - timedelta(days=365)
+    return {
+        "analytics goals": (
+            lambda db: _orm(db, select(models.Goal).filter(models.Goal.user_id == USER_ID)),
+            lambda db: load(db, GoalStatus, models.Goal.user_id == USER_ID),
+        ),
+        "analytics plans": (
+            lambda db: _orm(db, select(models.ActionPlan).filter(models.ActionPlan.user_id == USER_ID)),
+            lambda db: load(db, PlanFocus, models.ActionPlan.user_id == USER_ID),
+        ),
+        "pomodoro stats": (
+            lambda db: _orm(db, select(models.PomodoroSession).filter(
+                models.PomodoroSession.user_id == USER_ID, models.PomodoroSession.started_at >= since
+            )),
+            lambda db: load(db, PomodoroStat, models.PomodoroSession.user_id == USER_ID, models.PomodoroSession.started_at >= since),
+        ),
+        "weekly patterns": (
+            lambda db: _orm(db, select(models.CheckIn).filter(
+                models.CheckIn.user_id == USER_ID, models.CheckIn.timestamp >= since
+            ).order_by(models.CheckIn.timestamp)),
+            lambda db: load(db, CheckInSignal, models.CheckIn.user_id == USER_ID, models.CheckIn.timestamp >= since, order_by=models.CheckIn.timestamp),
+        ),
+    }
+
+
+async def _orm(db, query):
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def _measure(sessions, read, rounds: int):
+    best = float("inf")
+    for _ in range(rounds):
+        async with sessions() as db:
+            started = time.perf_counter()
+            rows = await read(db)
+            best = min(best, time.perf_counter() - started)
+    async with sessions() as db:
+        tracemalloc.start()
+        await read(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, peak, len(rows)
+
+
+async def run(args) -> int:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(UserBase.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as db:
+        db.add_all(_seed(args.rows))
+        await db.commit()
+
+    mismatches = 0
+    print(f"📏 {args.rows} rows per table, best of {args.rounds}")
+    for name, (orm, projected) in _reads().items():
+        orm_time, orm_peak, orm_rows = await _measure(sessions, orm, args.rounds)
+        time_, peak, rows = await _measure(sessions, projected, args.rounds)
+        mismatches += orm_rows != rows
+        print(f"  {name:<16} orm        {orm_time * 1000:8.1f} ms | {orm_peak / 2**20:7.1f} MiB peak")
+        print(f"  {name:<16} projection {time_ * 1000:8.1f} ms | {peak / 2**20:7.1f} MiB peak")
+        print(
+            f"  {name:<16} projection vs orm: {orm_time / time_:.1f}x faster, {orm_peak / max(peak, 1):.1f}x less memory, "
+            f"rows {'identical ✅' if orm_rows == rows else 'DIFFERENT ❌'}"
+        )
+    await engine.dispose()
+    os.remove(path)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="rows per table")
+    parser.add_argument("--rounds", type=int, default=3, help="best of this many reads")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Email rendering throughput: the previous f-string bodies vs email_templates.
+
+Renders every email of a ``--users`` batch with:
+- ``fstring``: the previous ``send_*`` bodies, the subject and the whole HTML
+  built with f-strings for every user, unescaped
+- ``rendered``: ``services.email_templates``: subject, escaped HTML and plain
+  text
+
+and reports renders per second for each email. The rendered side does more
+per email (a text part, escaping), so the interesting figures are the
+absolute rates against what delivery can take. The HTML of both must match
+(up to trailing whitespace) for plain usernames, or the run fails. Run from
+``backend/``:
+
+    python -m devtools.bench_templates --users 10000
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from typing import Callable, Dict, List
+
+TODAY = date(2026, 3, 2)
+STATS = {"streak": 0, "pending_tasks": ["Check your Action Plan", "Review your Goals"], "quote": "Consistency is the key to mastery."}
+
+
+def _report(i: int) -> Dict:
+    return {
+        "week_score": 60 + i % 40,
+        "focus_hours": i % 30,
+        "completed_goals": [f"Ship feature {n}" for n in range(i % 4)],
+        "review_text": f"You kept a steady rhythm on {i % 7} days this week.",
+    }
+
+
+# --- The previous f-string bodies, kept as the baseline ---
+
+def fstring_welcome(username: str) -> str:
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h1 style="color: #933DC9;">Welcome, {username}!</h1>
+            <p>We're excited to have you on board. Reflog is your companion for growth, accountability, and mastery.</p>
+            <p>Here's what you can do next:</p>
+            <ul>
+                <li>Set your first <strong>Goal</strong></li>
+                <li>Create a <strong>30-Day Action Plan</strong></li>
+                <li>Log a <strong>Life Decision</strong></li>
+            </ul>
+            <p>Let's grow together!</p>
+            <p>- The Sage Team</p>
+        </div>
+        """
+    return html
+
+
+def fstring_daily_digest(username: str, stats: dict) -> str:
+    subject = f"Your Daily Briefing - {TODAY.strftime('%b %d')}" # noqa: F841 (built on every send)
+    tasks_html = ""
+    for task in stats.get('pending_tasks', []):
+        tasks_html += f"<li>{task}</li>"
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h2 style="color: #933DC9;">Good Morning, {username}! ☀️</h2>
+            <p>Here is your focus for today:</p>
+
+            <h3>🎯 Today's Tasks</h3>
+            <ul>
+                {tasks_html if tasks_html else "<li>No specific tasks scheduled. Time to plan?</li>"}
+            </ul>
+
+            <p><strong>Current Streak:</strong> {stats.get('streak', 0)} days 🔥</p>
+
+            <div style="margin-top: 20px; padding: 15px; background-color: #f5f5f5; border-radius: 8px;">
+                <strong>💡 Daily Wisdom:</strong><br>
+                <em>"{stats.get('quote', 'Consistency is key.')}"</em>
+            </div>
+        </div>
+        """
+    return html
+
+
+def fstring_weekly_review(username: str, report: dict) -> str:
+    subject = f"Weekly Review - {TODAY.strftime('%b %d')}" # noqa: F841
+    goals_html = ""
+    for goal in report.get('completed_goals', []):
+        goals_html += f"<li>✅ {goal}</li>"
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h1 style="color: #933DC9;">Weekly Review 📊</h1>
+            <p>Great job this week, {username}!</p>
+
+            <div style="display: flex; justify-content: space-between; background-color: #f5f5f5; padding: 15px; border-radius: 8px; margin-bottom: 20px;">
+                <div style="text-align: center;">
+                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{report.get('week_score', 0)}</div>
+                    <div style="font-size: 12px; color: #666;">Week Score</div>
+                </div>
+                <div style="text-align: center;">
+                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{report.get('focus_hours', 0)}h</div>
+                    <div style="font-size: 12px; color: #666;">Focus Time</div>
+                </div>
+                <div style="text-align: center;">
+                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{len(report.get('completed_goals', []))}</div>
+                    <div style="font-size: 12px; color: #666;">Goals Hit</div>
+                </div>
+            </div>
+
+            <h3>🏆 Achievements</h3>
+            <ul>
+                {goals_html if goals_html else "<li>Keep pushing! Set some goals for next week.</li>"}
+            </ul>
+
+            <h3>💡 Sage's Insights</h3>
+            <div style="background-color: #f9f9f9; padding: 15px; border-left: 4px solid #933DC9; font-style: italic;">
+                {report.get('review_text', 'Keep up the consistency!')}
+            </div>
+
+            <p>Ready for next week? <a href="http://localhost:3000/dashboard" style="color: #933DC9;">Plan your week now</a>.</p>
+        </div>
+        """
+    return html
+
+
+def fstring_nudge(username: str, days_inactive: int) -> str:
+    subject = f"We miss you, {username}! 👋" # noqa: F841
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h2 style="color: #933DC9;">Hey {username},</h2>
+            <p>We noticed you haven't checked in for <strong>{days_inactive} days</strong>.</p>
+
+            <p>Consistency is the key to mastery. It's not about being perfect, it's about showing up.</p>
+
+            <div style="margin: 30px 0; text-align: center;">
+                <a href="http://localhost:3000/dashboard" style="background-color: #933DC9; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold;">Resume Your Streak</a>
+            </div>
+
+            <p><em>"The only bad workout is the one that didn't happen."</em></p>
+            <p>- The Sage Team</p>
+        </div>
+        """
+    return html
+
+
+def _renderers() -> Dict[str, Dict[str, Callable[[int, str], str]]]:
+    from services import email_templates as t
+
+    return {
+        "welcome": {
+            "fstring": lambda i, name: fstring_welcome(name),
+            "rendered": lambda i, name: t.render_welcome(name).html,
+        },
+        "daily_digest": {
+            "fstring": lambda i, name: fstring_daily_digest(name, STATS),
+            "rendered": lambda i, name: t.render_daily_digest(name, STATS, TODAY).html,
+        },
+        "weekly_review": {
+            "fstring": lambda i, name: fstring_weekly_review(name, _report(i)),
+            "rendered": lambda i, name: t.render_weekly_review(name, _report(i), TODAY).html,
+        },
+        "nudge": {
+            "fstring": lambda i, name: fstring_nudge(name, 2 + i % 30),
+            "rendered": lambda i, name: t.render_nudge(name, 2 + i % 30).html,
+        },
+    }
+
+
+def _normalize(html: str) -> List[str]:
+    return [line.rstrip() for line in html.splitlines()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="emails per batch")
+    parser.add_argument("--emails", default="welcome,daily_digest,weekly_review,nudge")
+    parser.add_argument("--rounds", type=int, default=3, help="best of this many batches")
+    args = parser.parse_args()
+
+    usernames = [f"dev-{i}" for i in range(args.users)]
+    renderers = _renderers()
+    mismatches = 0
+    print(f"📏 {args.users} users per batch, best of {args.rounds}")
+    for email in args.emails.split(","):
+        rates = {}
+        for mode, render in renderers[email].items():
+            best = float("inf")
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                for i, name in enumerate(usernames):
+                    render(i, name)
+                best = min(best, time.perf_counter() - started)
+            rates[mode] = args.users / best
+            print(f"  {email:<14} {mode:<9} {best * 1000:8.1f} ms | {rates[mode]:>10,.0f} renders/s")
+        same = all(
+            _normalize(renderers[email]["fstring"](i, name)) == _normalize(renderers[email]["rendered"](i, name))
+            for i, name in enumerate(usernames[:100])
+        )
+        mismatches += not same
+        print(
+            f"  {email:<14} rendered vs fstring: {rates['rendered'] / rates['fstring']:.2f}x, "
+            f"HTML {'identical ✅' if same else 'DIFFERENT ❌'}"
+        )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""Fake GitHub REST and GraphQL API with deterministic users, repos and commits.
+
+Synthetic users are configured by their login, ``<word>-<repos>[-c<commits>][-e<events>]``:
+``dev-500`` owns 500 repos, ``dev-100-c400`` owns 100 repos averaging 400
+commits each and ``dev-10-e8`` pushes about 8 events a day. ``ghost*`` users do
+not exist and any other name gets ``FAKE_GITHUB_REPOS`` repos. Lists are
+paginated with ``Link`` headers like GitHub, empty repos answer the commits
+endpoint with a 409, and every response carries ``x-ratelimit-*`` headers for
+the token's hourly budget (``GET /rate_limit`` is free, as on GitHub).
+``POST /graphql`` answers the analyzer's ``REPOS_QUERY`` from the same data.
+``/users/{login}/events`` serves up to 300 events from the last 90 days with
+``ETag``s; a matching ``If-None-Match`` gets a 304 that, like on GitHub, does
+not count against the rate limit.
+``/simulate/*`` endpoints push to or delete repos so incremental refreshes
+have something to find.
+Point ``GITHUB_API_BASE`` (or PyGithub's ``base_url``) at it:
+
+    python -m devtools.fake_github --port 8901 --latency 0.05 --rate-limit 5000
+    GITHUB_API_BASE=http://127.0.0.1:8901
+"""
+import asyncio
+import base64
+import bisect
+import hashlib
+import math
+import os
+import random
+import re
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+DEFAULT_REPOS = int(os.getenv("FAKE_GITHUB_REPOS", "30"))
+DEFAULT_COMMITS = int(os.getenv("FAKE_GITHUB_COMMITS", "48")) # Mean commits per repo (Pareto distributed)
+LATENCY_SECONDS = float(os.getenv("FAKE_GITHUB_LATENCY", "0.05"))
+RATE_LIMIT = int(os.getenv("FAKE_GITHUB_RATE_LIMIT", "5000")) # Requests per token per hour
+
+LANGUAGES = ["Python", "TypeScript", "JavaScript", "Go", "Rust", "Java", None]
+NOW = datetime.utcnow().replace(microsecond=0)
+
+app = FastAPI(title="Fake GitHub")
+
+counters = {"requests": 0, "in_flight": 0, "peak_in_flight": 0, "rate_limited": 0, "graphql_cost": 0, "not_modified": 0}
+by_endpoint: Dict[str, int] = defaultdict(int)
+_usage: Dict[str, List[float]] = defaultdict(list)
+_repo_cache: Dict[str, List[Dict]] = {}
+_event_cache: Dict[str, List[Dict]] = {}
+
+
+def _ts(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+_PROFILE_RE = re.compile(r"[a-z]+-(\d+)(?:-c(\d+))?(?:-e(\d+))?")
+
+
+def _profile(username: str) -> Dict:
+    """Repo count, mean commits per repo and mean events per day from the login"""
+    match = _PROFILE_RE.fullmatch(username)
+    if not match:
+        return {"repos": DEFAULT_REPOS, "commits": DEFAULT_COMMITS, "events": None}
+    repos, commits, events = match.groups()
+    return {
+        "repos": int(repos),
+        "commits": int(commits) if commits else DEFAULT_COMMITS,
+        "events": int(events) if events else None
+    }
+
+
+def _repos(username: str) -> List[Dict]:
+    """Deterministic repo facts for a user, sorted by name like GitHub"""
+    if username not in _repo_cache:
+        repos = []
+        profile = _profile(username)
+        for i in range(profile["repos"]):
+            rng = random.Random(f"{username}/{i}")
+            created = NOW - timedelta(days=rng.randint(1, 1100), seconds=rng.randint(0, 86399))
+            empty = rng.random() < 0.05
+            pushed = None if empty else created + (NOW - created) * rng.random() ** 2
+            repos.append({
+                "name": f"project-{i:03d}",
+                "fork": rng.random() < 0.1,
+                "size": 0 if empty else rng.randint(1, 50000),
+                "language": None if empty else rng.choice(LANGUAGES),
+                "created_at": created,
+                "pushed_at": pushed,
+                "commits": 0 if empty else int(rng.paretovariate(1.2) * profile["commits"] / 6),
+            })
+            repos[-1]["base_commits"] = repos[-1]["commits"]
+            repos[-1]["base_pushed"] = pushed
+            repos[-1]["pushed_dates"] = [] # Commits added by /simulate/push, oldest first
+        _repo_cache[username] = repos
+    return _repo_cache[username]
+
+
+def _push_event(owner: str, repo: str, commits: int, created: datetime, seq: str) -> Dict:
+    shas = [hashlib.sha1(f"{owner}/{repo}/{seq}/{i}".encode()).hexdigest() for i in range(commits)]
+    return {
+        "id": str(zlib.crc32(f"{owner}/{seq}".encode())),
+        "type": "PushEvent",
+        "actor": {"login": owner},
+        "repo": {"name": f"{owner}/{repo}"},
+        "payload": {
+            "size": commits,
+            "distinct_size": commits,
+            "ref": "refs/heads/main",
+            "head": shas[-1] if shas else None,
+            # Like GitHub, at most 20 commits are listed
+            "commits": [{"sha": sha, "message": f"Commit {i}", "distinct": True} for i, sha in enumerate(shas[:20])],
+        },
+        "public": True,
+        "created_at": _ts(created),
+    }
+
+
+def _events(username: str) -> List[Dict]:
+    """Deterministic public events, newest first, capped like GitHub at 300 / 90 days"""
+    if username not in _event_cache:
+        rng = random.Random(f"{username}/events")
+        repos = [r["name"] for r in _repos(username) if r["pushed_at"]] or ["project-000"]
+        events = []
+        daily = _profile(username)["events"]
+        for day in range(90):
+            for n in range(rng.randint(0, 2 * daily) if daily is not None else rng.choice([0, 0, 1, 2, 3, 5])):
+                created = NOW - timedelta(days=day, seconds=rng.randint(0, 86399))
+                repo = rng.choice(repos[:8])
+                if rng.random() < 0.75:
+                    events.append(_push_event(username, repo, rng.randint(1, 25), created, f"{day}/{n}"))
+                else:
+                    events.append({
+                        "id": str(zlib.crc32(f"{username}/{day}/{n}".encode())),
+                        "type": rng.choice(["WatchEvent", "CreateEvent", "IssuesEvent"]),
+                        "actor": {"login": username},
+                        "repo": {"name": f"{username}/{repo}"},
+                        "payload": {},
+                        "public": True,
+                        "created_at": _ts(created),
+                    })
+        events.sort(key=lambda e: e["created_at"], reverse=True)
+        _event_cache[username] = events[:300]
+    return _event_cache[username]
+
+
+def _sorted(request_sort: str, direction: str, repos: List[Dict]) -> List[Dict]:
+    """GitHub's list orders: by name (default) or by last push, never-pushed last"""
+    if request_sort != "pushed":
+        return repos
+    pushed = sorted((r for r in repos if r["pushed_at"]), key=lambda r: r["pushed_at"], reverse=direction != "asc")
+    return pushed + [r for r in repos if not r["pushed_at"]]
+
+
+def _find_repo(owner: str, name: str):
+    return next((r for r in _repos(owner) if r["name"] == name), None)
+
+
+def _endpoint(path: str) -> str:
+    path = re.sub(r"^/users/[^/]+", "/users/{user}", path)
+    return re.sub(r"^/repos/[^/]+/[^/]+", "/repos/{repo}", path)
+
+
+def _base(request: Request) -> str:
+    return str(request.base_url).rstrip("/")
+
+
+def _user_json(request: Request, username: str) -> Dict:
+    base = _base(request)
+    return {
+        "login": username,
+        "id": zlib.crc32(username.encode()),
+        "type": "User",
+        "url": f"{base}/users/{username}",
+        "html_url": f"https://github.com/{username}",
+        "repos_url": f"{base}/users/{username}/repos",
+        "public_repos": len(_repos(username)),
+    }
+
+
+def _repo_json(request: Request, owner: str, repo: Dict) -> Dict:
+    base = _base(request)
+    full_name = f"{owner}/{repo['name']}"
+    return {
+        "id": zlib.crc32(full_name.encode()),
+        "name": repo["name"],
+        "full_name": full_name,
+        "owner": {"login": owner, "url": f"{base}/users/{owner}", "type": "User"},
+        "private": False,
+        "fork": repo["fork"],
+        "size": repo["size"],
+        "language": repo["language"],
+        "created_at": _ts(repo["created_at"]),
+        "updated_at": _ts(repo["pushed_at"] or repo["created_at"]),
+        "pushed_at": _ts(repo["pushed_at"]) if repo["pushed_at"] else None,
+        "default_branch": "main",
+        "url": f"{base}/repos/{full_name}",
+        "html_url": f"https://github.com/{full_name}",
+    }
+
+
+def _commit_date(owner: str, repo: Dict, number: int) -> datetime:
+    """Date of the ``number``-th commit (0 is the oldest); later commits are never older"""
+    if number >= repo["base_commits"]:
+        return repo["pushed_dates"][number - repo["base_commits"]]
+    jitter = random.Random(f"{owner}/{repo['name']}/{number}").random()
+    span = repo["base_pushed"] - repo["created_at"]
+    return repo["created_at"] + span * ((number + jitter) / repo["base_commits"])
+
+
+def _commit_json(request: Request, owner: str, repo: Dict, number: int) -> Dict:
+    sha = hashlib.sha1(f"{owner}/{repo['name']}/{number}".encode()).hexdigest()
+    author = {"name": owner, "email": f"{owner}@example.com", "date": _ts(_commit_date(owner, repo, number))}
+    return {
+        "sha": sha,
+        "url": f"{_base(request)}/repos/{owner}/{repo['name']}/commits/{sha}",
+        "commit": {"message": f"Commit {number}", "author": author, "committer": author},
+        "author": {"login": owner, "type": "User"},
+        "committer": {"login": owner, "type": "User"},
+    }
+
+
+def _page(request: Request, items: List, default_per_page: int = 30) -> JSONResponse:
+    """One page of ``items`` with GitHub's Link header"""
+    per_page = min(100, int(request.query_params.get("per_page", default_per_page)))
+    page = max(1, int(request.query_params.get("page", 1)))
+    last = max(1, math.ceil(len(items) / per_page))
+    links = []
+    url = request.url.remove_query_params("page")
+    if page < last:
+        links.append(f'<{url.include_query_params(page=page + 1)}>; rel="next"')
+        links.append(f'<{url.include_query_params(page=last)}>; rel="last"')
+    if page > 1:
+        links.append(f'<{url.include_query_params(page=1)}>; rel="first"')
+        links.append(f'<{url.include_query_params(page=page - 1)}>; rel="prev"')
+    headers = {"link": ", ".join(links)} if links else {}
+    return JSONResponse(items[(page - 1) * per_page:page * per_page], headers=headers)
+
+
+@app.middleware("http")
+async def github_behaviour(request: Request, call_next):
+    """Latency, request accounting and the hourly rate limit"""
+    if request.url.path in ("/stats", "/reset", "/rate_limit") or request.url.path.startswith("/simulate/"):
+        return await call_next(request)
+
+    token = request.headers.get("authorization", "").split(" ")[-1] or "anonymous"
+    now = time.time()
+    usage = _usage[token] = [t for t in _usage[token] if now - t < 3600]
+    reset = int((usage[0] if usage else now) + 3600)
+    counters["requests"] += 1
+    by_endpoint[_endpoint(request.url.path)] += 1
+
+    if len(usage) >= RATE_LIMIT:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            status_code=403,
+            headers={
+                "x-ratelimit-limit": str(RATE_LIMIT),
+                "x-ratelimit-remaining": "0",
+                "x-ratelimit-reset": str(reset),
+                "x-ratelimit-used": str(len(usage)),
+            },
+            content={"message": "API rate limit exceeded", "documentation_url": "https://docs.github.com/rest"}
+        )
+    usage.append(now)
+
+    counters["in_flight"] += 1
+    counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+    try:
+        if LATENCY_SECONDS:
+            await asyncio.sleep(LATENCY_SECONDS)
+        response = await call_next(request)
+    finally:
+        counters["in_flight"] -= 1
+
+    if response.status_code == 304:
+        # Conditional requests answered from the client's cache are free
+        counters["not_modified"] += 1
+        usage.remove(now)
+    response.headers["x-ratelimit-limit"] = str(RATE_LIMIT)
+    response.headers["x-ratelimit-remaining"] = str(RATE_LIMIT - len(usage))
+    response.headers["x-ratelimit-reset"] = str(reset)
+    response.headers["x-ratelimit-used"] = str(len(usage))
+    return response
+
+
+def _not_found() -> JSONResponse:
+    return JSONResponse(status_code=404, content={"message": "Not Found"})
+
+
+@app.get("/users/{username}")
+async def get_user(request: Request, username: str):
+    if username.startswith("ghost"):
+        return _not_found()
+    return _user_json(request, username)
+
+
+@app.get("/users/{username}/repos")
+async def list_repos(request: Request, username: str):
+    if username.startswith("ghost"):
+        return _not_found()
+    repos = _sorted(request.query_params.get("sort", "full_name"), request.query_params.get("direction", "desc"), _repos(username))
+    return _page(request, [_repo_json(request, username, r) for r in repos])
+
+
+@app.get("/users/{username}/events")
+async def list_events(request: Request, username: str):
+    if username.startswith("ghost"):
+        return _not_found()
+    response = _page(request, _events(username))
+    etag = '"%s"' % hashlib.md5(response.body).hexdigest()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"etag": etag})
+    response.headers["etag"] = etag
+    return response
+
+
+@app.get("/repos/{owner}/{name}")
+async def get_repo(request: Request, owner: str, name: str):
+    repo = _find_repo(owner, name)
+    if not repo:
+        return _not_found()
+    return _repo_json(request, owner, repo)
+
+
+@app.get("/repos/{owner}/{name}/commits")
+async def list_commits(request: Request, owner: str, name: str):
+    repo = _find_repo(owner, name)
+    if not repo:
+        return _not_found()
+    if not repo["commits"]:
+        return JSONResponse(status_code=409, content={"message": "Git Repository is empty."})
+    # Newest first; ``since`` keeps commits dated at or after it
+    oldest = 0
+    if request.query_params.get("since"):
+        since = datetime.strptime(request.query_params["since"], "%Y-%m-%dT%H:%M:%SZ")
+        oldest = bisect.bisect_left(range(repo["commits"]), since, key=lambda n: _commit_date(owner, repo, n))
+    # Only the requested page is materialised
+    per_page = min(100, int(request.query_params.get("per_page", 30)))
+    page = max(1, int(request.query_params.get("page", 1)))
+    commits = [None] * (repo["commits"] - oldest)
+    start = (page - 1) * per_page
+    for i in range(start, min(start + per_page, len(commits))):
+        commits[i] = _commit_json(request, owner, repo, repo["commits"] - 1 - i)
+    if not commits:
+        return JSONResponse([])
+    return _page(request, commits)
+
+
+def _cursor(offset: int) -> str:
+    return base64.b64encode(f"cursor:{offset}".encode()).decode()
+
+
+@app.post("/graphql")
+async def graphql(request: Request):
+    """Only the analyzer's repositories query is understood"""
+    body = await request.json()
+    variables = body.get("variables") or {}
+    login = variables.get("login", "")
+    if "repositories" not in body.get("query", ""):
+        return {"errors": [{"message": "Unsupported query for the fake server"}]}
+    if login.startswith("ghost"):
+        return {
+            "data": {"user": None},
+            "errors": [{
+                "type": "NOT_FOUND",
+                "path": ["user"],
+                "message": f"Could not resolve to a User with the login of '{login}'."
+            }]
+        }
+
+    if variables.get("orderField") == "PUSHED_AT":
+        repos = _sorted("pushed", variables.get("direction", "DESC").lower(), _repos(login))
+    else:
+        repos = _repos(login)
+    # Cursors point at the last node of a page, as on GitHub
+    offset = int(base64.b64decode(variables["cursor"]).decode().split(":")[1]) + 1 if variables.get("cursor") else 0
+    page = repos[offset:offset + 100]
+    end = offset + len(page)
+    counters["graphql_cost"] += 1
+    nodes = [{
+        "name": r["name"],
+        "isFork": r["fork"],
+        "diskUsage": r["size"],
+        "pushedAt": _ts(r["pushed_at"]) if r["pushed_at"] else None,
+        "createdAt": _ts(r["created_at"]),
+        "primaryLanguage": {"name": r["language"]} if r["language"] else None,
+        "defaultBranchRef": {"target": {"history": {"totalCount": r["commits"]}}} if r["commits"] else None,
+    } for r in page]
+    return {"data": {
+        "rateLimit": {"cost": 1, "remaining": 5000 - counters["graphql_cost"]},
+        "user": {
+            "url": f"https://github.com/{login}",
+            "repositories": {
+                "totalCount": len(repos),
+                "pageInfo": {"hasNextPage": end < len(repos), "endCursor": _cursor(end - 1 if page else offset)},
+                "nodes": nodes,
+            },
+        },
+    }}
+
+
+@app.post("/simulate/push/{owner}/{name}")
+async def simulate_push(owner: str, name: str, commits: int = 1):
+    repo = _find_repo(owner, name)
+    if not repo:
+        return _not_found()
+    repo["pushed_at"] = datetime.utcnow().replace(microsecond=0)
+    repo["pushed_dates"] += [repo["pushed_at"]] * commits
+    repo["commits"] += commits
+    repo["size"] = repo["size"] or 1
+    events = _events(owner)
+    events.insert(0, _push_event(owner, name, commits, repo["pushed_at"], f"push/{len(events)}/{time.time()}"))
+    del events[300:]
+    return {"name": name, "pushed_at": _ts(repo["pushed_at"]), "commits": repo["commits"]}
+
+
+@app.delete("/simulate/repos/{owner}/{name}")
+async def simulate_delete(owner: str, name: str):
+    repo = _find_repo(owner, name)
+    if not repo:
+        return _not_found()
+    _repos(owner).remove(repo)
+    return {"deleted": name}
+
+
+@app.get("/rate_limit")
+async def rate_limit(request: Request):
+    token = request.headers.get("authorization", "").split(" ")[-1] or "anonymous"
+    now = time.time()
+    used = len([t for t in _usage[token] if now - t < 3600])
+    reset = int((_usage[token][0] if _usage[token] else now) + 3600)
+    core = {"limit": RATE_LIMIT, "remaining": max(0, RATE_LIMIT - used), "reset": reset, "used": used}
+    return {"resources": {"core": core, "graphql": core}, "rate": core}
+
+
+@app.get("/stats")
+async def stats():
+    return {**counters, "by_endpoint": dict(by_endpoint)}
+
+
+@app.post("/reset")
+async def reset():
+    _usage.clear()
+    by_endpoint.clear()
+    for key in counters:
+        counters[key] = 0
+    return counters
+
+
+def main():
+    import argparse
+    import uvicorn
+
+    global DEFAULT_REPOS, DEFAULT_COMMITS, LATENCY_SECONDS, RATE_LIMIT
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--repos", type=int, default=DEFAULT_REPOS, help="repos for logins without a count")
+    parser.add_argument("--commits", type=int, default=DEFAULT_COMMITS, help="mean commits per repo")
+    parser.add_argument("--latency", type=float, default=LATENCY_SECONDS, help="seconds per request")
+    parser.add_argument("--rate-limit", type=int, default=RATE_LIMIT, help="requests per token per hour")
+    args = parser.parse_args()
+    DEFAULT_REPOS, DEFAULT_COMMITS = args.repos, args.commits
+    LATENCY_SECONDS, RATE_LIMIT = args.latency, args.rate_limit
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
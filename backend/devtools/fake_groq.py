@@ -0,0 +1,144 @@
+"""Fake Groq chat-completions endpoint with real-looking rate limits.
+
+Enforces per-key requests-per-minute and tokens-per-minute with a sliding
+one-minute window, returns Groq's ``x-ratelimit-*`` headers on every response
+and answers over-budget calls with a 429, a ``retry-after`` header and Groq's
+error body. Point ``GROQ_API_BASE`` at it to exercise the client locally:
+
+    uvicorn devtools.fake_groq:app --port 8900
+    GROQ_API_BASE=http://127.0.0.1:8900/openai/v1
+"""
+import asyncio
+import math
+import os
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+REQUESTS_PER_MINUTE = int(os.getenv("FAKE_GROQ_RPM", "30"))
+TOKENS_PER_MINUTE = int(os.getenv("FAKE_GROQ_TPM", "6000"))
+LATENCY_SECONDS = float(os.getenv("FAKE_GROQ_LATENCY", "0.05"))
+# Shorter windows make benchmarks quick; the client must use the same period
+WINDOW = float(os.getenv("FAKE_GROQ_WINDOW", "60"))
+
+app = FastAPI(title="Fake Groq")
+
+# key -> deque of (timestamp, tokens)
+_usage: Dict[str, Deque[Tuple[float, int]]] = defaultdict(deque)
+counters = {"requests": 0, "accepted": 0, "rate_limited": 0}
+
+
+def _estimate_tokens(body: Dict) -> int:
+    prompt = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+    return math.ceil(prompt / 4) + int(body.get("max_tokens") or 256)
+
+
+def _window(key: str, now: float) -> Deque[Tuple[float, int]]:
+    usage = _usage[key]
+    while usage and now - usage[0][0] >= WINDOW:
+        usage.popleft()
+    return usage
+
+
+def _reset_after(usage: Deque[Tuple[float, int]], now: float, tokens_needed: int = 0) -> float:
+    """Seconds until enough of the window expires to admit ``tokens_needed`` more tokens"""
+    if not usage:
+        return 0.0
+    if not tokens_needed:
+        return max(0.0, WINDOW - (now - usage[0][0]))
+    used = sum(t for _, t in usage)
+    for ts, tokens in usage:
+        used -= tokens
+        if used + tokens_needed <= TOKENS_PER_MINUTE:
+            return max(0.0, WINDOW - (now - ts))
+    return WINDOW
+
+
+def _headers(usage: Deque[Tuple[float, int]], now: float) -> Dict[str, str]:
+    used_tokens = sum(t for _, t in usage)
+    return {
+        "x-ratelimit-limit-requests": str(REQUESTS_PER_MINUTE),
+        "x-ratelimit-remaining-requests": str(max(0, REQUESTS_PER_MINUTE - len(usage))),
+        "x-ratelimit-reset-requests": f"{_reset_after(usage, now):.2f}s",
+        "x-ratelimit-limit-tokens": str(TOKENS_PER_MINUTE),
+        "x-ratelimit-remaining-tokens": str(max(0, TOKENS_PER_MINUTE - used_tokens)),
+        "x-ratelimit-reset-tokens": f"{_reset_after(usage, now):.2f}s",
+    }
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    key = request.headers.get("authorization", "").removeprefix("Bearer ") or "anonymous"
+    now = time.monotonic()
+    usage = _window(key, now)
+    tokens = _estimate_tokens(body)
+    counters["requests"] += 1
+
+    if len(usage) + 1 > REQUESTS_PER_MINUTE:
+        kind, limit, used, wait = "requests", REQUESTS_PER_MINUTE, len(usage), _reset_after(usage, now)
+    elif sum(t for _, t in usage) + tokens > TOKENS_PER_MINUTE:
+        kind, limit, used, wait = "tokens", TOKENS_PER_MINUTE, sum(t for _, t in usage), _reset_after(usage, now, tokens)
+    else:
+        kind = None
+
+    if kind:
+        counters["rate_limited"] += 1
+        headers = _headers(usage, now)
+        headers["retry-after"] = str(math.ceil(wait))
+        return JSONResponse(
+            status_code=429,
+            headers=headers,
+            content={"error": {
+                "message": (
+                    f"Rate limit reached for model `{body.get('model')}` on {kind} per minute (RPM/TPM): "
+                    f"Limit {limit}, Used {used}, Requested {tokens if kind == 'tokens' else 1}. "
+                    f"Please try again in {wait:.2f}s."
+                ),
+                "type": kind,
+                "code": "rate_limit_exceeded",
+            }}
+        )
+
+    # Charged like Groq: prompt plus the full max_tokens reservation
+    usage.append((now, tokens))
+    counters["accepted"] += 1
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+
+    prompt_tokens = tokens - int(body.get("max_tokens") or 256)
+    completion_tokens = int(body.get("max_tokens") or 256)
+    return JSONResponse(
+        headers=_headers(usage, now),
+        content={
+            "id": f"chatcmpl-fake-{counters['accepted']}",
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "ok"},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+    )
+
+
+@app.get("/stats")
+async def stats():
+    return counters
+
+
+@app.post("/reset")
+async def reset():
+    _usage.clear()
+    for key in counters:
+        counters[key] = 0
+    return counters
@@ -0,0 +1,159 @@
+"""Fake Resend email API with a per-key request rate limit.
+
+Implements ``POST /emails`` and ``POST /emails/batch`` (at most 100 messages,
+all-or-nothing validation like Resend), enforces ``FAKE_RESEND_RPS`` requests
+per second per API key with a sliding one-second window, and answers
+over-budget calls with a 429, ``retry-after`` and ``ratelimit-*`` headers.
+``FAKE_RESEND_FAIL_RATE`` makes that share of requests fail with a 500, to
+exercise retries. Messages are not stored, only counted per recipient, so
+``/stats`` shows duplicates. Point ``RESEND_API_BASE`` at it:
+
+    python -m devtools.fake_resend --port 8902 --rps 10 --latency 0.05
+    RESEND_API_BASE=http://127.0.0.1:8902
+"""
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from typing import Deque, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+REQUESTS_PER_SECOND = float(os.getenv("FAKE_RESEND_RPS", "2"))
+LATENCY_SECONDS = float(os.getenv("FAKE_RESEND_LATENCY", "0.05"))
+FAIL_RATE = float(os.getenv("FAKE_RESEND_FAIL_RATE", "0"))
+MAX_BATCH = 100
+
+app = FastAPI(title="Fake Resend")
+
+_usage: Dict[str, Deque[float]] = defaultdict(deque)
+recipients: Counter = Counter()
+counters = {"requests": 0, "emails": 0, "batches": 0, "rate_limited": 0, "rejected": 0, "failed": 0, "connections": 0}
+_connections = set()
+
+
+def _error(status: int, name: str, message: str, headers: Dict[str, str] = None) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"statusCode": status, "name": name, "message": message}, headers=headers)
+
+
+def _invalid(email: Dict) -> str:
+    """Validation message for a message, or an empty string"""
+    for key in ("from", "to", "subject"):
+        if not email.get(key):
+            return f"Missing `{key}` field."
+    to: List[str] = email["to"] if isinstance(email["to"], list) else [email["to"]]
+    if len(to) > 50:
+        return "Too many recipients."
+    for address in to:
+        if "@" not in str(address):
+            return "Invalid `to` field. The email address needs to follow the `email@example.com` format."
+    return ""
+
+
+async def _admit(request: Request):
+    """Count the request; a JSONResponse when it must be refused"""
+    counters["requests"] += 1
+    # uvicorn keeps one (host, port) per connection; a new one means a new handshake
+    client = request.client and (request.client.host, request.client.port)
+    if client not in _connections:
+        _connections.add(client)
+        counters["connections"] += 1
+
+    key = request.headers.get("authorization", "").removeprefix("Bearer ")
+    if not key:
+        return _error(401, "missing_api_key", "Missing API key in the authorization header.")
+    now = time.monotonic()
+    usage = _usage[key]
+    while usage and now - usage[0] >= 1.0:
+        usage.popleft()
+    headers = {"ratelimit-limit": f"{REQUESTS_PER_SECOND:g}", "ratelimit-policy": f"{REQUESTS_PER_SECOND:g};w=1"}
+    if len(usage) >= REQUESTS_PER_SECOND:
+        counters["rate_limited"] += 1
+        reset = max(0.0, 1.0 - (now - usage[0]))
+        return _error(429, "rate_limit_exceeded", f"Too many requests. You can only make {REQUESTS_PER_SECOND:g} requests per second.", {
+            **headers, "ratelimit-remaining": "0", "ratelimit-reset": f"{reset:.2f}", "retry-after": f"{max(1, round(reset))}"
+        })
+    usage.append(now)
+    await asyncio.sleep(LATENCY_SECONDS)
+    if FAIL_RATE and random.random() < FAIL_RATE:
+        counters["failed"] += 1
+        return _error(500, "internal_server_error", "An unexpected error occurred.")
+    return None
+
+
+def _deliver(email: Dict) -> Dict:
+    to = email["to"] if isinstance(email["to"], list) else [email["to"]]
+    recipients.update(to)
+    counters["emails"] += 1
+    return {"id": str(uuid.uuid4())}
+
+
+@app.post("/emails")
+async def send_email(request: Request):
+    refused = await _admit(request)
+    if refused:
+        return refused
+    email = await request.json()
+    problem = _invalid(email)
+    if problem:
+        counters["rejected"] += 1
+        return _error(422, "validation_error", problem)
+    return _deliver(email)
+
+
+@app.post("/emails/batch")
+async def send_batch(request: Request):
+    refused = await _admit(request)
+    if refused:
+        return refused
+    emails = await request.json()
+    if not isinstance(emails, list) or not emails:
+        return _error(422, "validation_error", "The request body must be a non-empty array.")
+    if len(emails) > MAX_BATCH:
+        return _error(422, "validation_error", f"Too many emails in the batch (max {MAX_BATCH}).")
+    for i, email in enumerate(emails):
+        problem = _invalid(email)
+        if problem:
+            counters["rejected"] += 1
+            return _error(422, "validation_error", f"emails[{i}]: {problem}")
+    counters["batches"] += 1
+    return {"data": [_deliver(email) for email in emails]}
+
+
+@app.get("/stats")
+async def stats():
+    duplicates = sum(count - 1 for count in recipients.values() if count > 1)
+    return {**counters, "recipients": len(recipients), "duplicates": duplicates}
+
+
+@app.post("/reset")
+async def reset():
+    _usage.clear()
+    _connections.clear()
+    recipients.clear()
+    for key in counters:
+        counters[key] = 0
+    return counters
+
+
+def main():
+    import argparse
+    import uvicorn
+
+    global REQUESTS_PER_SECOND, LATENCY_SECONDS, FAIL_RATE
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8902)
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND, help="requests per second per API key")
+    parser.add_argument("--latency", type=float, default=LATENCY_SECONDS, help="seconds per request")
+    parser.add_argument("--fail-rate", type=float, default=FAIL_RATE, help="share of requests answered with a 500")
+    args = parser.parse_args()
+    REQUESTS_PER_SECOND, LATENCY_SECONDS, FAIL_RATE = args.rps, args.latency, args.fail_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
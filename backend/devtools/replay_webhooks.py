@@ -0,0 +1,90 @@
+"""Replay recorded GitHub webhook deliveries against the API.
+
+Each file holds ``{"event", "delivery", "payload"}``, the shape of a delivery
+under a repo's Settings → Webhooks → Recent Deliveries. Bodies are signed with
+``GITHUB_WEBHOOK_SECRET`` exactly as GitHub signs them. Run from ``backend/``:
+
+    python -m devtools.replay_webhooks --url http://127.0.0.1:8000 --owner dev-5
+    python -m devtools.replay_webhooks devtools/webhook_payloads/01_push.json --repeat 2
+
+``--owner`` rewrites the repo owner so the deliveries land in a local user's
+database. ``--fresh`` stamps pushes with the current time so they count
+towards today. ``--repeat`` sends every delivery again under the same id, which
+must come back as ``duplicate``.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(__file__), "webhook_payloads")
+
+
+def load(path: str, owner: str = None, fresh: bool = False) -> dict:
+    with open(path) as f:
+        delivery = json.load(f)
+    delivery.setdefault("delivery", str(uuid.uuid4()))
+    payload = delivery["payload"]
+    repo = payload.get("repository") or {}
+    if owner and repo:
+        repo["owner"].update({"login": owner, "html_url": f"https://github.com/{owner}"})
+        if "name" in repo["owner"]:
+            repo["owner"]["name"] = owner
+        repo["full_name"] = f"{owner}/{repo['name']}"
+    if fresh and delivery["event"] == "push":
+        now = datetime.now(timezone.utc)
+        repo["pushed_at"] = int(now.timestamp())
+        for commit in payload.get("commits") or []:
+            commit["timestamp"] = now.isoformat()
+        if payload.get("head_commit"):
+            payload["head_commit"]["timestamp"] = now.isoformat()
+    return delivery
+
+
+def send(client, url: str, secret: str, delivery: dict):
+    from services.github_webhooks import sign
+
+    body = json.dumps(delivery["payload"]).encode()
+    return client.post(
+        f"{url.rstrip('/')}/webhooks/github",
+        content=body,
+        headers={
+            "Content-Type": "application/json",
+            "User-Agent": "GitHub-Hookshot/replay",
+            "X-GitHub-Event": delivery["event"],
+            "X-GitHub-Delivery": delivery["delivery"],
+            "X-Hub-Signature-256": sign(secret, body),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help=f"delivery files (default: {PAYLOAD_DIR}/*.json, in name order)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--secret", default=os.getenv("GITHUB_WEBHOOK_SECRET"))
+    parser.add_argument("--owner", help="rewrite the repository owner login")
+    parser.add_argument("--fresh", action="store_true", help="stamp pushes with the current time")
+    parser.add_argument("--repeat", type=int, default=1, help="send each delivery this many times")
+    args = parser.parse_args()
+    if not args.secret:
+        parser.error("set GITHUB_WEBHOOK_SECRET or pass --secret")
+
+    import httpx
+
+    files = args.files or sorted(glob.glob(os.path.join(PAYLOAD_DIR, "*.json")))
+    with httpx.Client(timeout=30) as client:
+        for path in files:
+            delivery = load(path, args.owner, args.fresh)
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = send(client, args.url, args.secret, delivery)
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"{os.path.basename(path):<32} {delivery['event']:<10} {response.status_code} {elapsed:6.0f}ms {response.text[:160]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from config import settings
 from database import init_system_db
+from services import job_queue, github_client, github_refresh_scheduler, scheduler, email_service, timer_wheel, domain_events
+from services.groq_client import RateLimitExceeded, groq_client
 from routers import (
     users,
     goals,
@@ -14,7 +18,10 @@ from routers import (
     system,
     analytics,
     learning,
-    leetcode
+    leetcode,
+    events,
+    github,
+    webhooks
 )
 
 @asynccontextmanager
@@ -27,10 +34,31 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"❌ CRITICAL ERROR: Failed to initialize System Database: {e}")
     
+    # Background AI job workers
+    try:
+        await job_queue.start()
+    except Exception as e:
+        print(f"❌ Failed to start AI job workers: {e}")
+    
+    if settings.SCHEDULER_ENABLED:
+        try:
+            await scheduler.start()
+            await timer_wheel.start()
+        except Exception as e:
+            print(f"❌ Failed to start the job scheduler: {e}")
+    
     yield
     
     # Shutdown: Clean up resources if needed
     print("🛑 Shutting down...")
+    await job_queue.stop()
+    await scheduler.stop()
+    await github_refresh_scheduler.close()
+    await timer_wheel.stop()
+    await domain_events.stop()
+    await email_service.close()
+    await groq_client.close()
+    await github_client.close()
 
 app = FastAPI(title="Reflog AI Mentor API", version="1.0.0", lifespan=lifespan)
 
@@ -47,6 +75,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(RateLimitExceeded)
+async def groq_rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    """Groq quota exhausted after retries: tell the client when to come back"""
+    retry_after = max(1, int(round(exc.retry_after)))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "AI service is busy, please retry shortly", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)}
+    )
+
 # Include Routers
 app.include_router(system.router, tags=["System"])
 app.include_router(users.router, tags=["Users"])
@@ -60,6 +98,9 @@ app.include_router(analytics.router, tags=["Analytics"])
 app.include_router(learning.router, tags=["Learning"])
 app.include_router(leetcode.router, tags=["LeetCode"])
 app.include_router(notifications.router, tags=["Notifications"])
+app.include_router(events.router, tags=["Events"])
+app.include_router(github.router, tags=["GitHub"])
+app.include_router(webhooks.router, tags=["Webhooks"])
 
 @app.get("/")
 def read_root():
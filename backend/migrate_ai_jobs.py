@@ -0,0 +1,67 @@
+import asyncio
+from database import SystemSessionLocal, system_engine, get_user_db_engine
+from sqlalchemy import text, select
+import models
+
+# Columns added after the tables were first created (create_all does not alter tables)
+SYSTEM_COLUMNS = {
+    "ai_jobs": [
+        ("max_attempts", "INTEGER DEFAULT 3"),
+        ("run_after", "TIMESTAMP"),
+        ("locked_by", "VARCHAR(100)"),
+        ("lease_expires_at", "TIMESTAMP"),
+    ]
+}
+
+USER_COLUMNS = {
+    "goals": [
+        ("ai_analysis", "TEXT"),
+        ("ai_insights", "JSON"),
+        ("obstacles_identified", "JSON"),
+    ],
+    "subgoals": [
+        ('"order"', "INTEGER DEFAULT 0"),
+    ],
+    "action_plans": [
+        ("plan_type", "VARCHAR(50) DEFAULT '30_day'"),
+        ("ai_analysis", "TEXT"),
+        ("skills_to_focus", "JSON"),
+        ("milestones", "JSON"),
+        ("current_day", "INTEGER DEFAULT 1"),
+        ("completion_percentage", "FLOAT DEFAULT 0"),
+        ("status", "VARCHAR(20) DEFAULT 'active'"),
+    ],
+    "daily_tasks": [
+        ("title", "VARCHAR(500)"),
+        ("difficulty", "VARCHAR(50)"),
+        ("estimated_time", "INTEGER"),
+        ("actual_time_spent", "INTEGER"),
+        ("difficulty_rating", "INTEGER"),
+        ("ai_feedback", "TEXT"),
+    ],
+}
+
+async def add_columns(engine, tables):
+    for table, columns in tables.items():
+        for col_name, col_type in columns:
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}"))
+                print(f"Added {table}.{col_name}")
+            except Exception as e:
+                print(f"Skipping {table}.{col_name} (might already exist or error: {e})")
+
+async def migrate():
+    print("Migrating system database...")
+    await add_columns(system_engine, SYSTEM_COLUMNS)
+
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(models.User).filter(models.User.neon_db_url != None))
+        users = result.scalars().all()
+
+    for user in users:
+        print(f"Migrating user database for {user.github_username}...")
+        await add_columns(get_user_db_engine(user.neon_db_url), USER_COLUMNS)
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
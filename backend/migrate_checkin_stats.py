@@ -0,0 +1,23 @@
+import asyncio
+from database import SystemSessionLocal, get_user_db_engine
+from sqlalchemy import select
+import models
+from migrate_notifications import add_indexes
+
+# The commitment stats read a user's check-ins by time (create_all adds the
+# index to new databases only)
+USER_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_checkins_user_timestamp ON checkins (user_id, timestamp)",
+]
+
+async def migrate():
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(models.User).filter(models.User.neon_db_url != None))
+        users = result.scalars().all()
+
+    for user in users:
+        print(f"Migrating user database for {user.github_username}...")
+        await add_indexes(get_user_db_engine(user.neon_db_url), USER_INDEXES)
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
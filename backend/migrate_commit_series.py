@@ -0,0 +1,25 @@
+import asyncio
+from database import SystemSessionLocal, get_user_db_engine
+from sqlalchemy import select
+from migrate_ai_jobs import add_columns
+import models
+
+# github_analysis.commit_rhythm holds the commit series metrics; the
+# github_commit_series table itself is created by create_all
+USER_COLUMNS = {
+    "github_analysis": [
+        ("commit_rhythm", "JSON"),
+    ]
+}
+
+async def migrate():
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(models.User).filter(models.User.neon_db_url != None))
+        users = result.scalars().all()
+
+    for user in users:
+        print(f"Migrating user database for {user.github_username}...")
+        await add_columns(get_user_db_engine(user.neon_db_url), USER_COLUMNS)
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,17 @@
+import asyncio
+from database import system_engine
+from migrate_ai_jobs import add_columns
+
+# users.github_refreshed_at backs the scheduled GitHub refresh claim
+SYSTEM_COLUMNS = {
+    "users": [
+        ("github_refreshed_at", "TIMESTAMP"),
+    ]
+}
+
+async def migrate():
+    print("Migrating system database...")
+    await add_columns(system_engine, SYSTEM_COLUMNS)
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
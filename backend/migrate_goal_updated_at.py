@@ -0,0 +1,29 @@
+import asyncio
+from database import SystemSessionLocal, get_user_db_engine
+from sqlalchemy import select, text
+import models
+from migrate_ai_jobs import add_columns
+
+# The goal endpoints set Goal.updated_at, and the analytics flag goals not
+# updated for a week; goals created before the column count from their creation
+USER_COLUMNS = {
+    "goals": [
+        ("updated_at", "TIMESTAMP"),
+    ]
+}
+
+async def migrate():
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(models.User).filter(models.User.neon_db_url != None))
+        users = result.scalars().all()
+
+    for user in users:
+        print(f"Migrating user database for {user.github_username}...")
+        engine = get_user_db_engine(user.neon_db_url)
+        await add_columns(engine, USER_COLUMNS)
+        async with engine.begin() as conn:
+            result = await conn.execute(text("UPDATE goals SET updated_at = created_at WHERE updated_at IS NULL"))
+        print(f"Backfilled goals.updated_at for {result.rowcount} goals")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
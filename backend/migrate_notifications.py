@@ -0,0 +1,44 @@
+import asyncio
+from database import SystemSessionLocal, get_user_db_engine
+from sqlalchemy import select, text
+import models
+from migrate_ai_jobs import add_columns
+
+# NotificationService has always set a priority, but the column was missing;
+# notification_timers itself is created by create_all
+USER_COLUMNS = {
+    "notifications": [
+        ("priority", "VARCHAR(20) DEFAULT 'normal'"),
+        ("dedup_key", "VARCHAR(200)"),
+    ]
+}
+
+# The checks insert with ON CONFLICT DO NOTHING against this index. Existing
+# rows keep a NULL dedup_key, which never conflicts: the checks could not
+# insert before the priority column existed, so there is nothing to backfill.
+USER_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_notification_dedup ON notifications (user_id, notification_type, dedup_key)",
+]
+
+async def add_indexes(engine, statements):
+    for statement in statements:
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(statement))
+            print(f"Applied: {statement}")
+        except Exception as e:
+            print(f"Skipping index ({e})")
+
+async def migrate():
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(models.User).filter(models.User.neon_db_url != None))
+        users = result.scalars().all()
+
+    for user in users:
+        print(f"Migrating user database for {user.github_username}...")
+        engine = get_user_db_engine(user.neon_db_url)
+        await add_columns(engine, USER_COLUMNS)
+        await add_indexes(engine, USER_INDEXES)
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
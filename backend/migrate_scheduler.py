@@ -0,0 +1,18 @@
+import asyncio
+from database import system_engine
+from migrate_ai_jobs import add_columns
+
+# scheduler_job_runs.lease_expires_at tells runs left behind by a crashed
+# process apart; fanout_checkpoints itself is created by create_all
+SYSTEM_COLUMNS = {
+    "scheduler_job_runs": [
+        ("lease_expires_at", "TIMESTAMP"),
+    ]
+}
+
+async def migrate():
+    print("Migrating system database...")
+    await add_columns(system_engine, SYSTEM_COLUMNS)
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,27 @@
+import asyncio
+from database import system_engine
+from sqlalchemy import text
+from migrate_ai_jobs import add_columns
+
+# Each user's timezone and reminder windows; existing users get the defaults,
+# which match the previous fixed times for UTC (digest at 08:00, reminders at 18:00)
+SYSTEM_COLUMNS = {
+    "users": [
+        ("timezone", "VARCHAR(64) DEFAULT 'UTC'"),
+        ("morning_hour", "INTEGER DEFAULT 8"),
+        ("evening_hour", "INTEGER DEFAULT 18"),
+    ]
+}
+
+async def migrate():
+    print("Migrating system database...")
+    await add_columns(system_engine, SYSTEM_COLUMNS)
+    try:
+        async with system_engine.begin() as conn:
+            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_timezone ON users (timezone)"))
+        print("Added index ix_users_timezone")
+    except Exception as e:
+        print(f"Skipping index ix_users_timezone ({e})")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -3,5 +3,8 @@ from .user import User, CheckIn
 from .goal import Goal, SubGoal, Task, Milestone, GoalProgress, ActionPlan, DailyTask, PomodoroSession
 from .leetcode import LeetCodeProblem, RepetitionLog
 from .notification import Notification
-from .insights import GitHubAnalysis, AgentAdvice, LifeEvent
+from .insights import GitHubAnalysis, GitHubRepoState, GitHubCommitSeries, GitHubRepoActivity, GitHubWebhookDelivery, AgentAdvice, LifeEvent
+from .job import AIJob, SchedulerJobRun, FanOutCheckpoint, NotificationTimer
+from . import projections
+from .projections import GoalStatus, PlanFocus, PomodoroStat, CheckInSignal
 from .schemas import *
@@ -20,13 +20,17 @@ class Goal(UserBase):
     
     # Dates
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow) # Last edit or progress update
     target_date = Column(DateTime)
     completed_at = Column(DateTime, nullable=True)
     
     # AI Analysis
     why_this_matters = Column(Text, nullable=True)
     potential_obstacles = Column(JSON, nullable=True)
-    success_criteria = Column(Text, nullable=True)
+    success_criteria = Column(JSON, nullable=True) # {"criteria": [...]}
+    ai_analysis = Column(Text, nullable=True)
+    ai_insights = Column(JSON, nullable=True)
+    obstacles_identified = Column(JSON, nullable=True)
     
     # Relationships
     subgoals = relationship("SubGoal", back_populates="parent_goal", cascade="all, delete-orphan")
@@ -41,6 +45,7 @@ class SubGoal(UserBase):
     title = Column(String(500))
     description = Column(Text, nullable=True)
     status = Column(String(50), default="pending")
+    order = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     
@@ -106,10 +111,20 @@ class ActionPlan(UserBase):
     start_date = Column(DateTime)
     end_date = Column(DateTime)
     
+    plan_type = Column(String(50), default="30_day")
+    
     # AI Generated Content
     strategy = Column(Text)
     daily_routine = Column(JSON) # Structured daily schedule
     weekly_milestones = Column(JSON)
+    ai_analysis = Column(Text, nullable=True)
+    skills_to_focus = Column(JSON, nullable=True)
+    milestones = Column(JSON, nullable=True)
+    
+    # Progress
+    current_day = Column(Integer, default=1)
+    completion_percentage = Column(Float, default=0.0)
+    status = Column(String(20), default="active") # generating, active, failed
     
     created_at = Column(DateTime, default=datetime.utcnow)
     active = Column(Boolean, default=True)
@@ -125,12 +140,18 @@ class DailyTask(UserBase):
     day_number = Column(Integer) # Day 1, Day 2, etc.
     date = Column(DateTime) # Specific date
     
+    title = Column(String(500), nullable=True)
     task_description = Column(Text)
     task_type = Column(String(50)) # learning, coding, building
+    difficulty = Column(String(50), nullable=True)
+    estimated_time = Column(Integer, nullable=True) # minutes
     
     completed = Column(Boolean, default=False)
     completed_at = Column(DateTime, nullable=True)
     notes = Column(Text, nullable=True)
+    actual_time_spent = Column(Integer, nullable=True) # minutes
+    difficulty_rating = Column(Integer, nullable=True) # 1-5
+    ai_feedback = Column(Text, nullable=True)
     
     action_plan = relationship("ActionPlan", back_populates="daily_tasks")
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, LargeBinary, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSON
 from datetime import datetime
 from .base import UserBase
@@ -16,9 +16,75 @@ class GitHubAnalysis(UserBase):
     
     languages = Column(JSON)
     patterns = Column(JSON)
+    commit_rhythm = Column(JSON, nullable=True) # Streaks, burstiness, timing; see services/commit_series.py
     
     analyzed_at = Column(DateTime, default=datetime.utcnow)
 
+class GitHubRepoState(UserBase):
+    """Last seen facts per repo, so refreshes only re-fetch repos pushed since"""
+    __tablename__ = "github_repo_state"
+    __table_args__ = (UniqueConstraint("user_id", "name", name="uq_github_repo_state_user_repo"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, index=True)
+    name = Column(String(255))
+    
+    fork = Column(Boolean, default=False)
+    size = Column(Integer, default=0) # KB
+    language = Column(String(100), nullable=True)
+    commit_count = Column(Integer, default=0)
+    
+    created_at = Column(DateTime, nullable=True) # Repo creation on GitHub
+    pushed_at = Column(DateTime, nullable=True)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+class GitHubCommitSeries(UserBase):
+    """The user's default-branch commits per repo as packed little-endian arrays
+
+    ``day_counts`` holds one uint16 per day from ``first_day`` (first commit) to
+    the last commit; ``hour_of_week`` holds 168 uint32 counts, Monday 00:00 UTC first.
+    """
+    __tablename__ = "github_commit_series"
+    __table_args__ = (UniqueConstraint("user_id", "name", name="uq_github_commit_series_user_repo"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, index=True)
+    name = Column(String(255))
+    
+    first_day = Column(Date, nullable=True)
+    day_counts = Column(LargeBinary, default=b"")
+    hour_of_week = Column(LargeBinary, default=b"")
+    total_commits = Column(Integer, default=0)
+    head_sha = Column(String(40), nullable=True) # Newest default-branch commit seen
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class GitHubRepoActivity(UserBase):
+    """Per-repo, per-day activity from GitHub webhooks"""
+    __tablename__ = "github_repo_activity"
+    __table_args__ = (UniqueConstraint("user_id", "name", "day", name="uq_github_repo_activity_user_repo_day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, index=True)
+    name = Column(String(255))
+    day = Column(Date) # UTC
+    
+    commits = Column(Integer, default=0)
+    pushes = Column(Integer, default=0)
+    refs_created = Column(Integer, default=0) # Branches and tags
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class GitHubWebhookDelivery(UserBase):
+    """Processed webhook deliveries, so GitHub's redeliveries are not counted twice"""
+    __tablename__ = "github_webhook_deliveries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    delivery_id = Column(String(64), unique=True, index=True) # X-GitHub-Delivery
+    event = Column(String(50))
+    repo = Column(String(255), nullable=True)
+    received_at = Column(DateTime, default=datetime.utcnow)
+
 class AgentAdvice(UserBase):
     __tablename__ = "agent_advice"
     
@@ -0,0 +1,79 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSON
+from datetime import datetime
+from .base import SystemBase
+
+class AIJob(SystemBase):
+    """Background AI work, persisted before the request returns"""
+    __tablename__ = "ai_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, index=True)
+    github_username = Column(String(255), index=True)
+
+    job_type = Column(String(50), index=True) # checkin_analysis, goal_analysis, action_plan, ...
+    status = Column(String(20), default="pending", index=True) # pending, running, succeeded, dead
+    payload = Column(JSON, nullable=True) # Never holds API keys
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Retries
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow, index=True) # Backoff between attempts
+
+    # Lease (visibility timeout): a running job whose lease expired is claimable again
+    locked_by = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class SchedulerJobRun(SystemBase):
+    """One run of a cron job; the unique slot lets a single process claim it"""
+    __tablename__ = "scheduler_job_runs"
+    __table_args__ = (UniqueConstraint("job_name", "scheduled_for", name="uq_scheduler_job_run_slot"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String(100), index=True)
+    scheduled_for = Column(DateTime, index=True) # Cron slot (UTC), before jitter
+    status = Column(String(20), default="running") # running, succeeded, failed, timed_out, interrupted
+    worker_id = Column(String(100), nullable=True)
+    caught_up = Column(Boolean, default=False) # Run for a slot missed while no scheduler was up
+    # Renewed while the run is going; a "running" row past its lease was left by a dead process
+    lease_expires_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+
+
+class FanOutCheckpoint(SystemBase):
+    """A user finished (or failed) by one run of a fan-out job; resumed runs skip succeeded users"""
+    __tablename__ = "fanout_checkpoints"
+    __table_args__ = (UniqueConstraint("job_name", "run_key", "user_id", name="uq_fanout_checkpoint_user"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String(100), index=True)
+    run_key = Column(String(100), index=True) # Period the run covers, e.g. 2026-W42
+    user_id = Column(Integer)
+    status = Column(String(20)) # succeeded, failed
+    attempts = Column(Integer, default=1)
+    duration_seconds = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class NotificationTimer(SystemBase):
+    """A time-based notification trigger, armed on the timer wheel when it comes close"""
+    __tablename__ = "notification_timers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(200), unique=True, index=True) # e.g. commitment_reminder:<checkin id>:18
+    kind = Column(String(50))
+    user_id = Column(Integer, index=True)
+    payload = Column(JSON, nullable=True)
+    fire_at = Column(DateTime, index=True) # UTC
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
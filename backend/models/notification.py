@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSON
 from datetime import datetime
 from .base import UserBase
 
 class Notification(UserBase):
     __tablename__ = "notifications"
+    # A check inserts each occurrence (a milestone, a decision at 30 days) once
+    __table_args__ = (UniqueConstraint("user_id", "notification_type", "dedup_key", name="uq_notification_dedup"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
@@ -12,10 +14,12 @@ class Notification(UserBase):
     title = Column(String(500))
     message = Column(Text)
     notification_type = Column(String(50)) # 'system', 'achievement', 'reminder', 'agent'
+    priority = Column(String(20), default="normal") # low, normal, high, urgent
     
     read = Column(Boolean, default=False)
     action_url = Column(String(500), nullable=True)
     extra_data = Column(JSON, nullable=True)
+    dedup_key = Column(String(200), nullable=True) # NULL for notifications that may repeat
     
     created_at = Column(DateTime, default=datetime.utcnow)
     read_at = Column(DateTime, nullable=True)
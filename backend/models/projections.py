@@ -0,0 +1,88 @@
+"""Column projections for read-only stats and analytics paths.
+
+``select(models.Goal)`` hydrates every column of every row, the JSON ones
+included, into an ORM object that the session tracks in its identity map.
+Stats read a handful of columns per row, so they load projections instead: a
+``NamedTuple`` per row holding only the columns it declares.
+
+    @projection(models.Goal.id, models.Goal.status, models.Goal.progress)
+    class GoalStatus(NamedTuple):
+        id: int
+        status: str
+        progress: float
+
+    goals = await load(db, GoalStatus, models.Goal.user_id == user_id)
+
+Rows are plain tuples: no identity map, no change tracking, no lazy loads.
+Use the ORM classes to write; ``devtools/bench_projections.py`` measures the
+difference.
+"""
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Type, TypeVar
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .goal import ActionPlan, Goal, PomodoroSession
+from .user import CheckIn
+
+P = TypeVar("P")
+
+
+def projection(*columns):
+    """Declare the columns a ``NamedTuple`` row is loaded from, one per field in order"""
+    def register(cls):
+        if len(columns) != len(cls._fields):
+            raise TypeError(f"{cls.__name__} has {len(cls._fields)} fields but {len(columns)} columns")
+        cls.columns = columns
+        return cls
+    return register
+
+
+async def load(db: AsyncSession, row_type: Type[P], *filters, order_by=None, limit: Optional[int] = None) -> List[P]:
+    """Rows of ``row_type`` matching ``filters``, selecting its columns only"""
+    query = select(*row_type.columns).filter(*filters)
+    if order_by is not None:
+        query = query.order_by(order_by)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return [row_type._make(row) for row in result.all()]
+
+
+@projection(
+    Goal.id, Goal.title, Goal.goal_type, Goal.priority, Goal.status, Goal.progress, Goal.target_date,
+    func.coalesce(Goal.updated_at, Goal.created_at)
+)
+class GoalStatus(NamedTuple):
+    id: int
+    title: Optional[str]
+    goal_type: Optional[str]
+    priority: Optional[str]
+    status: Optional[str]
+    progress: Optional[float]
+    target_date: Optional[datetime]
+    updated_at: Optional[datetime] # created_at for goals never updated
+
+
+@projection(ActionPlan.id, ActionPlan.focus_area)
+class PlanFocus(NamedTuple):
+    id: int
+    focus_area: Optional[str]
+
+
+@projection(PomodoroSession.started_at, PomodoroSession.completed, PomodoroSession.duration_minutes, PomodoroSession.focus_rating)
+class PomodoroStat(NamedTuple):
+    started_at: datetime
+    completed: Optional[bool]
+    duration_minutes: Optional[int]
+    focus_rating: Optional[int]
+
+
+@projection(CheckIn.id, CheckIn.timestamp, CheckIn.energy_level, CheckIn.shipped, CheckIn.commitment)
+class CheckInSignal(NamedTuple):
+    id: int
+    timestamp: datetime
+    energy_level: Optional[int]
+    shipped: Optional[bool]
+    commitment: Optional[str]
@@ -32,6 +32,7 @@ class CheckInCreate(BaseModel):
     energy_level: int
     avoiding_what: str
     commitment: str
+    mood: Optional[str] = None
 
 class CheckInUpdate(BaseModel):
     shipped: Optional[bool] = None
@@ -56,7 +57,10 @@ class GoalCreate(BaseModel):
     title: str
     description: str
     goal_type: str # outcome, process, identity
-    target_date: datetime
+    priority: str = "medium"
+    target_date: Optional[datetime] = None
+    success_criteria: Optional[List[str]] = None
+    milestones: Optional[List["MilestoneCreate"]] = None
 
 class GoalUpdateRequest(BaseModel):
     title: Optional[str] = None
@@ -156,7 +160,11 @@ class GoalResponse(GoalCreate):
     completed_at: Optional[datetime] = None
     why_this_matters: Optional[str] = None
     potential_obstacles: Optional[List] = None
-    success_criteria: Optional[str] = None
+    success_criteria: Optional[Dict] = None
+    ai_analysis: Optional[str] = None # None while the background analysis runs
+    ai_insights: Optional[Dict] = None
+    subgoals: List[SubGoalResponse] = []
+    milestones: List[MilestoneResponse] = []
     
     class Config:
         from_attributes = True
@@ -204,23 +212,40 @@ class NotificationStats(BaseModel):
     by_type: Dict[str, int]
     recent_count: int
 
+class NotificationPreferences(BaseModel):
+    timezone: str = "UTC" # IANA name, e.g. "Europe/Berlin"
+    morning_hour: int = 8
+    evening_hour: int = 18
+
+    class Config:
+        from_attributes = True
+
+class NotificationPreferencesUpdate(BaseModel):
+    timezone: Optional[str] = None
+    morning_hour: Optional[int] = None
+    evening_hour: Optional[int] = None
+
 # --- Insights ---
 class LifeDecisionCreate(BaseModel):
+    title: str
     description: str
+    decision_type: str
+    impact_areas: List[str] = []
     context: Optional[Dict] = None
     time_horizon: Optional[str] = "medium"
 
 class LifeDecisionResponse(BaseModel):
     id: int
-    event_type: str
+    title: str
     description: str
-    context: Optional[Dict]
+    decision_type: str
+    impact_areas: List[str] = []
     timestamp: datetime
     time_horizon: Optional[str]
-    outcome: Optional[str]
-    
-    class Config:
-        from_attributes = True
+    ai_analysis: Optional[str] = None
+    lessons_learned: List[str] = []
+    ai_status: Optional[str] = None # pending while a background analysis runs
+    job_id: Optional[int] = None
 
 class ChatMessage(BaseModel):
     role: str
@@ -235,32 +260,55 @@ class AgentAdviceResponse(BaseModel):
 class DailyTaskResponse(BaseModel):
     id: int
     day_number: int
-    date: datetime
-    task_description: str
-    task_type: str
+    date: Optional[datetime] = None
+    title: Optional[str] = None
+    task_description: Optional[str] = None
+    task_type: Optional[str] = None
+    difficulty: Optional[str] = None
+    estimated_time: Optional[int] = None
     completed: bool
+    ai_feedback: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 class DailyTaskUpdate(BaseModel):
-    completed: bool
+    completed: bool = True
     notes: Optional[str] = None
+    actual_time_spent: Optional[int] = None # minutes
+    difficulty_rating: Optional[int] = None # 1-5
+    title: Optional[str] = None
+    description: Optional[str] = None
+    estimated_time: Optional[int] = None
 
 class ActionPlanCreate(BaseModel):
     goal_id: Optional[int] = None
     title: str
     description: str
-    start_date: datetime
-    end_date: datetime
+    plan_type: str = "30_day"
+    focus_area: Optional[str] = None
+    skills_to_learn: List[str] = []
+    current_skill_level: str = "intermediate"
+    available_hours_per_day: float = 2.0
 
-class ActionPlanResponse(ActionPlanCreate):
+class ActionPlanResponse(BaseModel):
     id: int
+    goal_id: Optional[int] = None
+    title: str
+    description: Optional[str] = None
+    plan_type: Optional[str] = None
+    focus_area: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
     active: bool
-    strategy: str
-    daily_routine: List[Dict]
-    weekly_milestones: List[Dict]
+    status: Optional[str] = None # generating, active, failed
+    ai_analysis: Optional[str] = None
+    skills_to_focus: Optional[Dict] = None
+    milestones: Optional[Dict] = None
+    current_day: Optional[int] = None
+    completion_percentage: Optional[float] = None
     daily_tasks: List[DailyTaskResponse] = []
+    job_id: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -28,8 +28,18 @@ class User(SystemBase):
     last_activity_date = Column(DateTime, nullable=True)
     level = Column(Integer, default=1)
 
+    # Last scheduled GitHub refresh (claimed before it runs)
+    github_refreshed_at = Column(DateTime, nullable=True)
+
+    # Reminders and emails in the user's local time (services.local_time)
+    timezone = Column(String(64), default="UTC", index=True) # IANA name
+    morning_hour = Column(Integer, default=8) # Daily digest; nudges 2 hours later
+    evening_hour = Column(Integer, default=18) # Commitment reminders; weekly review 2 hours later
+
 class CheckIn(UserBase):
     __tablename__ = "checkins"
+    # Stats and reminders read a user's check-ins by time
+    __table_args__ = (Index("ix_checkins_user_timestamp", "user_id", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
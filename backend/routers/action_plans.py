@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 import models
 from models import ActionPlanCreate, ActionPlanResponse, DailyTaskResponse, DailyTaskUpdate, TodaysTasksResponse
 from database import get_user_db, get_system_db
-from services import action_plan_service, gamification_service
+from services import gamification_service, job_queue
 
 router = APIRouter()
 
@@ -16,7 +16,8 @@ async def create_action_plan(
     github_username: str,
     plan_data: ActionPlanCreate,
     db: AsyncSession = Depends(get_user_db),
-    system_db: AsyncSession = Depends(get_system_db)
+    system_db: AsyncSession = Depends(get_system_db),
+    x_groq_key: Optional[str] = Header(None, alias="X-Groq-Key")
 ):
     result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
     user = result.scalars().first()
@@ -46,72 +47,39 @@ async def create_action_plan(
         "recent_performance": "New user" # Placeholder
     }
     
-    try:
-        ai_plan = await action_plan_service.generate_30_day_plan(
-            user_context=user_context,
-            focus_area=plan_data.focus_area,
-            skills_to_learn=plan_data.skills_to_learn,
-            skill_level=plan_data.current_skill_level,
-            hours_per_day=plan_data.available_hours_per_day
-        )
-        
-        # Create Plan in DB
-        new_plan = models.ActionPlan(
-            user_id=user.id,
-            title=plan_data.title,
-            description=plan_data.description,
-            plan_type=plan_data.plan_type,
-            focus_area=plan_data.focus_area,
-            active=True,
-            start_date=datetime.utcnow(),
-            end_date=datetime.utcnow() + timedelta(days=ai_plan['total_days']),
-            ai_analysis=ai_plan['analysis'],
-            skills_to_focus=ai_plan['skills_to_focus'],
-            milestones=ai_plan['milestones'],
-            current_day=1,
-            completion_percentage=0.0
-        )
-        db.add(new_plan)
-        await db.commit()
-        await db.refresh(new_plan)
-        
-        # Create Daily Tasks
-        for task_data in ai_plan['daily_tasks']:
-            daily_task = models.DailyTask(
-                action_plan_id=new_plan.id,
-                day_number=task_data['day_number'],
-                title=task_data['title'],
-                description=task_data['description'],
-                task_type=task_data['task_type'],
-                difficulty=task_data['difficulty'],
-                estimated_time=task_data['estimated_time'],
-                completed=False
-            )
-            db.add(daily_task)
-        
-        await db.commit()
-        await db.refresh(new_plan)
-        # Create Interaction Record for History
-        new_interaction = models.AgentAdvice(
-            user_id=user.id,
-            agent_name="Sage Strategist",
-            interaction_type="plan_creation",
-            advice=ai_plan['analysis'],
-            evidence={
-                "plan_id": new_plan.id,
-                "focus_area": plan_data.focus_area,
-                "title": plan_data.title
-            },
-            created_at=datetime.utcnow()
-        )
-        db.add(new_interaction)
-        await db.commit()
-
-        return new_plan
-        
-    except Exception as e:
-        print(f"Error generating plan: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate action plan: {str(e)}")
+    # Create the plan row first; the crew fills in the analysis and daily tasks
+    new_plan = models.ActionPlan(
+        user_id=user.id,
+        goal_id=plan_data.goal_id,
+        title=plan_data.title,
+        description=plan_data.description,
+        plan_type=plan_data.plan_type,
+        focus_area=plan_data.focus_area,
+        active=True,
+        status="generating",
+        start_date=datetime.utcnow(),
+        current_day=1,
+        completion_percentage=0.0
+    )
+    db.add(new_plan)
+    await db.commit()
+    await db.refresh(new_plan, ["daily_tasks"])
+    
+    job = await job_queue.enqueue(
+        system_db, user, "action_plan",
+        {
+            "plan_id": new_plan.id,
+            "user_context": user_context,
+            "skills_to_learn": plan_data.skills_to_learn,
+            "skill_level": plan_data.current_skill_level,
+            "hours_per_day": plan_data.available_hours_per_day
+        },
+        api_key=x_groq_key
+    )
+    
+    response = ActionPlanResponse.model_validate(new_plan).model_dump()
+    response["job_id"] = job.id
+    return response
 
 @router.get("/action-plans/{github_username}", response_model=List[ActionPlanResponse])
 async def get_action_plans(
@@ -198,7 +166,8 @@ async def complete_daily_task(
     task_id: int,
     update_data: DailyTaskUpdate,
     db: AsyncSession = Depends(get_user_db),
-    system_db: AsyncSession = Depends(get_system_db)
+    system_db: AsyncSession = Depends(get_system_db),
+    x_groq_key: Optional[str] = Header(None, alias="X-Groq-Key")
 ):
     result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
     user = result.scalars().first()
@@ -239,20 +208,18 @@ async def complete_daily_task(
         
     await db.commit()
     
-    # AI Feedback on task
-    feedback = await action_plan_service.evaluate_task_completion(
-        task={"title": task.title, "estimated_time": task.estimated_time},
-        user_feedback={"notes": task.notes, "actual_time": task.actual_time_spent, "difficulty_rating": task.difficulty_rating}
-    )
-    
-    task.ai_feedback = feedback['feedback']
-    await db.commit()
-    
     # Gamification: Award XP for task completion
     await gamification_service.award_xp(system_db, user.id, 10, "Daily Task Completed")
     await gamification_service.update_streak(system_db, user.id)
     
-    return {"message": "Task completed", "ai_feedback": feedback}
+    # AI feedback is written to task.ai_feedback by a background job
+    job = await job_queue.enqueue(
+        system_db, user, "task_feedback",
+        {"task_id": task.id},
+        api_key=x_groq_key
+    )
+    
+    return {"message": "Task completed", "ai_feedback": None, "ai_status": job.status, "job_id": job.id}
 
 @router.post("/action-plans/{github_username}/{plan_id}/advance-day")
 async def advance_plan_day(
@@ -1,13 +1,22 @@
+import asyncio
+import httpx
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from database import get_user_db as get_db, get_system_db
 from models import User, Goal, ActionPlan, DailyTask, PomodoroSession, CheckIn
+from models.projections import GoalStatus, PlanFocus, load
 from typing import Dict, List
 from datetime import datetime, timedelta
+from services import commit_series, github_client
+from services.github_activity import activity_windows
+from services.github_async import GitHubError
 
 router = APIRouter()
 
+# Seconds the heatmap waits for GitHub before using the stored commit series
+GITHUB_ACTIVITY_TIMEOUT = 5
+
 @router.get("/analytics/{github_username}")
 async def get_analytics(
     github_username: str, 
@@ -20,9 +29,8 @@ async def get_analytics(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # 1. Goal Progress
-    goals_result = await db.execute(select(Goal).filter(Goal.user_id == user.id))
-    goals = goals_result.scalars().all()
+    # 1. Goal Progress (only the columns read here, not the JSON analysis)
+    goals = await load(db, GoalStatus, Goal.user_id == user.id)
     
     active_goals = [g for g in goals if g.status == 'active']
     completed_goals = [g for g in goals if g.status == 'completed']
@@ -31,12 +39,11 @@ async def get_analytics(
         "total": len(goals),
         "active": len(active_goals),
         "completed": len(completed_goals),
-        "avg_progress": sum(g.progress for g in active_goals) / len(active_goals) if active_goals else 0
+        "avg_progress": sum(g.progress or 0 for g in active_goals) / len(active_goals) if active_goals else 0
     }
 
     # 2. Focus Distribution (from Action Plans)
-    plans_result = await db.execute(select(ActionPlan).filter(ActionPlan.user_id == user.id))
-    plans = plans_result.scalars().all()
+    plans = await load(db, PlanFocus, ActionPlan.user_id == user.id)
     
     focus_distribution = {}
     for plan in plans:
@@ -66,6 +73,17 @@ async def get_analytics(
     )
     commitment_counts = {str(row[0]): row[1] for row in commitments_result.all()}
     
+    # GitHub commits per day; unchanged event pages come back as free 304s. When
+    # GitHub is down or slow, the stored default-branch series stand in
+    try:
+        github_activity = await asyncio.wait_for(
+            activity_windows(github_client, github_username, windows=(30,)), timeout=GITHUB_ACTIVITY_TIMEOUT
+        )
+        github_commits = {day["date"]: day["commits"] for day in github_activity["windows"][30]["histogram"]}
+    except (GitHubError, httpx.HTTPError, asyncio.TimeoutError) as e:
+        print(f"⚠️ GitHub activity unavailable for {github_username}, using stored commits: {e!r}")
+        github_commits = await commit_series.daily_commits(db, user.id, thirty_days_ago.date())
+    
     # Combine and format
     activity_data = []
     today = datetime.utcnow().date()
@@ -75,10 +93,12 @@ async def get_analytics(
         
         task_count = daily_task_counts.get(date_str, 0)
         commitment_count = commitment_counts.get(date_str, 0)
+        commit_count = github_commits.get(date_str, 0)
         
         activity_data.append({
             "date": date_str,
-            "count": task_count + commitment_count
+            "count": task_count + commitment_count + commit_count,
+            "commits": commit_count
         })
     activity_data.reverse()
 
@@ -88,7 +108,7 @@ async def get_analytics(
     insights = []
     
     # Insight: Goal Stagnation
-    stagnant_goals = [g for g in active_goals if (datetime.utcnow() - g.updated_at).days > 7]
+    stagnant_goals = [g for g in active_goals if g.updated_at and (datetime.utcnow() - g.updated_at).days > 7]
     if stagnant_goals:
         insights.append(f"Goal '{stagnant_goals[0].title}' hasn't seen progress in a week. Time to break it down?")
 
@@ -6,13 +6,20 @@ from datetime import datetime, timedelta, time
 import models
 from models import CheckInCreate, CheckInUpdate, CheckInResponse
 from database import get_user_db, get_system_db
-from services import sage_crew, gamification_service
+from services import gamification_service, job_queue, domain_events, commitment_stats
 from services.cache import cached, invalidate_user_cache
 
 router = APIRouter()
 
 # --- Helper Functions ---
 
+async def _get_user(system_db: AsyncSession, github_username: str) -> models.User:
+    result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
 def calculate_streak(checkins: list) -> dict:
     if not checkins:
         return {"current": 0, "best": 0}
@@ -24,41 +31,6 @@ def calculate_streak(checkins: list) -> dict:
             break
     return {"current": current_streak, "type": "shipping" if current_streak > 0 else "none"}
 
-def calculate_streaks_detailed(checkins: list) -> tuple:
-    if not checkins:
-        return 0, 0
-    current_streak = 0
-    best_streak = 0
-    temp_streak = 0
-    for checkin in reversed(checkins):
-        if checkin.shipped:
-            temp_streak += 1
-            best_streak = max(best_streak, temp_streak)
-        else:
-            temp_streak = 0
-    for checkin in checkins:
-        if checkin.shipped:
-            current_streak += 1
-        else:
-            break
-    return current_streak, best_streak
-
-def get_weekly_breakdown(checkins: list) -> list:
-    weeks = {}
-    for checkin in checkins:
-        week_start = checkin.timestamp.date() - timedelta(days=checkin.timestamp.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        if week_key not in weeks:
-            weeks[week_key] = {"shipped": 0, "failed": 0}
-        if checkin.shipped:
-            weeks[week_key]["shipped"] += 1
-        else:
-            weeks[week_key]["failed"] += 1
-    return [
-        {"week_start": week, "shipped": data["shipped"], "failed": data["failed"], "rate": round((data["shipped"] / (data["shipped"] + data["failed"]) * 100), 1)}
-        for week, data in sorted(weeks.items(), reverse=True)[:4]
-    ]
-
 # --- Endpoints ---
 
 @router.post("/checkins/{github_username}")
@@ -75,54 +47,31 @@ async def create_checkin(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    result = await db.execute(select(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id
-    ).order_by(models.CheckIn.timestamp.desc()).limit(7))
-    recent_checkins = result.scalars().all()
-    
-    history = {
-        "recent_checkins": len(recent_checkins),
-        "avg_energy": sum(c.energy_level for c in recent_checkins) / len(recent_checkins) if recent_checkins else 0,
-        "commitments_kept": sum(1 for c in recent_checkins if c.shipped) if recent_checkins else 0
-    }
-    
-    analysis = await sage_crew.quick_checkin_analysis(
-        {
-            "energy_level": checkin.energy_level,
-            "avoiding_what": checkin.avoiding_what,
-            "commitment": checkin.commitment,
-            "mood": checkin.mood
-        },
-        history,
-        api_key=x_groq_key
-    )
-    
+    # Save the commitment first; the AI read arrives later over /events
     new_checkin = models.CheckIn(
         user_id=user.id,
         energy_level=checkin.energy_level,
         avoiding_what=checkin.avoiding_what,
         commitment=checkin.commitment,
-        mood=checkin.mood,
-        ai_analysis=analysis["analysis"]
+        mood=checkin.mood
     )
     db.add(new_checkin)
-    
-    advice = models.AgentAdvice(
-        user_id=user.id,
-        agent_name="Psychologist",
-        advice=analysis["analysis"],
-        evidence={"checkin": checkin.dict()},
-        interaction_type="checkin"
-    )
-    db.add(advice)
-    
     await db.commit()
     await db.refresh(new_checkin)
     invalidate_user_cache(github_username)
+    domain_events.emit("checkin.created", user, checkin_id=new_checkin.id)
+    
+    job = await job_queue.enqueue(
+        system_db, user, "checkin_analysis",
+        {"checkin_id": new_checkin.id, "checkin": checkin.dict()},
+        api_key=x_groq_key
+    )
     
     return {
         "checkin_id": new_checkin.id,
-        "ai_response": analysis["analysis"],
+        "ai_response": None,
+        "ai_status": job.status,
+        "job_id": job.id,
         "message": "Check-in recorded"
     }
 
@@ -132,6 +81,7 @@ async def evening_checkin(
     checkin_id: int,
     update: CheckInUpdate,
     db: AsyncSession = Depends(get_user_db),
+    system_db: AsyncSession = Depends(get_system_db),
     x_groq_key: Optional[str] = Header(None, alias="X-Groq-Key")
 ):
     result = await db.execute(select(models.CheckIn).filter(models.CheckIn.id == checkin_id))
@@ -143,14 +93,11 @@ async def evening_checkin(
     checkin.excuse = update.excuse
     await db.commit()
     
-    feedback = await sage_crew.evening_checkin_review(
-        checkin.commitment,
-        update.shipped,
-        update.excuse,
-        api_key=x_groq_key
-    )
+    user = await _get_user(system_db, github_username)
+    domain_events.emit("checkin.reviewed", user, checkin_id=checkin.id, shipped=checkin.shipped)
+    job = await job_queue.enqueue(system_db, user, "evening_review", {"checkin_id": checkin.id}, api_key=x_groq_key)
     
-    return {"message": "Evening check-in recorded", "ai_feedback": feedback["feedback"]}
+    return {"message": "Evening check-in recorded", "ai_feedback": None, "ai_status": job.status, "job_id": job.id}
 
 @cached(ttl=60)
 @router.get("/checkins/{github_username}", response_model=List[CheckInResponse])
@@ -251,7 +198,8 @@ async def review_commitment(
     checkin_id: int,
     review: CheckInUpdate,
     db: AsyncSession = Depends(get_user_db),
-    system_db: AsyncSession = Depends(get_system_db)
+    system_db: AsyncSession = Depends(get_system_db),
+    x_groq_key: Optional[str] = Header(None, alias="X-Groq-Key")
 ):
     result = await db.execute(select(models.CheckIn).filter(models.CheckIn.id == checkin_id))
     checkin = result.scalars().first()
@@ -277,27 +225,23 @@ async def review_commitment(
     shipped_count = sum(1 for c in recent_checkins if c.shipped)
     total_count = len(recent_checkins)
     
-    feedback = await sage_crew.evening_checkin_review(checkin.commitment, review.shipped, review.excuse)
-    
-    advice = models.AgentAdvice(
-        user_id=checkin.user_id,
-        agent_name="Contrarian",
-        advice=feedback["feedback"],
-        evidence={
-            "commitment": checkin.commitment,
-            "shipped": review.shipped,
-            "excuse": review.excuse,
+    user = await _get_user(system_db, github_username)
+    domain_events.emit("checkin.reviewed", user, checkin_id=checkin.id, shipped=checkin.shipped)
+    job = await job_queue.enqueue(
+        system_db, user, "evening_review",
+        {
+            "checkin_id": checkin.id,
             "recent_success_rate": f"{shipped_count}/{total_count}" if total_count > 0 else "0/0"
         },
-        interaction_type="evening_review"
+        api_key=x_groq_key
     )
-    db.add(advice)
-    await db.commit()
     
     return {
         "message": "Commitment reviewed",
         "shipped": review.shipped,
-        "feedback": feedback["feedback"],
+        "feedback": None,
+        "ai_status": job.status,
+        "job_id": job.id,
         "success_rate": f"{shipped_count}/{total_count}" if total_count > 0 else "N/A",
         "streak_info": calculate_streak(recent_checkins)
     }
@@ -315,39 +259,24 @@ async def get_commitment_stats(
         raise HTTPException(status_code=404, detail="User not found")
     
     since = datetime.now() - timedelta(days=days)
-    result = await db.execute(select(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
-        models.CheckIn.timestamp >= since,
-        models.CheckIn.shipped != None
-    ).order_by(models.CheckIn.timestamp.desc()))
-    checkins = result.scalars().all()
-    
-    if not checkins:
+    totals = await commitment_stats.summary(db, user.id, since)
+    if not totals["total"]:
         return {"total_commitments": 0, "shipped": 0, "failed": 0, "success_rate": 0, "current_streak": 0, "best_streak": 0, "common_excuses": []}
-    
-    shipped_count = sum(1 for c in checkins if c.shipped)
-    failed_count = len(checkins) - shipped_count
-    current_streak, best_streak = calculate_streaks_detailed(checkins)
-    
-    excuses = [c.excuse for c in checkins if c.excuse and not c.shipped]
-    excuse_counter = {}
-    for excuse in excuses:
-        words = excuse.lower().split()
-        for word in ['time', 'tired', 'hard', 'busy', 'complex', 'stuck']:
-            if word in words:
-                excuse_counter[word] = excuse_counter.get(word, 0) + 1
-    common_excuses = sorted(excuse_counter.items(), key=lambda x: x[1], reverse=True)[:3]
+    streaks = await commitment_stats.streaks(db, user.id, since)
     
     return {
         "period_days": days,
-        "total_commitments": len(checkins),
-        "shipped": shipped_count,
-        "failed": failed_count,
-        "success_rate": round((shipped_count / len(checkins) * 100), 1),
-        "current_streak": current_streak,
-        "best_streak": best_streak,
-        "common_excuses": [{"excuse": e[0], "count": e[1]} for e in common_excuses],
-        "weekly_breakdown": get_weekly_breakdown(checkins)
+        "total_commitments": totals["total"],
+        "shipped": totals["shipped"],
+        "failed": totals["failed"],
+        "success_rate": totals["success_rate"],
+        "current_streak": streaks["current"],
+        "best_streak": streaks["best"],
+        "common_excuses": totals["common_excuses"],
+        "weekly_breakdown": [
+            {key: week[key] for key in ("week_start", "shipped", "failed", "rate")}
+            for week in await commitment_stats.weekly(db, user.id, since, weeks=4)
+        ]
     }
 
 @router.get("/commitments/{github_username}/streak-detailed")
@@ -361,22 +290,15 @@ async def get_streak_detailed(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    result = await db.execute(select(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
-        models.CheckIn.shipped != None
-    ).order_by(models.CheckIn.timestamp.desc()))
-    checkins = result.scalars().all()
-    
-    current_streak, best_streak = calculate_streaks_detailed(checkins)
+    streaks = await commitment_stats.streaks(db, user.id)
+    current_streak, best_streak = streaks["current"], streaks["best"]
     
     today_start = datetime.combine(datetime.now().date(), time.min)
-    result = await db.execute(select(models.CheckIn).filter(
+    result = await db.execute(select(models.CheckIn.id).filter(
         models.CheckIn.user_id == user.id,
         models.CheckIn.timestamp >= today_start
-    ))
-    today_checkin = result.scalars().first()
-    
-    has_checked_in_today = today_checkin is not None
+    ).limit(1))
+    has_checked_in_today = result.scalar() is not None
     at_risk = current_streak > 0 and not has_checked_in_today
     
     # Count distinct days active
@@ -393,7 +315,7 @@ async def get_streak_detailed(
     result = await db.execute(select(func.count(func.distinct(cast(models.CheckIn.timestamp, Date)))).filter(models.CheckIn.user_id == user.id))
     total_days_active = result.scalar()
     
-    last_checkin = checkins[0].timestamp if checkins else None
+    last_checkin = streaks["last_checkin"]
     
     return {
         "current_streak": current_streak,
@@ -449,37 +371,32 @@ async def get_weekly_summary(
         raise HTTPException(status_code=404, detail="User not found")
     
     four_weeks_ago = datetime.now() - timedelta(days=28)
-    result = await db.execute(select(models.CheckIn).filter(
+    weeks = await commitment_stats.weekly(db, user.id, four_weeks_ago)
+    
+    # The commitments listed per week; only the columns shown
+    result = await db.execute(select(models.CheckIn.commitment, models.CheckIn.shipped, models.CheckIn.timestamp).filter(
         models.CheckIn.user_id == user.id,
         models.CheckIn.timestamp >= four_weeks_ago,
         models.CheckIn.shipped != None
     ).order_by(models.CheckIn.timestamp.asc()))
-    checkins = result.scalars().all()
-    
-    weeks = {}
-    for checkin in checkins:
-        week_start = checkin.timestamp.date() - timedelta(days=checkin.timestamp.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        if week_key not in weeks:
-            weeks[week_key] = {"shipped": 0, "failed": 0, "total_energy": 0, "count": 0, "commitments": []}
-        weeks[week_key]["count"] += 1
-        weeks[week_key]["total_energy"] += checkin.energy_level
-        weeks[week_key]["commitments"].append({"text": checkin.commitment, "shipped": checkin.shipped, "date": checkin.timestamp.strftime("%Y-%m-%d")})
-        if checkin.shipped:
-            weeks[week_key]["shipped"] += 1
-        else:
-            weeks[week_key]["failed"] += 1
-            
-    summary = []
-    for week_start, data in sorted(weeks.items(), reverse=True):
-        summary.append({
-            "week_start": week_start,
+    commitments = {}
+    for text, shipped, timestamp in result.all():
+        week_start = timestamp.date() - timedelta(days=timestamp.weekday())
+        commitments.setdefault(week_start.strftime("%Y-%m-%d"), []).append(
+            {"text": text, "shipped": shipped, "date": timestamp.strftime("%Y-%m-%d")}
+        )
+    
+    summary = [
+        {
+            "week_start": data["week_start"],
             "shipped": data["shipped"],
             "failed": data["failed"],
-            "success_rate": round((data["shipped"] / data["count"] * 100), 1) if data["count"] > 0 else 0,
-            "avg_energy": round(data["total_energy"] / data["count"], 1) if data["count"] > 0 else 0,
-            "commitments": data["commitments"]
-        })
+            "success_rate": data["rate"],
+            "avg_energy": data["avg_energy"],
+            "commitments": commitments.get(data["week_start"], [])
+        }
+        for data in weeks
+    ]
     return {"weeks": summary, "total_weeks": len(summary)}
 
 @router.get("/commitments/{github_username}/stats/comparison")
@@ -495,16 +412,13 @@ async def get_stats_comparison(
         raise HTTPException(status_code=404, detail="User not found")
     
     current_start = datetime.now() - timedelta(days=days)
-    result = await db.execute(select(models.CheckIn).filter(models.CheckIn.user_id == user.id, models.CheckIn.timestamp >= current_start, models.CheckIn.shipped != None))
-    current_checkins = result.scalars().all()
-    
     previous_start = datetime.now() - timedelta(days=days * 2)
-    result = await db.execute(select(models.CheckIn).filter(models.CheckIn.user_id == user.id, models.CheckIn.timestamp >= previous_start, models.CheckIn.timestamp < current_start, models.CheckIn.shipped != None))
-    previous_checkins = result.scalars().all()
     
-    def calculate_stats(checkins):
-        if not checkins: return {"success_rate": 0, "avg_energy": 0, "total": 0}
-        shipped = sum(1 for c in checkins if c.shipped)
-        return {"success_rate": (shipped / len(checkins) * 100), "avg_energy": sum(c.energy_level for c in checkins) / len(checkins), "total": len(checkins)}
+    def period_stats(totals):
+        return {"success_rate": totals["success_rate"], "avg_energy": totals["avg_energy"], "total": totals["total"]}
     
-    return {"current": calculate_stats(current_checkins), "previous": calculate_stats(previous_checkins), "period_days": days}
+    return {
+        "current": period_stats(await commitment_stats.summary(db, user.id, current_start)),
+        "previous": period_stats(await commitment_stats.summary(db, user.id, previous_start, current_start)),
+        "period_days": days
+    }
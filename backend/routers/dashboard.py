@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import models
+from models.projections import CheckInSignal, load
 from database import get_user_db, get_system_db
 from services.cache import get_cached_dashboard, cache_dashboard
 
@@ -27,10 +28,10 @@ async def get_dashboard(
     ).order_by(models.GitHubAnalysis.analyzed_at.desc()))
     github_analysis = result.scalars().first()
     
-    result = await db.execute(select(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id
-    ).order_by(models.CheckIn.timestamp.desc()).limit(7))
-    checkins = result.scalars().all()
+    checkins = await load(db, CheckInSignal,
+        models.CheckIn.user_id == user.id,
+        order_by=models.CheckIn.timestamp.desc(), limit=7
+    )
     
     result = await db.execute(select(models.AgentAdvice).filter(
         models.AgentAdvice.user_id == user.id
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import models
+from database import get_system_db
+from services import job_queue, event_broker, scheduler, fanout, email_service, timer_wheel, domain_events
+
+router = APIRouter()
+
+@router.get("/events/{github_username}")
+async def stream_events(github_username: str, system_db: AsyncSession = Depends(get_system_db)):
+    """Server-sent events for background AI results (job.completed / job.failed)"""
+    result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
+    if not result.scalars().first():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return StreamingResponse(
+        event_broker.stream(github_username),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/jobs/{github_username}/{job_id}")
+async def get_job(github_username: str, job_id: int, system_db: AsyncSession = Depends(get_system_db)):
+    """Poll a background AI job (fallback for clients without SSE)"""
+    job = await job_queue.get(system_db, job_id)
+    if not job or job.github_username != github_username:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "result": job.result,
+        "error": job_queue.public_error(job.error) if job.status == "dead" else None,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
+
+@router.get("/jobs/stats")
+async def job_stats(system_db: AsyncSession = Depends(get_system_db)):
+    return await job_queue.stats(system_db)
+
+@router.get("/scheduler/stats")
+async def scheduler_stats(system_db: AsyncSession = Depends(get_system_db)):
+    """Cron jobs: next run, outcomes and durations over the last day"""
+    return await scheduler.stats(system_db)
+
+@router.get("/scheduler/fanout")
+async def fanout_progress(system_db: AsyncSession = Depends(get_system_db)):
+    """Email fan-out runs of the last week: users done, failed and throughput"""
+    return await fanout.progress(system_db)
+
+@router.get("/scheduler/notifications")
+async def notification_engine_stats(system_db: AsyncSession = Depends(get_system_db)):
+    """Notification rules: domain events handled and timers pending, armed and fired"""
+    return {"events": domain_events.stats(), "timers": await timer_wheel.stats(system_db)}
+
+@router.get("/email/stats")
+async def email_stats():
+    """Email delivery: sent, failed, batch sizes, retries and queue latency"""
+    return email_service.stats()
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import models
+from database import get_user_db, get_system_db
+from services import github_client, github_refresh_scheduler
+from services.github_async import GitHubError, GitHubNotFound
+from services.github_activity import activity_windows
+from services.github_refresh import refresh_github_analysis
+from services.cache import invalidate_user_cache
+
+router = APIRouter()
+
+@router.post("/analyze-github/{github_username}")
+async def analyze_github(
+    github_username: str,
+    full: bool = False,
+    db: AsyncSession = Depends(get_user_db),
+    system_db: AsyncSession = Depends(get_system_db)
+):
+    """Analyze the user's GitHub profile and store a snapshot for the dashboard and agents
+
+    Only repos pushed since the last analysis are fetched unless ``full`` is set.
+    """
+    result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    try:
+        refresh = await refresh_github_analysis(github_client, db, user.id, github_username, full=full)
+    except GitHubNotFound:
+        raise HTTPException(status_code=404, detail=f"GitHub user '{github_username}' not found")
+    except GitHubError as e:
+        print(f"❌ GitHub analysis failed for {github_username}: {e}")
+        raise HTTPException(status_code=502, detail="Failed to analyze GitHub profile")
+    
+    invalidate_user_cache(github_username)
+    
+    return refresh.analysis
+
+@router.get("/github/activity/{github_username}")
+async def github_activity(github_username: str):
+    """Commits per day over the last 1, 7 and 30 days from one events scan"""
+    try:
+        return await activity_windows(github_client, github_username)
+    except GitHubNotFound:
+        raise HTTPException(status_code=404, detail=f"GitHub user '{github_username}' not found")
+    except GitHubError as e:
+        print(f"❌ GitHub activity failed for {github_username}: {e}")
+        raise HTTPException(status_code=502, detail="Failed to fetch GitHub activity")
+
+@router.get("/github/refresh/stats")
+async def github_refresh_stats():
+    """Scheduled refresh throughput: users per hour, API calls per user, token budgets (cycles run by this process)"""
+    return github_refresh_scheduler.stats()
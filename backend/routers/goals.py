@@ -1,94 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header
+from fastapi import APIRouter, Depends, HTTPException, Header
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 import models
-from database import get_user_db, get_system_db, get_user_db_engine
-from sqlalchemy.orm import sessionmaker
-from services import sage_crew
+from models.projections import GoalStatus, load
+from database import get_user_db, get_system_db
+from services import sage_crew, job_queue, domain_events
 from services.cache import cached
 from crud.crud_goal import goal as crud_goal
-import sys
-import traceback
 
 router = APIRouter()
 
-async def process_goal_analysis(
-    goal_id: int,
-    goal_data: dict,
-    user_context: dict,
-    user_db_url: str,
-    api_key: str = None
-):
-    """Background task to analyze goal and update DB"""
-    sys.stdout.write(f"🧠 [Background] Starting AI analysis for goal {goal_id}...\n")
-    sys.stdout.flush()
-    
-    # Create a new session for the background task
-    engine = get_user_db_engine(user_db_url)
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    
-    async with async_session() as db:
-        try:
-            # Fetch goal again
-            result = await db.execute(select(models.Goal).filter(models.Goal.id == goal_id))
-            goal = result.scalars().first()
-            
-            if not goal:
-                sys.stdout.write(f"❌ [Background] Goal {goal_id} not found\n")
-                sys.stdout.flush()
-                return
-
-            analysis = await sage_crew.analyze_goal(goal_data, user_context, db, api_key)
-            
-            goal.ai_analysis = analysis["analysis"]
-            goal.ai_insights = {
-                "insights": analysis["insights"], 
-                "obstacles": analysis["obstacles"], 
-                "recommendations": analysis["recommendations"], 
-                "feasibility_score": analysis["feasibility_score"], 
-                "estimated_duration": analysis["estimated_duration"]
-            }
-            goal.obstacles_identified = {"obstacles": analysis["obstacles"]}
-            
-            for sg in analysis["suggested_subgoals"]:
-                db.add(models.SubGoal(goal_id=goal.id, title=sg["title"], order=sg["order"]))
-            
-            from sqlalchemy.orm.attributes import flag_modified
-            flag_modified(goal, "ai_insights")
-            flag_modified(goal, "obstacles_identified")
-            
-            await db.commit()
-            await db.commit()
-            sys.stdout.write(f"✅ [Background] AI analysis completed for goal {goal_id}\n")
-            sys.stdout.flush()
-            
-        except Exception as e:
-            sys.stdout.write(f"❌ [Background] Goal analysis failed: {str(e)}\n")
-            traceback.print_exc(file=sys.stdout)
-            sys.stdout.flush()
-            # Update goal with error state to stop spinner
-            try:
-                goal.ai_analysis = "Analysis failed. Please try updating the goal later."
-                goal.ai_insights = {
-                    "insights": ["AI analysis unavailable at the moment."], 
-                    "obstacles": [], 
-                    "recommendations": [], 
-                    "feasibility_score": 0, 
-                    "estimated_duration": "Unknown"
-                }
-                from sqlalchemy.orm.attributes import flag_modified
-                flag_modified(goal, "ai_insights")
-                await db.commit()
-            except Exception as inner_e:
-                sys.stdout.write(f"❌ [Background] Failed to save error state: {str(inner_e)}\n")
-                sys.stdout.flush()
-        finally:
-            await engine.dispose()
-
 class GoalGenerationRequest(BaseModel):
     title: str
 
@@ -131,7 +56,6 @@ async def generate_goal(
 async def create_goal(
     github_username: str,
     goal: models.GoalCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_user_db),
     system_db: AsyncSession = Depends(get_system_db),
     x_groq_key: Optional[str] = Header(None, alias="X-Groq-Key")
@@ -181,20 +105,23 @@ async def create_goal(
         "success_criteria": goal.success_criteria
     }
     
-    background_tasks.add_task(
-        process_goal_analysis, 
-        new_goal.id, 
-        goal_data, 
-        user_context, 
-        user.neon_db_url,
-        x_groq_key
+    await job_queue.enqueue(
+        system_db, user, "goal_analysis",
+        {"goal_id": new_goal.id, "goal_data": goal_data, "user_context": user_context},
+        api_key=x_groq_key
     )
     
     # Manually create milestones if provided (sync part)
     if goal.milestones:
-        for ms in goal.milestones:
-            db.add(models.Milestone(goal_id=new_goal.id, title=ms.title, description=ms.description, target_date=ms.target_date))
+        milestones = [
+            models.Milestone(goal_id=new_goal.id, title=ms.title, description=ms.description, target_date=ms.target_date)
+            for ms in goal.milestones
+        ]
+        db.add_all(milestones)
         await db.commit()
+        domain_events.emit("milestones.created", user, goal_id=new_goal.id, milestones=[
+            {"id": m.id, "target_date": m.target_date.isoformat() if m.target_date else None} for m in milestones
+        ])
 
     # Re-fetch with eager loading to avoid MissingGreenlet error during serialization
     # This handles both the initial creation and any updates from the AI analysis
@@ -239,11 +166,18 @@ async def get_goals_dashboard(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    result = await db.execute(select(models.Goal).options(selectinload(models.Goal.subgoals).selectinload(models.SubGoal.tasks)).filter(models.Goal.user_id == user.id, models.Goal.status == 'active'))
-    active_goals = result.scalars().all()
+    active_goals = await load(db, GoalStatus, models.Goal.user_id == user.id, models.Goal.status == 'active')
     
-    result = await db.execute(select(models.Goal).filter(models.Goal.user_id == user.id, models.Goal.status == 'completed'))
-    completed_goals = len(result.scalars().all()) # .count() is not available in async scalars
+    result = await db.execute(select(func.count(models.Goal.id)).filter(models.Goal.user_id == user.id, models.Goal.status == 'completed'))
+    completed_goals = result.scalar() or 0
+    
+    # Subgoal counts per active goal, instead of loading the subgoals and their tasks
+    result = await db.execute(
+        select(models.SubGoal.goal_id, func.count(models.SubGoal.id), func.count(models.SubGoal.id).filter(models.SubGoal.status == 'completed'))
+        .filter(models.SubGoal.goal_id.in_([g.id for g in active_goals]))
+        .group_by(models.SubGoal.goal_id)
+    )
+    subgoal_counts = {goal_id: (total, completed) for goal_id, total, completed in result.all()}
     
     total_progress = sum(float(g.progress or 0.0) for g in active_goals)
     avg_progress = (total_progress / len(active_goals)) if active_goals else 0.0
@@ -265,8 +199,8 @@ async def get_goals_dashboard(
             {
                 "id": g.id, "title": g.title or "Untitled Goal", "goal_type": g.goal_type or "personal", "priority": g.priority or "medium", "progress": g.progress or 0.0,
                 "target_date": g.target_date.strftime("%Y-%m-%d") if g.target_date else None,
-                "subgoals_completed": len([sg for sg in g.subgoals if sg.status == 'completed']),
-                "subgoals_total": len(g.subgoals or []),
+                "subgoals_completed": subgoal_counts.get(g.id, (0, 0))[1],
+                "subgoals_total": subgoal_counts.get(g.id, (0, 0))[0],
             } for g in active_goals
         ],
         "recent_milestones": [
@@ -275,6 +209,42 @@ async def get_goals_dashboard(
         ],
     }
 
+async def _latest_weekly_review_job(system_db: AsyncSession, user: models.User):
+    result = await system_db.execute(select(models.AIJob).filter(
+        models.AIJob.user_id == user.id,
+        models.AIJob.job_type == "weekly_review",
+        models.AIJob.status.in_(["pending", "running", "succeeded"])
+    ).order_by(models.AIJob.created_at.desc()).limit(1))
+    return result.scalars().first()
+
+@router.get("/goals/{github_username}/weekly-review")
+async def get_weekly_review(github_username: str, system_db: AsyncSession = Depends(get_system_db), x_groq_key: Optional[str] = Header(None, alias="X-Groq-Key")):
+    """Latest review from the past day, or a pending job generating one"""
+    result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    job = await _latest_weekly_review_job(system_db, user)
+    if job and job.status == "succeeded" and job.finished_at > datetime.utcnow() - timedelta(days=1):
+        return {"status": "ready", "job_id": job.id, "generated_at": job.finished_at, **(job.result or {})}
+    if not job or job.status == "succeeded":
+        job = await job_queue.enqueue(system_db, user, "weekly_review", {}, api_key=x_groq_key)
+    return {"status": job.status, "job_id": job.id}
+
+@router.post("/goals/{github_username}/weekly-review")
+async def refresh_weekly_review(github_username: str, system_db: AsyncSession = Depends(get_system_db), x_groq_key: Optional[str] = Header(None, alias="X-Groq-Key")):
+    """Queue a fresh weekly review (result arrives over /events or /jobs)"""
+    result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    job = await _latest_weekly_review_job(system_db, user)
+    if not job or job.status == "succeeded":
+        job = await job_queue.enqueue(system_db, user, "weekly_review", {}, api_key=x_groq_key)
+    return {"status": job.status, "job_id": job.id}
+
 @router.get("/goals/{github_username}/{goal_id}", response_model=models.GoalResponse)
 async def get_goal_detail(github_username: str, goal_id: int, db: AsyncSession = Depends(get_user_db), system_db: AsyncSession = Depends(get_system_db)):
     result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
@@ -429,19 +399,6 @@ async def achieve_milestone(github_username: str, goal_id: int, milestone_id: in
     await db.commit()
     return {"message": "🎉 Milestone achieved!", "milestone": milestone.title}
 
-@router.get("/goals/{github_username}/weekly-review")
-async def get_weekly_review(github_username: str, db: AsyncSession = Depends(get_user_db), system_db: AsyncSession = Depends(get_system_db)):
-    result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    try:
-        # Assuming sage_crew.weekly_goals_review will be updated to async
-        return await sage_crew.weekly_goals_review(user.id, db)
-    except Exception as e:
-        print(f"❌ Weekly review failed: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to generate review")
-
 @router.delete("/goals/{github_username}/{goal_id}")
 async def delete_goal(github_username: str, goal_id: int, db: AsyncSession = Depends(get_user_db), system_db: AsyncSession = Depends(get_system_db)):
     result = await system_db.execute(select(models.User).filter(models.User.github_username == github_username))
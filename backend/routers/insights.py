@@ -8,7 +8,7 @@ from datetime import datetime
 import models
 from models import LifeDecisionResponse, LifeDecisionCreate, ChatMessage, AgentAdviceResponse
 from database import get_user_db, get_system_db
-from services import sage_crew
+from services import sage_crew, job_queue, domain_events
 from services.ai_insights import ProactiveInsightsEngine
 
 router = APIRouter()
@@ -89,7 +89,8 @@ async def chat_with_mentor(
             "total_repos": github_analysis.total_repos if github_analysis else 0,
             "active_repos": github_analysis.active_repos if github_analysis else 0,
             "languages": github_analysis.languages if github_analysis else {},
-            "patterns": github_analysis.patterns if github_analysis else []
+            "patterns": github_analysis.patterns if github_analysis else [],
+            "commit_rhythm": github_analysis.commit_rhythm if github_analysis else None
         },
         "recent_performance": {
             "total_checkins": len(recent_checkins),
@@ -181,55 +182,23 @@ async def create_life_decision(
     db.add(life_event)
     await db.commit()
     await db.refresh(life_event)
+    domain_events.emit("decision.created", user, decision_id=life_event.id, timestamp=life_event.timestamp.isoformat())
     
-    try:
-        analysis = await sage_crew.analyze_life_decision(
-            {
-                "title": decision.title,
-                "description": decision.description,
-                "type": decision.decision_type,
-                "impact_areas": decision.impact_areas,
-                "time_horizon": decision.time_horizon
-            },
-            user.id,
-            db,
-            api_key=x_groq_key
-        )
-        
-        life_event.context["ai_analysis"] = analysis["analysis"]
-        life_event.context["lessons"] = analysis["lessons"]
-        life_event.outcome = analysis["long_term_impact"]
-        
-        from sqlalchemy.orm.attributes import flag_modified
-        flag_modified(life_event, "context")
-        
-        await db.commit()
-        await db.refresh(life_event)
-        
-        return {
-            "id": life_event.id,
-            "title": decision.title,
-            "description": decision.description,
-            "decision_type": decision.decision_type,
-            "impact_areas": decision.impact_areas,
-            "timestamp": life_event.timestamp,
-            "time_horizon": decision.time_horizon,
-            "ai_analysis": analysis["analysis"],
-            "lessons_learned": analysis["lessons"]
-        }
-    except Exception as e:
-        print(f"❌ AI analysis failed: {str(e)}")
-        return {
-            "id": life_event.id,
-            "title": decision.title,
-            "description": decision.description,
-            "decision_type": decision.decision_type,
-            "impact_areas": decision.impact_areas,
-            "timestamp": life_event.timestamp,
-            "time_horizon": decision.time_horizon,
-            "ai_analysis": None,
-            "lessons_learned": []
-        }
+    job = await job_queue.enqueue(system_db, user, "life_decision_analysis", {"decision_id": life_event.id}, api_key=x_groq_key)
+    
+    return {
+        "id": life_event.id,
+        "title": decision.title,
+        "description": decision.description,
+        "decision_type": decision.decision_type,
+        "impact_areas": decision.impact_areas,
+        "timestamp": life_event.timestamp,
+        "time_horizon": decision.time_horizon,
+        "ai_analysis": None,
+        "lessons_learned": [],
+        "ai_status": job.status,
+        "job_id": job.id
+    }
 
 @router.post("/life-decisions/{github_username}/{decision_id}/reanalyze")
 async def reanalyze_life_decision(
@@ -260,41 +229,13 @@ async def reanalyze_life_decision(
     if not life_event:
         raise HTTPException(status_code=404, detail="Decision not found")
     
-    context = life_event.context if isinstance(life_event.context, dict) else {}
+    job = await job_queue.enqueue(system_db, user, "life_decision_analysis", {"decision_id": life_event.id}, api_key=x_groq_key)
     
-    try:
-        analysis = await sage_crew.analyze_life_decision(
-            {
-                "title": life_event.description,
-                "description": context.get("full_description", life_event.description),
-                "type": life_event.event_type,
-                "impact_areas": context.get("impact_areas", []),
-                "time_horizon": life_event.time_horizon
-            },
-            user.id,
-            db,
-            api_key=x_groq_key
-        )
-        
-        life_event.context["ai_analysis"] = analysis["analysis"]
-        life_event.context["lessons"] = analysis["lessons"]
-        life_event.outcome = analysis["long_term_impact"]
-        
-        from sqlalchemy.orm.attributes import flag_modified
-        flag_modified(life_event, "context")
-        
-        await db.commit()
-        await db.refresh(life_event)
-        
-        return {
-            "message": "Re-analysis complete",
-            "ai_analysis": analysis["analysis"],
-            "lessons_learned": analysis["lessons"],
-            "long_term_impact": analysis["long_term_impact"]
-        }
-    except Exception as e:
-        print(f"❌ Re-analysis failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Re-analysis failed: {str(e)}")
+    return {
+        "message": "Re-analysis queued",
+        "ai_status": job.status,
+        "job_id": job.id
+    }
 
 @router.get("/life-decisions/{github_username}", response_model=List[LifeDecisionResponse])
 async def get_life_decisions(
@@ -5,6 +5,7 @@ from youtube_transcript_api import YouTubeTranscriptApi
 from typing import Optional, List, Dict
 from pydantic import BaseModel
 from services import sage_crew
+from services.groq_client import RateLimitExceeded
 
 router = APIRouter()
 
@@ -48,6 +49,8 @@ async def summarize_content(
             api_key=x_groq_key
         )
         return summary
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         print(f"Error summarizing content: {e}")
         raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
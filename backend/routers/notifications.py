@@ -137,5 +137,5 @@ async def check_and_create_notifications(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    await NotificationService.run_all_checks(db, user.id)
+    await NotificationService.run_all_checks(db, user.id, user.timezone, user.evening_hour)
     return {"message": "Notification checks completed"}
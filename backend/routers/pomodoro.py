@@ -4,6 +4,7 @@ from sqlalchemy import select
 from datetime import datetime, timedelta, time
 import models
 from models import PomodoroSessionCreate, PomodoroSessionResponse, PomodoroSessionUpdate, PomodoroStatsResponse
+from models.projections import PomodoroStat, load
 from database import get_user_db, get_system_db
 
 router = APIRouter()
@@ -139,11 +140,10 @@ async def get_pomodoro_stats(
         raise HTTPException(status_code=404, detail="User not found")
         
     since = datetime.utcnow() - timedelta(days=days)
-    result = await db.execute(select(models.PomodoroSession).filter(
+    sessions = await load(db, PomodoroStat,
         models.PomodoroSession.user_id == user.id,
         models.PomodoroSession.started_at >= since
-    ))
-    sessions = result.scalars().all()
+    )
     
     total_sessions = len(sessions)
     completed_sessions = sum(1 for s in sessions if s.completed)
@@ -3,8 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database import get_system_db, init_user_db
 import models
-from models import UserCreate, UserResponse, DatabaseConfig
-from services import email_service
+from models import UserCreate, UserResponse, DatabaseConfig, NotificationPreferences, NotificationPreferencesUpdate
+from services import email_service, local_time
 
 router = APIRouter()
 
@@ -135,3 +135,46 @@ async def get_onboarding_status(
         "complete": user.onboarding_complete,
         "has_db": bool(user.neon_db_url)
     }
+
+@router.get("/users/{github_username}/notification-preferences", response_model=NotificationPreferences)
+async def get_notification_preferences(github_username: str, db: AsyncSession = Depends(get_system_db)):
+    result = await db.execute(select(models.User).filter(models.User.github_username == github_username))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return NotificationPreferences(
+        timezone=user.timezone or local_time.DEFAULT_TIMEZONE,
+        morning_hour=user.morning_hour if user.morning_hour is not None else local_time.DEFAULT_MORNING_HOUR,
+        evening_hour=user.evening_hour if user.evening_hour is not None else local_time.DEFAULT_EVENING_HOUR
+    )
+
+@router.put("/users/{github_username}/notification-preferences", response_model=NotificationPreferences)
+async def update_notification_preferences(
+    github_username: str,
+    update: NotificationPreferencesUpdate,
+    db: AsyncSession = Depends(get_system_db)
+):
+    """
+    Timezone and reminder windows; emails and reminders go out in the user's local time.
+    Changes apply from the next scheduled email (reminders already set for today keep their time).
+    """
+    result = await db.execute(select(models.User).filter(models.User.github_username == github_username))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if update.timezone is not None:
+        if not local_time.is_valid_timezone(update.timezone):
+            raise HTTPException(status_code=400, detail=f"Unknown timezone '{update.timezone}'")
+        user.timezone = update.timezone
+    for field, hours in (("morning_hour", local_time.MORNING_HOURS), ("evening_hour", local_time.EVENING_HOURS)):
+        hour = getattr(update, field)
+        if hour is None:
+            continue
+        if hour not in hours:
+            raise HTTPException(status_code=400, detail=f"{field} must be between {hours.start} and {hours.stop - 1}")
+        setattr(user, field, hour)
+    await db.commit()
+
+    return await get_notification_preferences(github_username, db)
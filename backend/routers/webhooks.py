@@ -0,0 +1,60 @@
+import json
+from urllib.parse import parse_qs
+from fastapi import APIRouter, Header, HTTPException, Request
+from sqlalchemy import select, func
+import models
+from config import settings
+from database import SystemSessionLocal, user_session_scope
+from services import github_client, event_broker
+from services.cache import invalidate_user_cache
+from services.github_webhooks import ingest_event, repo_owner, verify_signature
+
+router = APIRouter()
+
+@router.post("/webhooks/github")
+async def github_webhook(
+    request: Request,
+    x_github_event: str = Header(...),
+    x_github_delivery: str = Header(...),
+    x_hub_signature_256: str = Header(None)
+):
+    """Ingest push, create and repository events for the repo owner's tenant DB"""
+    if not settings.GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="GitHub webhooks are not configured")
+    body = await request.body()
+    if not verify_signature(settings.GITHUB_WEBHOOK_SECRET, body, x_hub_signature_256):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    if x_github_event == "ping":
+        return {"status": "pong"}
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+            payload = json.loads(parse_qs(body.decode())["payload"][0])
+        else:
+            payload = json.loads(body)
+    except (ValueError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    owner = repo_owner(payload)
+    async with SystemSessionLocal() as system_db:
+        result = await system_db.execute(
+            select(models.User).filter(func.lower(models.User.github_username) == (owner or "").lower())
+        )
+        user = result.scalars().first()
+    if not user or not user.neon_db_url:
+        # Acknowledge so GitHub does not flag the hook as failing
+        return {"status": "ignored", "reason": "unknown repository owner"}
+
+    async with user_session_scope(user.neon_db_url) as db:
+        outcome = await ingest_event(
+            github_client, db, user.id, user.github_username, x_github_event, x_github_delivery, payload
+        )
+
+    if outcome["status"] == "processed":
+        invalidate_user_cache(user.github_username)
+        event_broker.publish(user.github_username, f"github.{x_github_event}", {
+            "repo": outcome["repo"],
+            "changes": outcome["changes"]
+        })
+    outcome.pop("analysis", None)
+    return outcome
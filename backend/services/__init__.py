@@ -1,4 +1,5 @@
 from .github_integration import GitHubAnalyzer
+from .github_async import AsyncGitHub
 from .action_plan_service import ActionPlanService
 from .crew import SageMentorCrew
 from .email_service import EmailService
@@ -7,7 +8,25 @@ import os
 
 # Initialize services
 github_analyzer = GitHubAnalyzer(os.getenv("GITHUB_TOKEN"))
+github_client = AsyncGitHub(os.getenv("GITHUB_TOKEN"))
 action_plan_service = ActionPlanService()
 sage_crew = SageMentorCrew(os.getenv("GROQ_API_KEY"))
 email_service = EmailService(os.getenv("RESEND_API_KEY"))
 gamification_service = GamificationService()
+
+# Background AI jobs (handlers register themselves on import)
+from .job_queue import job_queue
+from .event_stream import event_broker
+from . import ai_jobs
+
+# Scheduled GitHub refresh for all users
+from .github_scheduler import github_refresh_scheduler
+
+# Cron jobs (notification and email jobs register themselves on import)
+from .scheduler import scheduler
+from . import notification_scheduler
+
+# Event-driven notification rules and their timers
+from .domain_events import domain_events
+from .timer_wheel import timer_wheel
+from . import notification_rules
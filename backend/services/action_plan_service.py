@@ -5,7 +5,7 @@ from .agents import strategist, analyst, psychologist
 from typing import Dict, List
 import json
 from datetime import datetime, timedelta
-import asyncio
+from .groq_client import run_crew
 
 class ActionPlanService:
     """AI-powered action plan generation and management"""
@@ -143,7 +143,7 @@ class ActionPlanService:
             verbose=True
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew)
         
         return self._parse_plan_result(str(result), focus_area, hours_per_day)
     
@@ -255,7 +255,7 @@ class ActionPlanService:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew)
         
         return {
             'tasks': self._extract_tasks(str(result)),
@@ -324,7 +324,7 @@ class ActionPlanService:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew)
         
         return {
             'feedback': str(result),
@@ -1,8 +1,8 @@
 from datetime import datetime, timedelta
 from typing import List, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 import models
+from models.projections import CheckInSignal, load
 from .crew import SageMentorCrew
 
 class ProactiveInsightsEngine:
@@ -16,12 +16,12 @@ class ProactiveInsightsEngine:
         
         week_ago = datetime.utcnow() - timedelta(days=7)
         
-        # Get week's data
-        result = await db.execute(select(models.CheckIn).filter(
+        # Get week's data, oldest first (the patterns compare early and late check-ins)
+        checkins = await load(db, CheckInSignal,
             models.CheckIn.user_id == user_id,
-            models.CheckIn.timestamp >= week_ago
-        ))
-        checkins = result.scalars().all()
+            models.CheckIn.timestamp >= week_ago,
+            order_by=models.CheckIn.timestamp
+        )
         
         if len(checkins) < 3:
             return {"insufficient_data": True}
@@ -41,14 +41,14 @@ class ProactiveInsightsEngine:
         
         return insights
     
-    def _calculate_success_rate(self, checkins: List[models.CheckIn]) -> float:
+    def _calculate_success_rate(self, checkins: List[CheckInSignal]) -> float:
         """Calculate success rate"""
         reviewed = [c for c in checkins if c.shipped is not None]
         if not reviewed:
             return 0.0
         return (sum(1 for c in reviewed if c.shipped) / len(reviewed)) * 100
     
-    def _calculate_consistency(self, checkins: List[models.CheckIn]) -> float:
+    def _calculate_consistency(self, checkins: List[CheckInSignal]) -> float:
         """Calculate consistency score based on check-in frequency"""
         if len(checkins) < 2:
             return 0.0
@@ -70,7 +70,7 @@ class ProactiveInsightsEngine:
         
         return round(consistency, 1)
     
-    def _detect_behavioral_patterns(self, checkins: List[models.CheckIn]) -> List[Dict]:
+    def _detect_behavioral_patterns(self, checkins: List[CheckInSignal]) -> List[Dict]:
         """Detect behavioral patterns"""
         patterns = []
         
@@ -0,0 +1,313 @@
+"""Handlers for AI work moved off the request path.
+
+Each handler loads what it needs from the user's database, runs the crew and
+writes the result back to the row the endpoint already saved. Handlers must be
+safe to run again: a job is retried after failures or an expired lease.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm.attributes import flag_modified
+
+import models
+from database import SystemSessionLocal, user_session_scope
+from . import sage_crew, action_plan_service
+from .cache import invalidate_user_cache
+from .job_queue import job_queue, PermanentJobError
+
+
+@asynccontextmanager
+async def _user_db(job: models.AIJob):
+    async with SystemSessionLocal() as system_db:
+        result = await system_db.execute(select(models.User).filter(models.User.id == job.user_id))
+        user = result.scalars().first()
+    if not user or not user.neon_db_url:
+        raise PermanentJobError(f"User {job.user_id} has no database configured")
+    async with user_session_scope(user.neon_db_url) as db:
+        yield db
+
+
+async def _get_checkin(db, checkin_id: int) -> models.CheckIn:
+    result = await db.execute(select(models.CheckIn).filter(models.CheckIn.id == checkin_id))
+    checkin = result.scalars().first()
+    if not checkin:
+        raise PermanentJobError(f"Check-in {checkin_id} not found")
+    return checkin
+
+
+@job_queue.handler("checkin_analysis")
+async def checkin_analysis(job: models.AIJob, api_key: Optional[str]) -> Dict:
+    """Psychologist read on a morning check-in"""
+    async with _user_db(job) as db:
+        checkin = await _get_checkin(db, job.payload["checkin_id"])
+        if checkin.ai_analysis:
+            # Written by an earlier attempt that lost its lease before finishing
+            return {"checkin_id": checkin.id, "ai_response": checkin.ai_analysis}
+
+        result = await db.execute(select(models.CheckIn).filter(
+            models.CheckIn.user_id == checkin.user_id,
+            models.CheckIn.id != checkin.id
+        ).order_by(models.CheckIn.timestamp.desc()).limit(7))
+        recent_checkins = result.scalars().all()
+
+        history = {
+            "recent_checkins": len(recent_checkins),
+            "avg_energy": sum(c.energy_level or 0 for c in recent_checkins) / len(recent_checkins) if recent_checkins else 0,
+            "commitments_kept": sum(1 for c in recent_checkins if c.shipped)
+        }
+
+        analysis = await sage_crew.quick_checkin_analysis(
+            {
+                "energy_level": checkin.energy_level,
+                "avoiding_what": checkin.avoiding_what,
+                "commitment": checkin.commitment,
+                "mood": checkin.mood
+            },
+            history,
+            api_key=api_key
+        )
+
+        checkin.ai_analysis = analysis["analysis"]
+        db.add(models.AgentAdvice(
+            user_id=checkin.user_id,
+            agent_name="Psychologist",
+            advice=analysis["analysis"],
+            evidence={"checkin": job.payload.get("checkin", {})},
+            interaction_type="checkin"
+        ))
+        await db.commit()
+
+    invalidate_user_cache(job.github_username)
+    return {"checkin_id": checkin.id, "ai_response": analysis["analysis"]}
+
+
+@job_queue.handler("evening_review")
+async def evening_review(job: models.AIJob, api_key: Optional[str]) -> Dict:
+    """Contrarian review of whether the morning commitment shipped"""
+    payload = job.payload
+    async with _user_db(job) as db:
+        checkin = await _get_checkin(db, payload["checkin_id"])
+
+        feedback = await sage_crew.evening_checkin_review(
+            checkin.commitment,
+            checkin.shipped,
+            checkin.excuse,
+            api_key=api_key
+        )
+
+        db.add(models.AgentAdvice(
+            user_id=checkin.user_id,
+            agent_name="Contrarian",
+            advice=feedback["feedback"],
+            evidence={
+                "commitment": checkin.commitment,
+                "shipped": checkin.shipped,
+                "excuse": checkin.excuse,
+                "recent_success_rate": payload.get("recent_success_rate", "0/0")
+            },
+            interaction_type="evening_review"
+        ))
+        await db.commit()
+
+    return {"checkin_id": checkin.id, "feedback": feedback["feedback"]}
+
+
+@job_queue.handler("task_feedback")
+async def task_feedback(job: models.AIJob, api_key: Optional[str]) -> Dict:
+    """Feedback on a completed action-plan task"""
+    payload = job.payload
+    async with _user_db(job) as db:
+        result = await db.execute(select(models.DailyTask).filter(models.DailyTask.id == payload["task_id"]))
+        task = result.scalars().first()
+        if not task:
+            raise PermanentJobError(f"Task {payload['task_id']} not found")
+
+        actual_time = task.actual_time_spent or 0
+        feedback = await action_plan_service.evaluate_task_completion(
+            task={
+                "title": task.title or task.task_description,
+                # Hand-made tasks carry no estimate; compare against the time actually spent
+                "estimated_time": task.estimated_time or actual_time or 30
+            },
+            user_feedback={
+                "notes": task.notes,
+                "actual_time": actual_time,
+                "difficulty_rating": task.difficulty_rating or 3
+            }
+        )
+
+        task.ai_feedback = feedback["feedback"]
+        await db.commit()
+
+    return {"task_id": task.id, **feedback}
+
+
+# --- Goals ---
+
+async def _goal_analysis_failed(job: models.AIJob):
+    """Stop the UI spinner once retries are exhausted"""
+    async with _user_db(job) as db:
+        result = await db.execute(select(models.Goal).filter(models.Goal.id == job.payload["goal_id"]))
+        goal = result.scalars().first()
+        if not goal:
+            return
+        goal.ai_analysis = "Analysis failed. Please try updating the goal later."
+        goal.ai_insights = {
+            "insights": ["AI analysis unavailable at the moment."],
+            "obstacles": [],
+            "recommendations": [],
+            "feasibility_score": 0,
+            "estimated_duration": "Unknown"
+        }
+        flag_modified(goal, "ai_insights")
+        await db.commit()
+
+
+@job_queue.handler("goal_analysis", on_dead=_goal_analysis_failed)
+async def goal_analysis(job: models.AIJob, api_key: Optional[str]) -> Dict:
+    """Full goal analysis with suggested sub-goals"""
+    payload = job.payload
+    async with _user_db(job) as db:
+        result = await db.execute(select(models.Goal).filter(models.Goal.id == payload["goal_id"]))
+        goal = result.scalars().first()
+        if not goal:
+            raise PermanentJobError(f"Goal {payload['goal_id']} not found")
+
+        analysis = await sage_crew.analyze_goal(payload["goal_data"], payload["user_context"], db, api_key)
+
+        goal.ai_analysis = analysis["analysis"]
+        goal.ai_insights = {
+            "insights": analysis["insights"],
+            "obstacles": analysis["obstacles"],
+            "recommendations": analysis["recommendations"],
+            "feasibility_score": analysis["feasibility_score"],
+            "estimated_duration": analysis["estimated_duration"]
+        }
+        goal.obstacles_identified = {"obstacles": analysis["obstacles"]}
+
+        # Skip sub-goals already added by an earlier attempt
+        result = await db.execute(select(models.SubGoal.title).filter(models.SubGoal.goal_id == goal.id))
+        existing = set(result.scalars().all())
+        for sg in analysis["suggested_subgoals"]:
+            if sg["title"] in existing:
+                continue
+            db.add(models.SubGoal(goal_id=goal.id, title=sg["title"], order=sg["order"]))
+
+        flag_modified(goal, "ai_insights")
+        flag_modified(goal, "obstacles_identified")
+        await db.commit()
+
+    return {"goal_id": goal.id, "feasibility_score": analysis["feasibility_score"]}
+
+
+@job_queue.handler("weekly_review", concurrency=2)
+async def weekly_review(job: models.AIJob, api_key: Optional[str]) -> Dict:
+    """Weekly goals review; the result lives on the job"""
+    async with _user_db(job) as db:
+        return await sage_crew.weekly_goals_review(job.user_id, db)
+
+
+# --- Life decisions ---
+
+@job_queue.handler("life_decision_analysis")
+async def life_decision_analysis(job: models.AIJob, api_key: Optional[str]) -> Dict:
+    """Multi-agent analysis of a life decision (new or re-analysis)"""
+    async with _user_db(job) as db:
+        result = await db.execute(select(models.LifeEvent).filter(
+            models.LifeEvent.id == job.payload["decision_id"],
+            models.LifeEvent.user_id == job.user_id
+        ))
+        life_event = result.scalars().first()
+        if not life_event:
+            raise PermanentJobError(f"Decision {job.payload['decision_id']} not found")
+
+        context = life_event.context if isinstance(life_event.context, dict) else {}
+        analysis = await sage_crew.analyze_life_decision(
+            {
+                "title": life_event.description,
+                "description": context.get("full_description", life_event.description),
+                "type": life_event.event_type,
+                "impact_areas": context.get("impact_areas", []),
+                "time_horizon": life_event.time_horizon
+            },
+            job.user_id,
+            db,
+            api_key=api_key
+        )
+
+        life_event.context = {**context, "ai_analysis": analysis["analysis"], "lessons": analysis["lessons"]}
+        life_event.outcome = analysis["long_term_impact"]
+        flag_modified(life_event, "context")
+        await db.commit()
+
+    return {
+        "decision_id": life_event.id,
+        "ai_analysis": analysis["analysis"],
+        "lessons_learned": analysis["lessons"],
+        "long_term_impact": analysis["long_term_impact"]
+    }
+
+
+# --- Action plans ---
+
+async def _action_plan_failed(job: models.AIJob):
+    async with _user_db(job) as db:
+        result = await db.execute(select(models.ActionPlan).filter(models.ActionPlan.id == job.payload["plan_id"]))
+        plan = result.scalars().first()
+        if plan:
+            plan.status = "failed"
+            await db.commit()
+
+
+@job_queue.handler("action_plan", concurrency=2, on_dead=_action_plan_failed)
+async def action_plan(job: models.AIJob, api_key: Optional[str]) -> Dict:
+    """Generate the 30-day plan and its daily tasks for a plan row created by the endpoint"""
+    payload = job.payload
+    async with _user_db(job) as db:
+        result = await db.execute(select(models.ActionPlan).filter(models.ActionPlan.id == payload["plan_id"]))
+        plan = result.scalars().first()
+        if not plan:
+            raise PermanentJobError(f"Action plan {payload['plan_id']} not found")
+
+        ai_plan = await action_plan_service.generate_30_day_plan(
+            user_context=payload["user_context"],
+            focus_area=plan.focus_area,
+            skills_to_learn=payload["skills_to_learn"],
+            skill_level=payload["skill_level"],
+            hours_per_day=payload["hours_per_day"]
+        )
+
+        plan.start_date = datetime.utcnow()
+        plan.end_date = plan.start_date + timedelta(days=ai_plan["total_days"])
+        plan.ai_analysis = str(ai_plan["analysis"])
+        plan.skills_to_focus = {"skills": ai_plan["skills_to_focus"]}
+        plan.milestones = ai_plan["milestones"]
+        plan.status = "active"
+
+        await db.execute(delete(models.DailyTask).where(models.DailyTask.action_plan_id == plan.id))
+        for task_data in ai_plan["daily_tasks"]:
+            db.add(models.DailyTask(
+                action_plan_id=plan.id,
+                day_number=task_data["day_number"],
+                date=plan.start_date + timedelta(days=task_data["day_number"] - 1),
+                title=task_data["title"],
+                task_description=task_data["description"],
+                task_type=task_data["task_type"],
+                difficulty=task_data["difficulty"],
+                estimated_time=task_data["estimated_time"],
+                completed=False
+            ))
+
+        db.add(models.AgentAdvice(
+            user_id=job.user_id,
+            agent_name="Sage Strategist",
+            interaction_type="plan_creation",
+            advice=plan.ai_analysis,
+            evidence={"plan_id": plan.id, "focus_area": plan.focus_area, "title": plan.title},
+            created_at=datetime.utcnow()
+        ))
+        await db.commit()
+
+    return {"plan_id": plan.id, "tasks": len(ai_plan["daily_tasks"])}
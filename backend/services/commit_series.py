@@ -0,0 +1,267 @@
+"""Per-repo commit time series and vectorized rhythm detectors.
+
+Each ``GitHubCommitSeries`` row packs a repo's default-branch commits by the
+user into two little-endian arrays: commits per day from the first to the last
+commit, and a 168-slot hour-of-week histogram (UTC). A year of history for a
+repo costs at most 1.4 KB, and the detectors unpack every repo into NumPy
+once and work on whole arrays:
+
+- streaks: current and longest run of days with commits
+- burstiness: (σ - μ) / (σ + μ) of the gaps between active days; -1 is
+  clockwork, 0 random, towards 1 bursts separated by long silences
+- yo-yo cycles: idle spells of 2+ weeks between active weeks, last 26 weeks
+- weekend share and late-night share of commits, peak hour
+- abandonment curve: share of repos still getting commits N days after their
+  first commit of the backfilled year, among repos at least N days old, and
+  how many went quiet for 90+ days; the median lifetime counts only repos
+  that went quiet or are 90+ days old, so new repos are not taken as abandoned
+
+Series are kept current from two places: refreshes read new commits for each
+pushed repo until they reach the stored ``head_sha`` (usually one request),
+and push webhooks append the pushed commits directly.
+"""
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+import models
+from .github_async import AsyncGitHub, GitHubError
+
+DAY_DTYPE = np.dtype("<u2")
+HOW_DTYPE = np.dtype("<u4")
+HOURS_PER_WEEK = 168
+HISTORY_DAYS = 364 # Backfill window and detector window (52 weeks)
+ABANDONED_AFTER_DAYS = 90
+EPOCH = date(1970, 1, 1)
+
+
+def _epoch_day(day: date) -> int:
+    return (day - EPOCH).days
+
+
+def unpack(series: models.GitHubCommitSeries) -> Tuple[np.ndarray, np.ndarray]:
+    """(commits per day from ``first_day``, hour-of-week histogram)"""
+    days = np.frombuffer(series.day_counts or b"", dtype=DAY_DTYPE)
+    if series.hour_of_week:
+        return days, np.frombuffer(series.hour_of_week, dtype=HOW_DTYPE)
+    return days, np.zeros(HOURS_PER_WEEK, dtype=HOW_DTYPE)
+
+
+def bucket(timestamps: Iterable[datetime]) -> Tuple[np.ndarray, np.ndarray]:
+    """Epoch day and hour of week (Monday 00:00 = 0) of naive UTC timestamps"""
+    ts = np.array(list(timestamps), dtype="datetime64[s]")
+    days = ts.astype("datetime64[D]")
+    day_numbers = days.astype(np.int64)
+    hours = (ts - days) // np.timedelta64(1, "h")
+    # 1970-01-01 was a Thursday
+    return day_numbers, ((day_numbers + 3) % 7) * 24 + hours.astype(np.int64)
+
+
+def add_commits(series: models.GitHubCommitSeries, timestamps: List[datetime]):
+    if not timestamps:
+        return
+    day_numbers, how_index = bucket(timestamps)
+    days, how = unpack(series)
+    start = _epoch_day(series.first_day) if series.first_day and len(days) else int(day_numbers.min())
+    new_start = min(start, int(day_numbers.min()))
+    new_end = max(start + len(days), int(day_numbers.max()) + 1)
+
+    merged = np.bincount(day_numbers - new_start, minlength=new_end - new_start)
+    merged[start - new_start:start - new_start + len(days)] += days
+    series.first_day = EPOCH + timedelta(days=new_start)
+    series.day_counts = np.minimum(merged, np.iinfo(DAY_DTYPE).max).astype(DAY_DTYPE).tobytes()
+    series.hour_of_week = (how + np.bincount(how_index, minlength=HOURS_PER_WEEK)).astype(HOW_DTYPE).tobytes()
+    series.total_commits = (series.total_commits or 0) + len(timestamps)
+
+
+def reset(series: models.GitHubCommitSeries):
+    series.first_day = None
+    series.day_counts = b""
+    series.hour_of_week = b""
+    series.total_commits = 0
+    series.head_sha = None
+
+
+async def load_series(db, user_id: int) -> Dict[str, models.GitHubCommitSeries]:
+    result = await db.execute(select(models.GitHubCommitSeries).filter(models.GitHubCommitSeries.user_id == user_id))
+    return {series.name: series for series in result.scalars().all()}
+
+
+def series_for(db, existing: Dict[str, models.GitHubCommitSeries], user_id: int, repo: str) -> models.GitHubCommitSeries:
+    series = existing.get(repo)
+    if series is None:
+        series = existing[repo] = models.GitHubCommitSeries(user_id=user_id, name=repo, total_commits=0)
+        db.add(series)
+    return series
+
+
+async def sync_repo_series(client: AsyncGitHub, username: str, series: models.GitHubCommitSeries):
+    """Add the repo's commits since ``head_sha``; rebuild the last year if it is gone"""
+    since = datetime.utcnow() - timedelta(days=HISTORY_DAYS)
+    commits, found = await client.new_commits(username, series.name, series.head_sha, since)
+    if not found and series.head_sha:
+        # Force push or history rewrite: the stored counts no longer match the branch
+        reset(series)
+    add_commits(series, [c["date"] for c in commits if (c["author"] or "").lower() == username.lower()])
+    if commits:
+        series.head_sha = commits[0]["sha"]
+
+
+async def sync_commit_series(client: AsyncGitHub, db, user_id: int, username: str, repos: Iterable[str]):
+    """Bring the series of ``repos`` up to date (not committed)"""
+    existing = await load_series(db, user_id)
+    targets = [series_for(db, existing, user_id, repo) for repo in repos]
+
+    async def sync(series):
+        try:
+            await sync_repo_series(client, username, series)
+        except GitHubError as e:
+            print(f"!!! Warning: Could not sync commit series for {username}/{series.name}: {e}")
+
+    await asyncio.gather(*(sync(series) for series in targets))
+
+
+async def daily_commits(db, user_id: int, since: date) -> Dict[str, int]:
+    """Stored commits per day (ISO date) from ``since``, summed over repos; days without commits are left out"""
+    start = _epoch_day(since)
+    totals: Dict[int, int] = {}
+    for series in (await load_series(db, user_id)).values():
+        if not series.first_day:
+            continue
+        days, _ = unpack(series)
+        skip = max(0, start - _epoch_day(series.first_day))
+        first = _epoch_day(series.first_day) + skip
+        recent = days[skip:]
+        for index in np.flatnonzero(recent):
+            totals[first + int(index)] = totals.get(first + int(index), 0) + int(recent[index])
+    return {(EPOCH + timedelta(days=day)).isoformat(): count for day, count in totals.items()}
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indices of the True runs in ``mask``"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def commit_rhythm(
+    series_list: Iterable[models.GitHubCommitSeries],
+    today: date = None,
+    utc_offset_hours: int = 0
+) -> Optional[Dict]:
+    """Rhythm metrics over all repos, or None without any commits"""
+    series_list = [s for s in series_list if s.total_commits and s.first_day]
+    if not series_list:
+        return None
+    today_n = _epoch_day(today or datetime.utcnow().date())
+    window_start = today_n - HISTORY_DAYS + 1
+
+    daily = np.zeros(HISTORY_DAYS, dtype=np.int64)
+    how = np.zeros(HOURS_PER_WEEK, dtype=np.int64)
+    firsts = np.empty(len(series_list), dtype=np.int64)
+    lasts = np.empty(len(series_list), dtype=np.int64)
+    for i, series in enumerate(series_list):
+        days, hours = unpack(series)
+        start = _epoch_day(series.first_day)
+        firsts[i], lasts[i] = start, start + len(days) - 1
+        lo, hi = max(start, window_start), min(start + len(days), today_n + 1)
+        if lo < hi:
+            daily[lo - window_start:hi - window_start] += days[lo - start:hi - start]
+        how += hours
+    how = np.roll(how, utc_offset_hours)
+
+    # Streaks; a streak is still current if the last commit was yesterday
+    starts, ends = _runs(daily > 0)
+    runs = ends - starts
+    current_streak = int(runs[-1]) if runs.size and ends[-1] >= HISTORY_DAYS - 1 else 0
+
+    # Burstiness of the gaps between active days
+    gaps = np.diff(np.flatnonzero(daily))
+    burstiness = None
+    if gaps.size >= 2 and gaps.std() + gaps.mean() > 0:
+        burstiness = float((gaps.std() - gaps.mean()) / (gaps.std() + gaps.mean()))
+
+    # Yo-yo: idle spells of 2+ weeks with activity on both sides
+    weekly = daily.reshape(-1, 7).sum(axis=1)[-26:]
+    idle_starts, idle_ends = _runs(weekly == 0)
+    cycles = int(np.count_nonzero((idle_ends - idle_starts >= 2) & (idle_starts > 0) & (idle_ends < weekly.size)))
+
+    total = how.sum()
+    by_weekday = how.reshape(7, 24).sum(axis=1)
+    by_hour = how.reshape(7, 24).sum(axis=0)
+
+    # A repo's lifetime is known once it went quiet; for an active repo it is a
+    # lower bound, enough to tell whether it outlived N days once it is N days old
+    lifetimes = lasts - firsts + 1
+    ages = today_n - firsts
+    quiet = today_n - lasts > ABANDONED_AFTER_DAYS
+    settled = quiet | (ages >= ABANDONED_AFTER_DAYS)
+    curve = {}
+    for days in (7, 30, 90, 180, 365):
+        old_enough = ages >= days
+        curve[f"{days}d"] = round(float(np.mean(lifetimes[old_enough] >= days)), 3) if old_enough.any() else None
+    return {
+        "commits_30d": int(daily[-30:].sum()),
+        "active_days_30d": int(np.count_nonzero(daily[-30:])),
+        "current_streak": current_streak,
+        "longest_streak": int(runs.max()) if runs.size else 0,
+        "burstiness": round(burstiness, 3) if burstiness is not None else None,
+        "yo_yo_cycles": cycles,
+        "weekly_commits": weekly.tolist(),
+        "weekend_share": round(float(by_weekday[5:].sum() / total), 3) if total else 0.0,
+        "night_share": round(float(by_hour[:5].sum() / total), 3) if total else 0.0,
+        "peak_hour": int(by_hour.argmax()) if total else None,
+        "utc_offset_hours": utc_offset_hours,
+        "abandonment_curve": curve,
+        "median_repo_lifetime_days": int(np.median(lifetimes[settled])) if settled.any() else None,
+        "abandoned_repos": int(np.count_nonzero(quiet)),
+        "settled_repos": int(np.count_nonzero(settled)),
+        "repos": len(series_list),
+    }
+
+
+def rhythm_patterns(rhythm: Optional[Dict]) -> List[Dict]:
+    """Behavioral patterns from ``commit_rhythm``, same shape as ``_detect_patterns``"""
+    if not rhythm:
+        return []
+    patterns = []
+    if rhythm["yo_yo_cycles"] >= 3:
+        patterns.append({
+            "type": "yo_yo_coding",
+            "severity": "medium",
+            "message": f"Coding comes in bursts followed by 2+ week silences ({rhythm['yo_yo_cycles']} times in the last 6 months)."
+        })
+    elif rhythm["burstiness"] is not None and rhythm["burstiness"] > 0.5:
+        patterns.append({
+            "type": "bursty_commits",
+            "severity": "medium",
+            "message": "Commits cluster in short bursts with long gaps in between."
+        })
+    lifetime = rhythm["median_repo_lifetime_days"]
+    if rhythm["settled_repos"] >= 5 and lifetime is not None and lifetime <= 14:
+        patterns.append({
+            "type": "early_abandonment",
+            "severity": "high",
+            "message": f"Half of your repos stop getting commits within {lifetime} days of the first one."
+        })
+    if rhythm["weekend_share"] >= 0.5:
+        patterns.append({
+            "type": "weekend_coder",
+            "severity": "medium",
+            "message": f"{rhythm['weekend_share'] * 100:.0f}% of commits land on weekends."
+        })
+    if rhythm["night_share"] >= 0.3:
+        patterns.append({
+            "type": "late_night_commits",
+            "severity": "medium",
+            "message": f"{rhythm['night_share'] * 100:.0f}% of commits are made between midnight and 5am."
+        })
+    if rhythm["current_streak"] >= 5:
+        patterns.append({
+            "type": "commit_streak",
+            "severity": "positive",
+            "message": f"{rhythm['current_streak']}-day commit streak going. Keep it alive!"
+        })
+    return patterns
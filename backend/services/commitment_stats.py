@@ -0,0 +1,147 @@
+"""Commitment statistics computed by the database.
+
+The stats endpoints used to load every reviewed ``CheckIn`` of the period as
+an ORM object (``ai_analysis`` and ``agent_debate`` included) and count in
+Python, so their cost grew with the user's history. Here each figure is one
+aggregate query that returns a row or a few:
+
+- ``summary``: totals, shipped count, average energy and the excuse keyword
+  counts, as conditional counts (``count(*) FILTER (WHERE ...)``);
+- ``streaks``: current and best shipping streak, from runs of consecutive
+  shipped check-ins found with window functions (the difference of two
+  ``row_number()`` sequences is constant within a run);
+- ``weekly``: shipped and failed per week, grouped by the week's Monday.
+
+Postgres and SQLite (local development) differ in date arithmetic only;
+``week_start`` adapts the expression to the session's dialect. All of them
+read the user's check-ins by time through ``ix_checkins_user_timestamp``.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, and_, case, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+# Words counted in the excuses given for failed commitments
+EXCUSE_KEYWORDS = ("time", "tired", "hard", "busy", "complex", "stuck")
+
+
+def _reviewed(user_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    conditions = [models.CheckIn.user_id == user_id, models.CheckIn.shipped != None]
+    if since is not None:
+        conditions.append(models.CheckIn.timestamp >= since)
+    if until is not None:
+        conditions.append(models.CheckIn.timestamp < until)
+    return and_(*conditions)
+
+
+def week_start(db: AsyncSession, column):
+    """Monday of ``column``'s week, as a date (Postgres) or an ISO date string (SQLite)"""
+    if db.get_bind().dialect.name == "sqlite":
+        # 'weekday 0' moves to the next Sunday (or stays on one); Monday is 6 days earlier
+        return func.date(column, "weekday 0", "-6 days")
+    # A literal, so the GROUP BY expression is the same text as the selected one
+    return cast(func.date_trunc(literal_column("'week'"), column), Date)
+
+
+def _iso_date(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, date) else str(value)[:10]
+
+
+def _rate(shipped: int, total: int) -> float:
+    return round(shipped / total * 100, 1) if total else 0
+
+
+async def summary(db: AsyncSession, user_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, Any]:
+    """Reviewed commitments in [since, until): total, shipped, failed, average energy and excuse keywords"""
+    shipped = models.CheckIn.shipped == True
+    # Whole words, as in the excuse text split on spaces
+    padded_excuse = " " + func.lower(models.CheckIn.excuse) + " "
+    result = await db.execute(
+        select(
+            func.count(),
+            func.count().filter(shipped),
+            func.avg(models.CheckIn.energy_level),
+            *(func.count().filter(~shipped, padded_excuse.like(f"% {word} %")) for word in EXCUSE_KEYWORDS)
+        ).filter(_reviewed(user_id, since, until))
+    )
+    total, shipped_count, avg_energy, *excuse_counts = result.one()
+    excuses = sorted(
+        ((word, count) for word, count in zip(EXCUSE_KEYWORDS, excuse_counts) if count),
+        key=lambda item: item[1], reverse=True
+    )
+    return {
+        "total": total,
+        "shipped": shipped_count or 0,
+        "failed": total - (shipped_count or 0),
+        "success_rate": _rate(shipped_count or 0, total),
+        "avg_energy": round(float(avg_energy), 1) if avg_energy is not None else 0,
+        "common_excuses": [{"excuse": word, "count": count} for word, count in excuses[:3]],
+    }
+
+
+async def streaks(db: AsyncSession, user_id: int, since: Optional[datetime] = None) -> Dict[str, Any]:
+    """Current and best runs of shipped commitments (reviewed ones only), and the latest review's check-in time"""
+    order = (models.CheckIn.timestamp, models.CheckIn.id)
+    reviewed = (
+        select(
+            models.CheckIn.timestamp,
+            models.CheckIn.shipped,
+            (
+                func.row_number().over(order_by=order)
+                - func.row_number().over(partition_by=models.CheckIn.shipped, order_by=order)
+            ).label("run")
+        )
+        .filter(_reviewed(user_id, since))
+        .cte("reviewed")
+    )
+    runs = (
+        select(func.count().label("length"), func.max(reviewed.c.timestamp).label("ends_at"))
+        .filter(reviewed.c.shipped == True)
+        .group_by(reviewed.c.run)
+        .subquery()
+    )
+    latest = select(func.max(reviewed.c.timestamp)).scalar_subquery()
+    result = await db.execute(select(
+        func.max(runs.c.length),
+        # The current streak is the run that ends with the latest review
+        func.max(case((runs.c.ends_at == latest, runs.c.length))),
+        latest
+    ))
+    best, current, last = result.one()
+    if isinstance(last, str):
+        last = datetime.fromisoformat(last)
+    return {"current": current or 0, "best": best or 0, "last_checkin": last}
+
+
+async def weekly(db: AsyncSession, user_id: int, since: Optional[datetime] = None, weeks: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Shipped, failed and average energy per week (Monday first), latest week first"""
+    week = week_start(db, models.CheckIn.timestamp).label("week_start")
+    query = (
+        select(
+            week,
+            func.count().filter(models.CheckIn.shipped == True),
+            func.count().filter(models.CheckIn.shipped == False),
+            func.avg(models.CheckIn.energy_level)
+        )
+        .filter(_reviewed(user_id, since))
+        .group_by(week)
+        .order_by(week.desc())
+    )
+    if weeks:
+        query = query.limit(weeks)
+    result = await db.execute(query)
+    return [
+        {
+            "week_start": _iso_date(week_start_value),
+            "shipped": shipped,
+            "failed": failed,
+            "rate": _rate(shipped, shipped + failed),
+            "avg_energy": round(float(avg_energy), 1) if avg_energy is not None else 0,
+        }
+        for week_start_value, shipped, failed, avg_energy in result.all()
+    ]
@@ -0,0 +1,239 @@
+"""Compact, token-budgeted context blobs for agent prompts.
+
+Prompts used to embed ``json.dumps(data, indent=2)`` straight into task
+descriptions, sometimes twice. Indentation, empty values and repeated blobs
+all cost input tokens on Groq. ``build_context`` renders each field as
+minified JSON, drops empty values and duplicates, and trims the
+lowest-priority fields first until the result fits the token budget.
+"""
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Words, single punctuation marks and whitespace runs
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]|\s+", re.UNICODE)
+_ELLIPSIS = "…"
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in ``text``.
+
+    Approximates a BPE tokenizer (Llama / GPT style): words cost roughly one
+    token per 4 characters, each punctuation mark costs one token, a single
+    space is merged into the next word and longer whitespace runs (newlines,
+    indentation) cost one token per 4 characters.
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece.isspace():
+            if piece == " ":
+                continue
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isalnum() or piece[0] == "_":
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def compact_value(value: Any, max_items: Optional[int] = None, max_chars: Optional[int] = None) -> Any:
+    """Recursively drop empty values, de-duplicate lists and truncate long lists/strings"""
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            item = compact_value(item, max_items, max_chars)
+            if not _is_empty(item):
+                compacted[key] = item
+        return compacted
+
+    if isinstance(value, (list, tuple, set)):
+        seen = set()
+        compacted = []
+        for item in value:
+            item = compact_value(item, max_items, max_chars)
+            if _is_empty(item):
+                continue
+            key = dumps(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            compacted.append(item)
+        if max_items is not None and len(compacted) > max_items:
+            compacted = compacted[:max_items]
+        return compacted
+
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        if max_chars is not None and len(value) > max_chars:
+            value = value[:max(max_chars - 1, 0)].rstrip() + _ELLIPSIS
+        return value
+
+    if isinstance(value, float):
+        return round(value, 2)
+
+    return value
+
+
+def dumps(value: Any) -> str:
+    """Minified JSON (no indentation, no spaces after separators)"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+@dataclass
+class ContextField:
+    """A named piece of prompt context.
+
+    ``priority`` decides what survives when the budget is tight: fields with
+    the lowest priority are shrunk first (``max_items``/``max_chars`` halved
+    down to ``min_items``/``min_chars``) and dropped if that is not enough.
+    """
+    name: str
+    value: Any
+    priority: int = 50
+    max_items: Optional[int] = None
+    max_chars: Optional[int] = None
+    min_items: int = 1
+    min_chars: int = 80
+
+
+@dataclass
+class CompactedContext:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    dropped: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return self.text
+
+
+def _legacy_render(fields: List[ContextField]) -> str:
+    """How the prompt looked before compaction (indented JSON per field)"""
+    parts = []
+    for f in fields:
+        value = f.value if isinstance(f.value, str) else json.dumps(f.value, indent=2, default=str)
+        parts.append(f"{f.name}: {value}")
+    return "\n\n".join(parts)
+
+
+def _render(f: ContextField, max_items: Optional[int], max_chars: Optional[int]) -> Optional[str]:
+    value = compact_value(f.value, max_items, max_chars)
+    if _is_empty(value):
+        return None
+    return f"{f.name}: {dumps(value)}"
+
+
+def build_context(
+    label: str,
+    fields: List[ContextField],
+    budget: int = 1500,
+    legacy_text: Optional[str] = None,
+    report: bool = True
+) -> CompactedContext:
+    """Render ``fields`` as a compact context block that fits in ``budget`` tokens.
+
+    ``legacy_text`` is the prompt fragment this context replaces; it is only
+    used to report the before/after token counts. When omitted, the indented
+    JSON rendering of the fields is used as the baseline.
+    """
+    tokens_before = count_tokens(legacy_text if legacy_text is not None else _legacy_render(fields))
+
+    limits: Dict[str, Dict[str, Optional[int]]] = {
+        f.name: {"max_items": f.max_items, "max_chars": f.max_chars} for f in fields
+    }
+    dropped: List[str] = []
+
+    def render_all() -> Dict[str, str]:
+        rendered = {}
+        seen = set()
+        for f in fields:
+            if f.name in dropped:
+                continue
+            line = _render(f, limits[f.name]["max_items"], limits[f.name]["max_chars"])
+            if line is None:
+                continue
+            # Skip blobs that repeat an earlier field verbatim
+            body = line.split(": ", 1)[1]
+            if body in seen:
+                continue
+            seen.add(body)
+            rendered[f.name] = line
+        return rendered
+
+    rendered = render_all()
+    total = count_tokens("\n".join(rendered.values()))
+
+    # Shrink, then drop, the lowest-priority fields until we fit
+    for f in sorted(fields, key=lambda x: x.priority):
+        if total <= budget:
+            break
+        if f.name not in rendered:
+            continue
+
+        value = compact_value(f.value)
+        while total > budget:
+            lim = limits[f.name]
+            shrunk = False
+            if isinstance(value, list):
+                current = lim["max_items"] if lim["max_items"] is not None else len(value)
+                if current > f.min_items:
+                    lim["max_items"] = max(f.min_items, current // 2)
+                    shrunk = True
+            if not shrunk:
+                current = lim["max_chars"] if lim["max_chars"] is not None else len(dumps(value))
+                if current > f.min_chars:
+                    lim["max_chars"] = max(f.min_chars, current // 2)
+                    shrunk = True
+            if not shrunk:
+                break
+            rendered = render_all()
+            total = count_tokens("\n".join(rendered.values()))
+
+        if total > budget:
+            dropped.append(f.name)
+            rendered = render_all()
+            total = count_tokens("\n".join(rendered.values()))
+
+    text = "\n".join(rendered.values())
+    context = CompactedContext(text=text, tokens_before=tokens_before, tokens_after=count_tokens(text), dropped=dropped)
+
+    if report:
+        saved = (1 - context.tokens_after / tokens_before) * 100 if tokens_before else 0
+        dropped_note = f", dropped: {', '.join(dropped)}" if dropped else ""
+        print(f"🗜️ [Context] {label}: {tokens_before} → {context.tokens_after} tokens ({saved:.0f}% saved{dropped_note})")
+
+    return context
+
+
+def github_fields(github_data: Dict) -> List[ContextField]:
+    """Standard field priorities for a ``GitHubAnalyzer.analyze_user`` result"""
+    github_data = github_data or {}
+    patterns = [
+        {"type": p.get("type"), "severity": p.get("severity"), "message": p.get("message")}
+        if isinstance(p, dict) else p
+        for p in github_data.get("patterns", []) or []
+    ]
+    totals = {
+        key: github_data.get(key)
+        for key in ("username", "total_repos", "active_repos", "total_commits")
+        if key in github_data
+    }
+    return [
+        ContextField("github_totals", totals, priority=100),
+        ContextField("patterns", patterns, priority=80, max_items=6, max_chars=200),
+        ContextField("languages", github_data.get("languages", {}), priority=70),
+        ContextField("commit_rhythm", github_data.get("commit_rhythm"), priority=60),
+        ContextField("started_not_finished", github_data.get("started_not_finished", []), priority=40, max_items=5),
+        ContextField("profile_url", github_data.get("profile_url"), priority=5),
+    ]
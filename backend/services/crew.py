@@ -1,17 +1,21 @@
 from crewai import Task, Crew, Process
 from .agents import create_agents, get_agents
+from .context_builder import ContextField, build_context, github_fields
+from .groq_client import run_crew
+from .structured_output import (
+    DeliberationOutcome, GoalAnalysis, GoalPlan, PlanProposal,
+    parse, parse_structured, schema_prompt
+)
 from typing import Dict, List
 import json
 import models
-from datetime import datetime
+from datetime import datetime, timedelta
 import io
 import sys
 import asyncio
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from .agents import create_agents, get_agents
-
 class SageMentorCrew:
     def __init__(self, api_key: str = None):
         # If api_key is provided, create new agents. 
@@ -53,13 +57,21 @@ class SageMentorCrew:
         """Main analysis flow: All agents deliberate on the developer's situation"""
         self._ensure_agents(api_key)
         
-        context = self._prepare_context(github_data, checkin_history)
+        # The analyst sees the GitHub data; the psychologist already receives the
+        # analyst's findings through task context, so only check-ins are added there.
+        github_context = build_context(
+            "analyze_developer.github",
+            github_fields(github_data),
+            budget=1200,
+            legacy_text=f"{json.dumps(github_data, indent=2)}\n\nGitHub Analysis: {json.dumps(github_data, indent=2)}"
+        )
+        context = self._prepare_context(None, checkin_history)
         
         analysis_task = Task(
             description=f"""Analyze this developer's GitHub data and extract key insights:
             
             GitHub Data:
-            {json.dumps(github_data, indent=2)}
+            {github_context}
             
             Your job:
             1. Identify what they CLAIM to be (based on repo names, languages used)
@@ -105,7 +117,7 @@ class SageMentorCrew:
             - No vague advice like "improve skills" - be specific
             - Include deadlines (dates, not "soon")
             - Must be achievable in 2 weeks
-            - Call out any BS (if they keep asking about X but never do X)""",
+            - Call out any BS (if they keep asking about X but never do X)""" + schema_prompt(DeliberationOutcome),
             agent=self.strategist,
             expected_output="A specific, time-bound action plan with clear accountability metrics",
             context=[analysis_task, psychology_task]
@@ -118,9 +130,10 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
+        outcome = await self._deliberation_outcome(str(result), api_key)
         
-        return self._structure_output(result, github_data)
+        return self._structure_output(outcome, github_data)
     
     def _capture_output(self, crew):
         """Capture verbose output from crew execution"""
@@ -202,7 +215,7 @@ class SageMentorCrew:
             4. Call out any BS in their question or underlying assumptions
             5. What should they do RIGHT NOW (today)?
             
-            Be brutally specific. No vague advice. Include deadlines and metrics.""",
+            Be brutally specific. No vague advice. Include deadlines and metrics.""" + schema_prompt(DeliberationOutcome),
             agent=self.strategist,
             expected_output="Actionable response with specific steps and timeframes",
             context=[analyst_task, psychologist_task, contrarian_task]
@@ -211,28 +224,16 @@ class SageMentorCrew:
         # If the user is asking for a plan, we want structured output
         if "plan" in user_message.lower() or "roadmap" in user_message.lower() or "learn" in user_message.lower():
             strategist_task.description += """
-            
-            IMPORTANT: If you are proposing a specific learning plan or project, output a JSON block at the end of your response like this:
-            ```json
-            {
-                "type": "plan_proposal",
-                "title": "Title of Plan",
-                "description": "Short description",
-                "focus_area": "Focus Area",
-                "skills": ["Skill 1", "Skill 2"],
-                "duration_days": 30,
-                "daily_time_minutes": 60
-            }
-            ```
-            """
+            If you are proposing a specific learning plan or project, fill "plan_proposal" in the JSON block."""
+        else:
+            strategist_task.description += """
+            Set "plan_proposal" to null."""
 
         return [analyst_task, psychologist_task, contrarian_task, strategist_task]
 
-    async def stream_chat_deliberation(self, user_message: str, user_context: Dict, additional_context: Dict = None, api_key: str = None):
-        """Stream multi-agent deliberation events"""
-        self._ensure_agents(api_key)
-        
-        context_str = f"""
+    def _chat_context(self, user_context: Dict, additional_context: Dict = None) -> str:
+        """Compact user context shared by every chat task"""
+        legacy_text = f"""
         User Context:
         - GitHub: {user_context['github']}
         - Recent Performance: {user_context['recent_performance']}
@@ -240,6 +241,24 @@ class SageMentorCrew:
         
         Additional Context: {additional_context if additional_context else 'None'}
         """
+        context = build_context(
+            "chat",
+            [
+                ContextField("github", user_context['github'], priority=80, max_items=6, max_chars=200),
+                ContextField("recent_performance", user_context['recent_performance'], priority=90),
+                ContextField("life_decisions", user_context['life_decisions'], priority=50, max_items=10, max_chars=160),
+                ContextField("additional_context", additional_context, priority=70, max_chars=1500),
+            ],
+            budget=1200,
+            legacy_text=legacy_text
+        )
+        return f"User Context:\n{context}"
+
+    async def stream_chat_deliberation(self, user_message: str, user_context: Dict, additional_context: Dict = None, api_key: str = None):
+        """Stream multi-agent deliberation events"""
+        self._ensure_agents(api_key)
+        
+        context_str = self._chat_context(user_context, additional_context)
         
         tasks = self._create_chat_tasks(user_message, context_str)
         
@@ -281,9 +300,9 @@ class SageMentorCrew:
             step_callback=step_callback
         )
         
-        async def run_crew():
+        async def run_deliberation():
             try:
-                result = await asyncio.to_thread(crew.kickoff)
+                result = await run_crew(crew, api_key)
                 
                 # Process final result
                 # We need to reconstruct the 'debate' and 'raw_deliberation' from the stream or just send the final result
@@ -292,12 +311,7 @@ class SageMentorCrew:
                 # Note: We can't easily get the full raw output like in the sync version because we're not capturing stdout
                 # But we have the step events which serve a similar purpose
                 
-                final_response = {
-                    "final_response": str(result),
-                    "key_insights": self._extract_key_points(str(result)),
-                    "actions": self._extract_actions(str(result)),
-                    "plan_proposal": self._extract_plan_proposal(str(result))
-                }
+                final_response = await self._deliberation_outcome(str(result), api_key)
                 
                 await queue.put({
                     "type": "final",
@@ -309,7 +323,7 @@ class SageMentorCrew:
                 await queue.put(None) # Sentinel
 
         # Start crew in background
-        asyncio.create_task(run_crew())
+        asyncio.create_task(run_deliberation())
 
         # Yield events from queue
         while True:
@@ -324,14 +338,7 @@ class SageMentorCrew:
         
         self.raw_output = []  # Reset raw output
         
-        context_str = f"""
-        User Context:
-        - GitHub: {user_context['github']}
-        - Recent Performance: {user_context['recent_performance']}
-        - Life Decisions: {user_context['life_decisions']}
-        
-        Additional Context: {additional_context if additional_context else 'None'}
-        """
+        context_str = self._chat_context(user_context, additional_context)
         
         tasks = self._create_chat_tasks(user_message, context_str)
         
@@ -350,21 +357,24 @@ class SageMentorCrew:
         def run_and_capture():
             return self._capture_output(crew)
             
-        result = await asyncio.to_thread(run_and_capture)
+        result = await run_crew(crew, api_key, run=run_and_capture)
         
         # Parse raw output for agent contributions
         agent_contributions = self._parse_agent_output(self.raw_output)
         
+        outcome = await self._deliberation_outcome(str(result), api_key)
+        
         return {
-            "final_response": str(result),
+            "final_response": outcome["final_response"],
             "debate": [
                 {"agent": "Analyst", "perspective": "Data-driven reality check", "color": "blue"},
                 {"agent": "Psychologist", "perspective": "Underlying psychology", "color": "purple"},
                 {"agent": "Contrarian", "perspective": "Challenging assumptions", "color": "red"},
                 {"agent": "Strategist", "perspective": "Actionable synthesis", "color": "green"}
             ],
-            "key_insights": self._extract_key_points(str(result)),
-            "actions": self._extract_actions(str(result)),
+            "key_insights": outcome["key_insights"],
+            "actions": outcome["actions"],
+            "plan_proposal": outcome["plan_proposal"],
             "raw_deliberation": agent_contributions  # NEW: Raw deliberation data
         }
     
@@ -460,7 +470,7 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         result_str = str(result)
         
         lessons = []
@@ -509,7 +519,7 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         result_str = str(result)
         
         new_lessons = []
@@ -535,6 +545,13 @@ class SageMentorCrew:
         """Quick analysis for daily check-ins"""
         self._ensure_agents(api_key)
         
+        history_context = build_context(
+            "quick_checkin_analysis",
+            [ContextField("history", user_history, priority=100, max_items=7)],
+            budget=400,
+            legacy_text=json.dumps(user_history, indent=2)
+        )
+        
         checkin_task = Task(
             description=f"""Analyze this daily check-in:
             
@@ -545,7 +562,7 @@ class SageMentorCrew:
             - Mood: {checkin_data.get('mood', 'Not specified')}
             
             Recent History:
-            {json.dumps(user_history, indent=2)}
+            {history_context}
             
             Your job:
             1. Is this check-in honest or are they fooling themselves?
@@ -565,7 +582,7 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         return {"analysis": str(result)}
     
     async def evening_checkin_review(self, morning_commitment: str, shipped: bool, excuse: str = None, api_key: str = None) -> Dict:
@@ -597,23 +614,39 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         return {"feedback": str(result)}
     
-    def _prepare_context(self, github_data: Dict, checkin_history: List[Dict] = None) -> str:
-        """Prepare context from available data"""
-        context = f"GitHub Analysis: {json.dumps(github_data, indent=2)}"
-        
+    def _prepare_context(self, github_data: Dict = None, checkin_history: List[Dict] = None) -> str:
+        """Prepare compact context from available data"""
+        fields = github_fields(github_data) if github_data else []
         if checkin_history:
-            context += f"\n\nRecent Check-ins: {json.dumps(checkin_history[-7:], indent=2)}"
-        
-        return context
+            fields.append(ContextField(
+                "recent_checkins",
+                list(reversed(checkin_history[-7:])),  # Newest first so truncation keeps them
+                priority=60,
+                max_items=7,
+                max_chars=240
+            ))
+        
+        return build_context("prepare_context", fields, budget=1500).text
+    
+    async def _deliberation_outcome(self, text: str, api_key: str = None) -> Dict:
+        """Final answer plus its JSON summary; text heuristics only if there is no usable block"""
+        parsed = await parse_structured(text, DeliberationOutcome, api_key, label="deliberation")
+        if parsed.value is not None:
+            outcome = parsed.value.model_dump()
+        else:
+            outcome = {
+                "key_insights": self._extract_key_points(text),
+                "actions": self._extract_actions(text),
+                "plan_proposal": self._extract_plan_proposal(text)
+            }
+        return {"final_response": parsed.prose, **outcome}
     
-    def _structure_output(self, crew_result, github_data: Dict) -> Dict:
+    def _structure_output(self, outcome: Dict, github_data: Dict) -> Dict:
         """Structure the crew output into a usable format"""
         
-        result_str = str(crew_result)
-        
         return {
             "timestamp": str(datetime.now()),
             "github_summary": {
@@ -623,10 +656,10 @@ class SageMentorCrew:
                 "patterns": github_data.get("patterns", [])
             },
             "agent_insights": {
-                "full_analysis": result_str,
-                "key_findings": self._extract_key_points(result_str)
+                "full_analysis": outcome["final_response"],
+                "key_findings": outcome["key_insights"]
             },
-            "recommended_actions": self._extract_actions(result_str)
+            "recommended_actions": outcome["actions"]
         }
     
     def _extract_key_points(self, text: str) -> List[str]:
@@ -661,19 +694,9 @@ class SageMentorCrew:
         return actions[:3]
 
     def _extract_plan_proposal(self, text: str) -> Dict:
-        """Extract JSON plan proposal from text"""
-        try:
-            import re
-            # Look for JSON block
-            json_match = re.search(r'```json\s*({.*?})\s*```', text, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group(1))
-                if data.get("type") == "plan_proposal":
-                    return data
-            return None
-        except Exception as e:
-            print(f"Error extracting plan proposal: {e}")
-            return None
+        """Standalone plan proposal block, for answers without the full summary"""
+        proposal = parse(text, PlanProposal).value
+        return proposal.model_dump() if proposal else None
     
     async def generate_goal_plan(self, title: str, user_context: Dict, api_key: str = None) -> Dict:
         """Generate a detailed goal plan from a simple title"""
@@ -688,26 +711,9 @@ class SageMentorCrew:
             
             Your job is to flesh out this goal into a concrete plan.
             
-            Output MUST be a valid JSON object with this exact structure:
-            {{
-                "description": "A compelling, specific description of what success looks like.",
-                "milestones": [
-                    {{
-                        "title": "Milestone 1 Title",
-                        "description": "What to achieve",
-                        "target_date": "YYYY-MM-DD" (calculate based on realistic timeline from today {datetime.now().strftime('%Y-%m-%d')})
-                    }}
-                ],
-                "success_criteria": [
-                    "Criterion 1",
-                    "Criterion 2"
-                ],
-                "goal_type": "career" (or personal, financial, health, learning, project),
-                "priority": "high" (or medium, critical)
-            }}
-            
-            Do not include any markdown formatting or explanations outside the JSON.
-            """,
+            Milestone target dates must be realistic, counting from today ({datetime.now().strftime('%Y-%m-%d')}).
+            The description should be compelling and say specifically what success looks like.
+            Output only the JSON block, no explanations.""" + schema_prompt(GoalPlan),
             agent=self.strategist,
             expected_output="JSON object with goal details"
         )
@@ -719,39 +725,19 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         
-        # Parse JSON from result
-        try:
-            result_str = str(result)
-            # Clean up markdown code blocks if present
-            if "```json" in result_str:
-                result_str = result_str.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_str:
-                result_str = result_str.split("```")[1].split("```")[0].strip()
-            
-            # Remove any leading/trailing text that isn't part of the JSON object
-            result_str = result_str.strip()
-            if not result_str.startswith('{'):
-                start_idx = result_str.find('{')
-                if start_idx != -1:
-                    result_str = result_str[start_idx:]
-            if not result_str.endswith('}'):
-                end_idx = result_str.rfind('}')
-                if end_idx != -1:
-                    result_str = result_str[:end_idx+1]
-
-            return json.loads(result_str)
-        except Exception as e:
-            print(f"Error parsing generated goal plan: {e}")
-            # Fallback
-            return {
-                "description": f"Plan for {title}",
-                "milestones": [],
-                "success_criteria": ["Complete the goal"],
-                "goal_type": "personal",
-                "priority": "medium"
-            }
+        parsed = await parse_structured(str(result), GoalPlan, api_key, label="goal_plan")
+        if parsed.value is not None:
+            return parsed.value.model_dump()
+        
+        return {
+            "description": f"Plan for {title}",
+            "milestones": [],
+            "success_criteria": ["Complete the goal"],
+            "goal_type": "personal",
+            "priority": "medium"
+        }
 
     async def analyze_goal(self, goal_data: Dict, user_context: Dict, db, api_key: str = None) -> Dict:
         """Comprehensive AI analysis of a life goal"""
@@ -841,7 +827,9 @@ class SageMentorCrew:
             6. Identify likely obstacles and mitigation strategies
             7. Create accountability checkpoints
             
-            Be specific. No vague advice. Include dates, numbers, and measurable outcomes.""",
+            Be specific. No vague advice. Include dates, numbers, and measurable outcomes.
+            In the JSON block, take feasibility_score from the Analyst's 1-10 rating and
+            list the subgoals from step 1 in order.""" + schema_prompt(GoalAnalysis),
             agent=self.strategist,
             expected_output="Detailed execution strategy with subgoals and tasks",
             context=[analyst_task, psychologist_task, contrarian_task]
@@ -854,8 +842,11 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         
+        parsed = await parse_structured(str(result), GoalAnalysis, api_key, label="goal_analysis")
+        if parsed.value is not None:
+            return {"analysis": parsed.prose, **parsed.value.model_dump()}
         return self._parse_goal_analysis(str(result), goal_data)
     
     def _parse_goal_analysis(self, analysis: str, goal_data: Dict) -> Dict:
@@ -893,9 +884,13 @@ class SageMentorCrew:
                     insights.append(content)
         
         return {
+            "analysis": analysis,
             "insights": insights[:5],
             "obstacles": obstacles[:3],
-            "recommendations": recommendations[:5]
+            "recommendations": recommendations[:5],
+            "feasibility_score": self._extract_score(analysis),
+            "estimated_duration": self._estimate_duration(analysis),
+            "suggested_subgoals": self._extract_subgoals(analysis)
         }
 
     async def summarize_content(self, text: str, context: str = None, api_key: str = None) -> Dict:
@@ -928,7 +923,7 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         return {"summary": str(result)}
 
     async def review_code(self, code: str, language: str, problem_title: str, description: str = None, api_key: str = None) -> Dict:
@@ -963,7 +958,7 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         return {"review": str(result)}
 
     
@@ -1040,6 +1035,13 @@ class SageMentorCrew:
             for log in recent_logs
         ]
         
+        history_context = build_context(
+            "analyze_goal_progress",
+            [ContextField("progress_history", progress_history, priority=100, max_items=5, max_chars=300)],
+            budget=800,
+            legacy_text=json.dumps(progress_history, indent=2)
+        )
+        
         analysis_task = Task(
             description=f"""Analyze this goal progress update:
             
@@ -1048,7 +1050,7 @@ class SageMentorCrew:
             Previous Progress: {progress_history[0]['progress'] if progress_history else 0}%
             
             Progress History (last 5 updates):
-            {json.dumps(progress_history, indent=2)}
+            {history_context}
             
             Current Update:
             - Notes: {progress_data.get('notes', 'None')}
@@ -1076,7 +1078,7 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, api_key)
         
         return {
             "feedback": str(result),
@@ -1111,7 +1113,7 @@ class SageMentorCrew:
         
         # Calculate date range (last 7 days)
         end_date = datetime.utcnow()
-        start_date = end_date - datetime.timedelta(days=7)
+        start_date = end_date - timedelta(days=7)
         
         # 1. Fetch Active Goals
         result = await db.execute(select(models.Goal).filter(
@@ -1160,6 +1162,13 @@ class SageMentorCrew:
             
         completed_summary = [g.title for g in completed_goals]
         
+        goals_context = build_context(
+            "weekly_goals_review",
+            [ContextField("active_goals", goals_summary, priority=100, max_items=10, max_chars=160)],
+            budget=600,
+            legacy_text=json.dumps(goals_summary, indent=2)
+        )
+        
         review_task = Task(
             description=f"""Weekly Performance Review:
             
@@ -1170,7 +1179,7 @@ class SageMentorCrew:
             - Active Goals: {len(active_goals)}
             
             Active Goals Status:
-            {json.dumps(goals_summary, indent=2)}
+            {goals_context}
             
             Your job:
             1. Give a 1-sentence summary of their week (Encouraging or Tough Love based on score)
@@ -1190,7 +1199,7 @@ class SageMentorCrew:
             verbose=False
         )
         
-        result = await asyncio.to_thread(crew.kickoff)
+        result = await run_crew(crew, None)
         
         return {
             "review_text": str(result),
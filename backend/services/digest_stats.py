@@ -0,0 +1,148 @@
+"""Daily digest stats for a whole batch of users at once.
+
+The digest shows each user's streak, the pending tasks of their active action
+plan's current day and the LeetCode problems due for review. Opening every
+user's tenant database and running the dashboard queries per user would be a
+request storm, so ``DigestStats`` wraps the batches a fan-out reads:
+
+- the streak comes with the user row (``User.current_streak`` is among
+  ``user_stream.USER_COLUMNS``);
+- tasks and due problems are read with one query each per tenant database
+  per batch (``user_id IN (...)``), for all of the batch's users on it;
+- tenant databases are queried concurrently, at most
+  ``FANOUT_TENANT_DB_CONCURRENCY`` at a time per database server, and the next
+  batch is loaded while the current one is being sent.
+
+Handlers then take their stats with ``pop(user)``, which only touches the
+tenant database when the user's batch could not be loaded.
+"""
+import asyncio
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Deque, Dict, List, Optional
+
+from sqlalchemy import Row, select
+
+import models
+from config import settings
+from database import user_session_scope
+from .fanout import _tenant_key
+
+# Items listed per section of a digest
+MAX_TASKS = 5
+MAX_PROBLEMS = 5
+DEFAULT_QUOTE = "Consistency is the key to mastery."
+# Batches whose unused stats are kept after they were handed to the fan-out
+RETAINED_BATCHES = 2
+
+
+class DigestStats:
+    def __init__(self, concurrency: int = None, tenant_concurrency: int = None, quote: str = DEFAULT_QUOTE):
+        self.quote = quote
+        self._slots = asyncio.Semaphore(concurrency or settings.FANOUT_CONCURRENCY)
+        self._tenant_limit = tenant_concurrency or settings.FANOUT_TENANT_DB_CONCURRENCY
+        self._tenants: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[int, Dict] = {}
+        self.counters = {"users": 0, "databases": 0, "queries": 0, "failed_databases": 0, "fallbacks": 0}
+
+    async def batches(self, batches: AsyncIterable[List[Row]]) -> AsyncIterator[List[Row]]:
+        """``batches`` unchanged, each yielded once its stats are loaded (the next one loads meanwhile)"""
+        pending: Optional[tuple] = None
+        yielded: Deque[List[Row]] = deque(maxlen=RETAINED_BATCHES)
+        async for batch in batches:
+            loading = asyncio.create_task(self.load(batch))
+            if pending is not None:
+                await pending[1]
+                self._retain(yielded, pending[0])
+                yield pending[0]
+            pending = (batch, loading)
+        if pending is not None:
+            await pending[1]
+            yield pending[0]
+
+    def _retain(self, yielded: Deque[List[Row]], batch: List[Row]):
+        # Users the fan-out skipped (already sent) never pop their stats; drop
+        # them once their batch is long done so memory stays flat. A user still
+        # running from that batch falls back to loading on their own.
+        if len(yielded) == yielded.maxlen:
+            for user in yielded[0]:
+                self._stats.pop(user.id, None)
+        yielded.append(batch)
+
+    async def load(self, users: List[Row]):
+        """Stats for ``users``, with one round of queries per tenant database"""
+        by_database: Dict[str, List[Row]] = defaultdict(list)
+        for user in users:
+            if user.neon_db_url:
+                by_database[user.neon_db_url].append(user)
+            else:
+                self._stats[user.id] = self._digest(user, [], [])
+        await asyncio.gather(*(self._load_database(url, tenant_users) for url, tenant_users in by_database.items()))
+
+    async def _load_database(self, database_url: str, users: List[Row]):
+        key = _tenant_key(database_url)
+        tenant = self._tenants.setdefault(key, asyncio.Semaphore(self._tenant_limit))
+        try:
+            async with tenant, self._slots:
+                tasks, problems = await self._query(database_url, [user.id for user in users])
+        except Exception as e:
+            self.counters["failed_databases"] += 1
+            print(f"⚠️ [Digest] Could not load stats for {len(users)} user(s) on {key}: {e}")
+            return
+        self.counters["databases"] += 1
+        for user in users:
+            self._stats[user.id] = self._digest(user, tasks.get(user.id, []), problems.get(user.id, []))
+
+    async def _query(self, database_url: str, user_ids: List[int]) -> tuple:
+        """Pending tasks and due problems of ``user_ids``, by user"""
+        tasks: Dict[int, List[str]] = defaultdict(list)
+        problems: Dict[int, List[Dict]] = defaultdict(list)
+        async with user_session_scope(database_url) as db:
+            result = await db.execute(
+                select(models.ActionPlan.user_id, models.DailyTask.title, models.DailyTask.task_description)
+                .join(models.ActionPlan, models.DailyTask.action_plan_id == models.ActionPlan.id)
+                .filter(
+                    models.ActionPlan.user_id.in_(user_ids),
+                    models.ActionPlan.active == True,
+                    models.DailyTask.day_number == models.ActionPlan.current_day,
+                    models.DailyTask.completed.isnot(True)
+                )
+                .order_by(models.ActionPlan.user_id, models.DailyTask.id)
+            )
+            for user_id, title, description in result.all():
+                if len(tasks[user_id]) < MAX_TASKS:
+                    tasks[user_id].append(title or (description or "")[:120])
+
+            result = await db.execute(
+                select(models.LeetCodeProblem.user_id, models.LeetCodeProblem.title, models.LeetCodeProblem.difficulty)
+                .filter(
+                    models.LeetCodeProblem.user_id.in_(user_ids),
+                    models.LeetCodeProblem.next_review <= datetime.utcnow()
+                )
+                .order_by(models.LeetCodeProblem.user_id, models.LeetCodeProblem.next_review)
+            )
+            for user_id, title, difficulty in result.all():
+                if len(problems[user_id]) < MAX_PROBLEMS:
+                    problems[user_id].append({"title": title, "difficulty": difficulty})
+        self.counters["queries"] += 2
+        return tasks, problems
+
+    def _digest(self, user: Row, tasks: List[str], problems: List[Dict]) -> Dict:
+        self.counters["users"] += 1
+        return {
+            "streak": user.current_streak or 0,
+            "pending_tasks": tasks,
+            "due_problems": problems,
+            "quote": self.quote
+        }
+
+    async def pop(self, user: Row) -> Dict:
+        """The user's stats, loaded on their own if their batch's database failed"""
+        stats = self._stats.pop(user.id, None)
+        if stats is None:
+            self.counters["fallbacks"] += 1
+            await self.load([user])
+            stats = self._stats.pop(user.id, None)
+            if stats is None:
+                raise RuntimeError("Digest stats could not be loaded")
+        return stats
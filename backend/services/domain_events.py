@@ -0,0 +1,112 @@
+"""In-process domain events for the notification rules.
+
+Endpoints ``emit`` what changed (a check-in was created, a commitment was
+reviewed, the streak moved) once it is committed, and return straight away.
+Handlers registered with ``@domain_events.on(event_type)`` run on background
+tasks, so a slow rule never delays the response and a failing one is only
+logged. Events live in memory only: whatever has to survive a restart, such as
+a reminder for tonight, is scheduled on the timer wheel (``services.timer_wheel``),
+which is persisted.
+"""
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+# Events waiting for a handler; beyond this the oldest are dropped
+MAX_PENDING_EVENTS = 10000
+
+
+@dataclass
+class DomainEvent:
+    type: str
+    user_id: int
+    github_username: str
+    database_url: Optional[str]
+    data: Dict[str, Any]
+    at: datetime = field(default_factory=datetime.utcnow)
+
+
+EventHandler = Callable[[DomainEvent], Awaitable[None]]
+
+
+class DomainEvents:
+    def __init__(self, concurrency: int = 4):
+        self.concurrency = concurrency
+        self.handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running: Set[asyncio.Task] = set()
+        self._stats = {"emitted": 0, "handled": 0, "failed": 0, "dropped": 0}
+
+    def on(self, event_type: str):
+        """Register ``func(event)`` for an event type"""
+        def decorator(func: EventHandler) -> EventHandler:
+            self.handlers[event_type].append(func)
+            return func
+        return decorator
+
+    def emit(self, event_type: str, user, **data):
+        """Queue an event about ``user`` (a ``User`` or user row) for its handlers"""
+        if not self.handlers.get(event_type):
+            return
+        try:
+            self._ensure_worker()
+        except RuntimeError:
+            print(f"⚠️ [Events] No event loop, dropping {event_type}")
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._stats["dropped"] += 1
+        self._queue.put_nowait(DomainEvent(event_type, user.id, user.github_username, user.neon_db_url, data))
+        self._stats["emitted"] += 1
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (tests, scripts)
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+            self._worker = None
+            self._running = set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            event = await self._queue.get()
+            for handler in self.handlers.get(event.type, ()):
+                await slots.acquire()
+                task = asyncio.create_task(self._handle(handler, event))
+                self._running.add(task)
+                task.add_done_callback(lambda t: (self._running.discard(t), slots.release()))
+
+    async def _handle(self, handler: EventHandler, event: DomainEvent):
+        try:
+            await handler(event)
+            self._stats["handled"] += 1
+        except Exception as e:
+            self._stats["failed"] += 1
+            print(f"❌ [Events] {handler.__name__} failed on {event.type} for {event.github_username}: {e}")
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._running),
+            "event_types": sorted(self.handlers),
+        }
+
+
+domain_events = DomainEvents()
@@ -1,144 +1,278 @@
+"""Email delivery through Resend on one pooled connection.
+
+``send_email`` puts the message on a queue and waits for its outcome. A
+sender task drains the queue in batches of up to ``EMAIL_BATCH_SIZE`` (Resend
+takes at most 100 per call), waiting ``EMAIL_BATCH_LINGER_MS`` for a batch to
+fill, and posts them to ``/emails/batch`` over a long-lived HTTP/2 client. A
+fan-out of 5,000 digests is then about 50 requests on a warm connection
+instead of 5,000 handshakes.
+
+- Rate limit: requests take from a token bucket of
+  ``RESEND_REQUESTS_PER_SECOND`` (2 by default on Resend); a 429 empties it
+  for ``retry-after``.
+- Retries: 429s, 5xx and connection errors are retried with jittered
+  exponential backoff, up to ``EMAIL_MAX_RETRIES`` times. All attempts of a
+  request carry the same ``Idempotency-Key``, so retrying a timed-out request
+  that Resend had accepted does not send its emails twice. A batch rejected
+  as invalid is sent again one message at a time, so one bad address does
+  not fail the other 99.
+- Content: the ``send_*`` helpers render ``email_templates`` and send both
+  the HTML and the plain-text part.
+- Metrics: ``stats`` reports sent and failed messages, requests, batch sizes,
+  retries and queue-to-delivery latency.
+"""
+import asyncio
 import os
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Deque, Dict, List, Optional
+
 import httpx
-from typing import List, Optional
-from datetime import datetime
+
+from config import settings
+from . import email_templates
+from .email_templates import RenderedEmail
+from .groq_client import TokenBucket
+from .job_queue import _percentile
+
+# Latencies kept for the percentiles in ``stats``
+LATENCY_SAMPLE = 1000
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class OutgoingEmail:
+    payload: Dict
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+
 
 class EmailService:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = None,
+        requests_per_second: float = None,
+        batch_size: int = None,
+        linger_ms: int = None,
+        max_retries: int = None,
+        concurrency: int = 2,
+        http2: bool = None
+    ):
         self.api_key = api_key or os.getenv("RESEND_API_KEY")
-        self.api_url = "https://api.resend.com/emails"
-        self.sender = "Sage <onboarding@resend.dev>" # Default Resend sender, user should configure this
+        self.base_url = (base_url or settings.RESEND_API_BASE).rstrip("/")
+        self.sender = settings.RESEND_FROM_EMAIL # Default Resend sender, user should configure this
+        self.batch_size = min(100, batch_size or settings.EMAIL_BATCH_SIZE)
+        self.linger = (linger_ms if linger_ms is not None else settings.EMAIL_BATCH_LINGER_MS) / 1000
+        self.max_retries = max_retries if max_retries is not None else settings.EMAIL_MAX_RETRIES
+        self.concurrency = concurrency
+        self.http2 = settings.EMAIL_HTTP2 if http2 is None else http2
+        self.requests_per_second = requests_per_second or settings.RESEND_REQUESTS_PER_SECOND
+        # Evenly spaced requests: Resend counts them in a sliding window, so bursts get 429s
+        self.bucket = TokenBucket(1, period=1 / self.requests_per_second)
 
-    async def send_email(self, to: str, subject: str, html_content: str):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLE)
+        self._stats = {
+            "queued": 0, "sent": 0, "failed": 0, "requests": 0, "batches": 0, "batched": 0,
+            "retries": 0, "rate_limited": 0, "split_batches": 0
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            http2 = self.http2
+            if http2:
+                try:
+                    import h2 # noqa: F401 (httpx[http2])
+                except ImportError:
+                    print("⚠️ Email Service: h2 is not installed, using HTTP/1.1")
+                    http2 = self.http2 = False
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=http2,
+                timeout=30.0,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+        return self._client
+
+    async def close(self, drain_seconds: float = 10.0):
+        """Deliver what is queued (up to ``drain_seconds``), then stop the sender and close the pool"""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_seconds)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Email Service: {self._queue.qsize()} email(s) still queued at shutdown")
+        if self._sender is not None:
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+            self._sender = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _ensure_sender(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (tests, scripts): nothing from the old one is usable
+            self._loop, self._client = loop, None
+            self._queue = asyncio.Queue()
+            self._sender = None
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send_loop())
+
+    async def send_email(self, to: str, subject: str, html_content: str, text_content: Optional[str] = None):
         if not self.api_key:
             print(f"⚠️ Email Service: No API Key. Would have sent email to {to} with subject '{subject}'")
             return False
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "from": self.sender,
-            "to": [to],
-            "subject": subject,
-            "html": html_content
-        }
+        self._ensure_sender()
+        message = OutgoingEmail(
+            payload={
+                "from": self.sender,
+                "to": [to],
+                "subject": subject,
+                "html": html_content,
+                **({"text": text_content} if text_content else {})
+            },
+            future=asyncio.get_running_loop().create_future()
+        )
+        self._stats["queued"] += 1
+        await self._queue.put(message)
+        sent = await asyncio.shield(message.future)
+        if sent:
+            print(f"✅ Email sent to {to}")
+        return sent
+
+    # --- Sender ---
+
+    async def _next_batch(self) -> List[OutgoingEmail]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _send_loop(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            batch = await self._next_batch()
+            await slots.acquire()
+            task = asyncio.create_task(self._deliver(batch))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _wait_for_budget(self):
+        while True:
+            wait = self.bucket.try_take(1)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        delay = random.uniform(0, min(30.0, 0.5 * (2 ** attempt)))
+        return max(delay, retry_after) if retry_after else delay
 
-        async with httpx.AsyncClient() as client:
+    async def _post(self, path: str, payload, idempotency_key: str) -> Optional[httpx.Response]:
+        """POST with rate limiting and retries; None when every attempt failed"""
+        headers = {"Idempotency-Key": idempotency_key}
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_budget()
+            self._stats["requests"] += 1
+            retry_after = None
             try:
-                response = await client.post(self.api_url, json=payload, headers=headers)
-                response.raise_for_status()
-                print(f"✅ Email sent to {to}")
-                return True
-            except Exception as e:
-                print(f"❌ Failed to send email: {e}")
-                return False
+                response = await self.client.post(path, json=payload, headers=headers)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+                error = f"HTTP {response.status_code}"
+                if response.status_code == 429:
+                    self._stats["rate_limited"] += 1
+                    try:
+                        retry_after = float(response.headers.get("retry-after", 1))
+                    except ValueError:
+                        retry_after = 1.0
+                    self.bucket.sync(remaining=0, reset=retry_after)
+            if attempt >= self.max_retries:
+                print(f"❌ Failed to send email after {attempt + 1} attempts: {error}")
+                return None
+            self._stats["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    def _settle(self, messages: List[OutgoingEmail], sent: bool):
+        now = time.monotonic()
+        for message in messages:
+            if not message.future.done():
+                message.future.set_result(sent)
+            self._latencies.append(now - message.queued_at)
+            self._stats["sent" if sent else "failed"] += 1
+            self._queue.task_done()
+
+    async def _deliver(self, batch: List[OutgoingEmail]):
+        try:
+            self._stats["batches"] += 1
+            self._stats["batched"] += len(batch)
+            key = uuid.uuid4().hex
+            if len(batch) == 1:
+                response = await self._post("/emails", batch[0].payload, key)
+            else:
+                response = await self._post("/emails/batch", [message.payload for message in batch], key)
+            if response is not None and response.is_success:
+                self._settle(batch, True)
+            elif response is not None and len(batch) > 1 and response.status_code in (400, 422):
+                # One invalid message rejects the whole batch: find it by sending one by one
+                self._stats["split_batches"] += 1
+                for i, message in enumerate(batch):
+                    single = await self._post("/emails", message.payload, f"{key}-{i}")
+                    self._settle([message], single is not None and single.is_success)
+            else:
+                if response is not None:
+                    print(f"❌ Failed to send email: HTTP {response.status_code} {response.text[:200]}")
+                self._settle(batch, False)
+        except Exception as e:
+            print(f"❌ Failed to send email: {e}")
+            self._settle([message for message in batch if not message.future.done()], False)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_size": round(self._stats["batched"] / self._stats["batches"], 1) if self._stats["batches"] else None,
+            "latency_p50": _percentile(list(self._latencies), 50),
+            "latency_p95": _percentile(list(self._latencies), 95),
+            "http2": self.http2,
+            "requests_per_second": self.requests_per_second,
+        }
+
+    async def send_rendered(self, to: str, email: RenderedEmail):
+        return await self.send_email(to, email.subject, email.html, email.text)
 
     async def send_welcome_email(self, user_email: str, username: str):
-        subject = "Welcome to Reflog 2.0! 🚀"
-        html = f"""
-        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
-            <h1 style="color: #933DC9;">Welcome, {username}!</h1>
-            <p>We're excited to have you on board. Reflog is your companion for growth, accountability, and mastery.</p>
-            <p>Here's what you can do next:</p>
-            <ul>
-                <li>Set your first <strong>Goal</strong></li>
-                <li>Create a <strong>30-Day Action Plan</strong></li>
-                <li>Log a <strong>Life Decision</strong></li>
-            </ul>
-            <p>Let's grow together!</p>
-            <p>- The Sage Team</p>
-        </div>
-        """
-        return await self.send_email(user_email, subject, html)
-
-    async def send_daily_digest(self, user_email: str, username: str, stats: dict):
-        subject = f"Your Daily Briefing - {datetime.now().strftime('%b %d')}"
-        
-        tasks_html = ""
-        for task in stats.get('pending_tasks', []):
-            tasks_html += f"<li>{task}</li>"
-            
-        html = f"""
-        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
-            <h2 style="color: #933DC9;">Good Morning, {username}! ☀️</h2>
-            <p>Here is your focus for today:</p>
-            
-            <h3>🎯 Today's Tasks</h3>
-            <ul>
-                {tasks_html if tasks_html else "<li>No specific tasks scheduled. Time to plan?</li>"}
-            </ul>
-            
-            <p><strong>Current Streak:</strong> {stats.get('streak', 0)} days 🔥</p>
-            
-            <div style="margin-top: 20px; padding: 15px; background-color: #f5f5f5; border-radius: 8px;">
-                <strong>💡 Daily Wisdom:</strong><br>
-                <em>"{stats.get('quote', 'Consistency is key.')}"</em>
-            </div>
-        </div>
-        """
-        return await self.send_email(user_email, subject, html)
-
-    async def send_weekly_review(self, user_email: str, username: str, report: dict):
-        subject = f"Weekly Review - {datetime.now().strftime('%b %d')}"
-        
-        goals_html = ""
-        for goal in report.get('completed_goals', []):
-            goals_html += f"<li>✅ {goal}</li>"
-            
-        html = f"""
-        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
-            <h1 style="color: #933DC9;">Weekly Review 📊</h1>
-            <p>Great job this week, {username}!</p>
-            
-            <div style="display: flex; justify-content: space-between; background-color: #f5f5f5; padding: 15px; border-radius: 8px; margin-bottom: 20px;">
-                <div style="text-align: center;">
-                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{report.get('week_score', 0)}</div>
-                    <div style="font-size: 12px; color: #666;">Week Score</div>
-                </div>
-                <div style="text-align: center;">
-                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{report.get('focus_hours', 0)}h</div>
-                    <div style="font-size: 12px; color: #666;">Focus Time</div>
-                </div>
-                <div style="text-align: center;">
-                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{len(report.get('completed_goals', []))}</div>
-                    <div style="font-size: 12px; color: #666;">Goals Hit</div>
-                </div>
-            </div>
-            
-            <h3>🏆 Achievements</h3>
-            <ul>
-                {goals_html if goals_html else "<li>Keep pushing! Set some goals for next week.</li>"}
-            </ul>
-            
-            <h3>💡 Sage's Insights</h3>
-            <div style="background-color: #f9f9f9; padding: 15px; border-left: 4px solid #933DC9; font-style: italic;">
-                {report.get('review_text', 'Keep up the consistency!')}
-            </div>
-            
-            <p>Ready for next week? <a href="http://localhost:3000/dashboard" style="color: #933DC9;">Plan your week now</a>.</p>
-        </div>
-        """
-        return await self.send_email(user_email, subject, html)
+        return await self.send_rendered(user_email, email_templates.render_welcome(username))
+
+    async def send_daily_digest(self, user_email: str, username: str, stats: dict, today: date = None):
+        return await self.send_rendered(user_email, email_templates.render_daily_digest(username, stats, today))
+
+    async def send_weekly_review(self, user_email: str, username: str, report: dict, today: date = None):
+        return await self.send_rendered(user_email, email_templates.render_weekly_review(username, report, today))
 
     async def send_nudge_email(self, user_email: str, username: str, days_inactive: int):
-        subject = f"We miss you, {username}! 👋"
-        
-        html = f"""
-        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
-            <h2 style="color: #933DC9;">Hey {username},</h2>
-            <p>We noticed you haven't checked in for <strong>{days_inactive} days</strong>.</p>
-            
-            <p>Consistency is the key to mastery. It's not about being perfect, it's about showing up.</p>
-            
-            <div style="margin: 30px 0; text-align: center;">
-                <a href="http://localhost:3000/dashboard" style="background-color: #933DC9; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold;">Resume Your Streak</a>
-            </div>
-            
-            <p><em>"The only bad workout is the one that didn't happen."</em></p>
-            <p>- The Sage Team</p>
-        </div>
-        """
-        return await self.send_email(user_email, subject, html)
+        return await self.send_rendered(user_email, email_templates.render_nudge(username, days_inactive))
@@ -0,0 +1,208 @@
+"""Email bodies with an HTML and a plain-text part.
+
+Each ``render_*`` function builds the subject, the HTML and the text of one
+email with f-strings and returns them as a ``RenderedEmail``. Values that come
+from users or the crews (usernames, task and goal titles, the review text)
+are HTML-escaped in the HTML part with ``_e``; the subject and the text part
+are plain text and are not escaped.
+"""
+from dataclasses import dataclass
+from datetime import date
+from html import escape as _e
+from typing import Dict, Iterable
+
+DASHBOARD_URL = "http://localhost:3000/dashboard"
+
+
+@dataclass
+class RenderedEmail:
+    subject: str
+    html: str
+    text: str
+
+
+def _html_list(values: Iterable, empty: str, prefix: str = "") -> str:
+    return "".join(f"<li>{prefix}{_e(str(value))}</li>" for value in values) or f"<li>{empty}</li>"
+
+
+def _text_list(values: Iterable, empty: str) -> str:
+    return "\n".join(f"- {value}" for value in values) or empty
+
+
+def _date_label(day: date) -> str:
+    return day.strftime('%b %d')
+
+
+def render_welcome(username: str) -> RenderedEmail:
+    name = _e(username)
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h1 style="color: #933DC9;">Welcome, {name}!</h1>
+            <p>We're excited to have you on board. Reflog is your companion for growth, accountability, and mastery.</p>
+            <p>Here's what you can do next:</p>
+            <ul>
+                <li>Set your first <strong>Goal</strong></li>
+                <li>Create a <strong>30-Day Action Plan</strong></li>
+                <li>Log a <strong>Life Decision</strong></li>
+            </ul>
+            <p>Let's grow together!</p>
+            <p>- The Sage Team</p>
+        </div>
+        """
+    text = f"""Welcome, {username}!
+
+We're excited to have you on board. Reflog is your companion for growth, accountability, and mastery.
+
+Here's what you can do next:
+- Set your first Goal
+- Create a 30-Day Action Plan
+- Log a Life Decision
+
+Let's grow together!
+- The Sage Team
+"""
+    return RenderedEmail("Welcome to Reflog 2.0! 🚀", html, text)
+
+
+def render_daily_digest(username: str, stats: Dict, today: date = None) -> RenderedEmail:
+    """``stats``: streak, pending_tasks (titles), due_problems (title and difficulty) and quote"""
+    tasks = stats.get('pending_tasks', [])
+    problems = stats.get('due_problems', [])
+    streak = stats.get('streak', 0)
+    quote = stats.get('quote', 'Consistency is key.')
+    empty = "No specific tasks scheduled. Time to plan?"
+
+    # Only shown when problems are due, so the digest reads as before otherwise
+    problems_html = problems_text = ""
+    if problems:
+        items = "".join(
+            f'<li>{_e(str(p["title"]))} <span style="color: #666;">({_e(str(p["difficulty"]))})</span></li>' for p in problems
+        )
+        problems_html = f"""
+
+            <h3>🧩 Due for Review</h3>
+            <ul>
+                {items}
+            </ul>"""
+        problems_text = "\n\nDue for Review\n" + _text_list((f"{p['title']} ({p['difficulty']})" for p in problems), "")
+
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h2 style="color: #933DC9;">Good Morning, {_e(username)}! ☀️</h2>
+            <p>Here is your focus for today:</p>
+
+            <h3>🎯 Today's Tasks</h3>
+            <ul>
+                {_html_list(tasks, empty)}
+            </ul>{problems_html}
+
+            <p><strong>Current Streak:</strong> {_e(str(streak))} days 🔥</p>
+
+            <div style="margin-top: 20px; padding: 15px; background-color: #f5f5f5; border-radius: 8px;">
+                <strong>💡 Daily Wisdom:</strong><br>
+                <em>"{_e(str(quote))}"</em>
+            </div>
+        </div>
+        """
+    text = f"""Good Morning, {username}!
+
+Here is your focus for today:
+
+Today's Tasks
+{_text_list(tasks, f"- {empty}")}{problems_text}
+
+Current Streak: {streak} days
+
+Daily Wisdom: "{quote}"
+"""
+    return RenderedEmail(f"Your Daily Briefing - {_date_label(today or date.today())}", html, text)
+
+
+def render_weekly_review(username: str, report: Dict, today: date = None) -> RenderedEmail:
+    goals = report.get('completed_goals', [])
+    week_score = report.get('week_score', 0)
+    focus_hours = report.get('focus_hours', 0)
+    review_text = report.get('review_text', 'Keep up the consistency!')
+    empty = "Keep pushing! Set some goals for next week."
+
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h1 style="color: #933DC9;">Weekly Review 📊</h1>
+            <p>Great job this week, {_e(username)}!</p>
+
+            <div style="display: flex; justify-content: space-between; background-color: #f5f5f5; padding: 15px; border-radius: 8px; margin-bottom: 20px;">
+                <div style="text-align: center;">
+                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{_e(str(week_score))}</div>
+                    <div style="font-size: 12px; color: #666;">Week Score</div>
+                </div>
+                <div style="text-align: center;">
+                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{_e(str(focus_hours))}h</div>
+                    <div style="font-size: 12px; color: #666;">Focus Time</div>
+                </div>
+                <div style="text-align: center;">
+                    <div style="font-size: 24px; font-weight: bold; color: #933DC9;">{len(goals)}</div>
+                    <div style="font-size: 12px; color: #666;">Goals Hit</div>
+                </div>
+            </div>
+
+            <h3>🏆 Achievements</h3>
+            <ul>
+                {_html_list(goals, empty, prefix="✅ ")}
+            </ul>
+
+            <h3>💡 Sage's Insights</h3>
+            <div style="background-color: #f9f9f9; padding: 15px; border-left: 4px solid #933DC9; font-style: italic;">
+                {_e(str(review_text))}
+            </div>
+
+            <p>Ready for next week? <a href="{DASHBOARD_URL}" style="color: #933DC9;">Plan your week now</a>.</p>
+        </div>
+        """
+    text = f"""Weekly Review
+
+Great job this week, {username}!
+
+Week Score: {week_score}
+Focus Time: {focus_hours}h
+Goals Hit: {len(goals)}
+
+Achievements
+{_text_list((f"✓ {goal}" for goal in goals), f"- {empty}")}
+
+Sage's Insights
+{review_text}
+
+Ready for next week? Plan your week now: {DASHBOARD_URL}
+"""
+    return RenderedEmail(f"Weekly Review - {_date_label(today or date.today())}", html, text)
+
+
+def render_nudge(username: str, days_inactive: int) -> RenderedEmail:
+    name = _e(username)
+    html = f"""
+        <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+            <h2 style="color: #933DC9;">Hey {name},</h2>
+            <p>We noticed you haven't checked in for <strong>{_e(str(days_inactive))} days</strong>.</p>
+
+            <p>Consistency is the key to mastery. It's not about being perfect, it's about showing up.</p>
+
+            <div style="margin: 30px 0; text-align: center;">
+                <a href="{DASHBOARD_URL}" style="background-color: #933DC9; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold;">Resume Your Streak</a>
+            </div>
+
+            <p><em>"The only bad workout is the one that didn't happen."</em></p>
+            <p>- The Sage Team</p>
+        </div>
+        """
+    text = f"""Hey {username},
+
+We noticed you haven't checked in for {days_inactive} days.
+
+Consistency is the key to mastery. It's not about being perfect, it's about showing up.
+
+Resume your streak: {DASHBOARD_URL}
+
+"The only bad workout is the one that didn't happen."
+- The Sage Team
+"""
+    return RenderedEmail(f"We miss you, {username}! 👋", html, text)
@@ -0,0 +1,62 @@
+"""Per-user server-sent events.
+
+Background jobs publish results here; every open ``/events/{github_username}``
+stream for that user receives them. Subscribers that fall behind drop their
+oldest events instead of blocking the publisher.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Set
+
+HEARTBEAT_SECONDS = 15
+MAX_PENDING_EVENTS = 100
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, github_username: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        self._subscribers[github_username].add(queue)
+        return queue
+
+    def unsubscribe(self, github_username: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(github_username)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[github_username]
+
+    def publish(self, github_username: str, event_type: str, data: Dict[str, Any]):
+        event = {"type": event_type, "data": data, "timestamp": datetime.utcnow().isoformat()}
+        for queue in list(self._subscribers.get(github_username, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def subscriber_count(self, github_username: str = None) -> int:
+        if github_username is not None:
+            return len(self._subscribers.get(github_username, ()))
+        return sum(len(s) for s in self._subscribers.values())
+
+    async def stream(self, github_username: str) -> AsyncIterator[str]:
+        """SSE-formatted events for one user, with heartbeats to keep proxies from closing the connection"""
+        queue = self.subscribe(github_username)
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            self.unsubscribe(github_username, queue)
+
+
+event_broker = EventBroker()
@@ -0,0 +1,267 @@
+"""Bounded-concurrency fan-out of a per-user job over all tenants.
+
+Scheduled email jobs call ``fan_out`` with batches of users to process
+(``user_stream.stream_users``) and a coroutine ``handler(user, ctx)`` per user,
+instead of looping over users one at a time:
+
+- Concurrency: ``FANOUT_CONCURRENCY`` users in flight per job (and only a few
+  more read ahead, so memory does not grow with the user count), at most
+  ``FANOUT_TENANT_DB_CONCURRENCY`` per tenant database server, so tenants
+  sharing a Neon host are not flooded with connections.
+- LLM cap: handlers hold ``ctx.llm`` around crew runs. The slots are shared by
+  every fan-out in the process, and the Groq client's own rate limiter still
+  applies underneath.
+- Checkpoints: each user's outcome is written to ``FanOutCheckpoint`` under
+  the run's key (the day or ISO week it covers). Running the job again for the
+  same key, after a crash or on catch-up, skips the users that succeeded and
+  retries the ones that failed. ``pending_filter`` leaves the finished users
+  out of the user query itself, for jobs that run the same key repeatedly.
+- Report: progress with throughput and ETA while running, and a summary
+  (users per minute, per-user p50/p95, whether the deadline was met) at the
+  end; ``progress`` reads the same figures from the checkpoints.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterable, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import Row, select, func, or_
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from config import settings
+from database import SystemSessionLocal
+from .job_queue import _percentile
+
+# Progress is printed every this many users (and at least every PROGRESS_SECONDS)
+PROGRESS_EVERY = 100
+PROGRESS_SECONDS = 60
+# Users started ahead of free slots, as a multiple of the concurrency
+LAUNCH_AHEAD = 2
+# Per-user durations kept for the report's percentiles
+DURATION_SAMPLE = 1000
+
+# Crews running at once across every fan-out in this process
+llm_slots = asyncio.Semaphore(settings.FANOUT_LLM_CONCURRENCY)
+
+
+@dataclass
+class FanOutContext:
+    job_name: str
+    run_key: str
+    llm: asyncio.Semaphore # Hold while an LLM crew runs
+
+
+# Called with a user row from ``user_stream`` (id, github_username, email, ...)
+Handler = Callable[[Row, FanOutContext], Awaitable[Any]]
+
+
+def _tenant_key(database_url: Optional[str]) -> Optional[str]:
+    """Database server of a tenant; users on the same host share its slots"""
+    if not database_url:
+        return None
+    try:
+        url = make_url(database_url)
+        if not url.host:
+            return database_url
+        return f"{url.host}:{url.port}" if url.port else url.host
+    except Exception:
+        return database_url
+
+
+async def _succeeded_users(job_name: str, run_key: str, user_ids: List[int]) -> Set[int]:
+    async with SystemSessionLocal() as db:
+        result = await db.execute(
+            select(models.FanOutCheckpoint.user_id).filter(
+                models.FanOutCheckpoint.job_name == job_name,
+                models.FanOutCheckpoint.run_key == run_key,
+                models.FanOutCheckpoint.status == "succeeded",
+                models.FanOutCheckpoint.user_id.in_(user_ids)
+            )
+        )
+        return set(result.scalars().all())
+
+
+def pending_filter(job_name: str, run_key: str, max_attempts: int = None):
+    """Filter on ``models.User``: users not done under ``run_key`` (succeeded, or failed ``max_attempts`` times)"""
+    done = models.FanOutCheckpoint.status == "succeeded"
+    if max_attempts:
+        done = or_(done, models.FanOutCheckpoint.attempts >= max_attempts)
+    return ~select(models.FanOutCheckpoint.id).where(
+        models.FanOutCheckpoint.job_name == job_name,
+        models.FanOutCheckpoint.run_key == run_key,
+        models.FanOutCheckpoint.user_id == models.User.id,
+        done
+    ).exists()
+
+
+async def _checkpoint(job_name: str, run_key: str, user_id: int, status: str, duration: float, error: Optional[str]):
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(models.FanOutCheckpoint).filter(
+            models.FanOutCheckpoint.job_name == job_name,
+            models.FanOutCheckpoint.run_key == run_key,
+            models.FanOutCheckpoint.user_id == user_id
+        ))
+        row = result.scalars().first()
+        if row is None:
+            row = models.FanOutCheckpoint(job_name=job_name, run_key=run_key, user_id=user_id, attempts=0)
+            db.add(row)
+        row.status = status
+        row.attempts = (row.attempts or 0) + 1
+        row.duration_seconds = round(duration, 3)
+        row.error = error
+        row.finished_at = datetime.utcnow()
+        await db.commit()
+
+
+def _eta(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h{rest // 60:02d}m" if hours else f"{rest // 60}m{rest % 60:02d}s"
+
+
+async def fan_out(
+    job_name: str,
+    run_key: str,
+    batches: AsyncIterable[List[Row]],
+    handler: Handler,
+    total: int = None,
+    concurrency: int = None,
+    tenant_concurrency: int = None,
+    deadline: datetime = None
+) -> Dict[str, Any]:
+    """Run ``handler`` for every user not yet done under ``run_key``; returns the report
+
+    ``batches`` yields user rows (``user_stream.stream_users``); ``total``, the
+    number of users it will yield, is only used for the ETA.
+    """
+    concurrency = concurrency or settings.FANOUT_CONCURRENCY
+    ctx = FanOutContext(job_name, run_key, llm_slots)
+    slots = asyncio.Semaphore(concurrency)
+    # Users read ahead of the running ones; bounds the tasks alive at once
+    launch = asyncio.Semaphore(concurrency * LAUNCH_AHEAD)
+    tenant_limit = tenant_concurrency or settings.FANOUT_TENANT_DB_CONCURRENCY
+    tenants: Dict[str, asyncio.Semaphore] = {}
+    tasks: Set[asyncio.Task] = set()
+    durations: Deque[float] = deque(maxlen=DURATION_SAMPLE)
+    counts = {"users": 0, "already_done": 0, "succeeded": 0, "failed": 0}
+    started = time.perf_counter()
+    last_progress = started
+    warned_deadline = False
+    print(f"🚀 [FanOut] {job_name} {run_key}: {total if total is not None else 'all'} user(s)")
+
+    def report_progress():
+        nonlocal last_progress, warned_deadline
+        finished = counts["succeeded"] + counts["failed"]
+        now = time.perf_counter()
+        if finished % PROGRESS_EVERY and now - last_progress < PROGRESS_SECONDS:
+            return
+        last_progress = now
+        rate = finished / (now - started) if now > started else 0.0
+        left = max(0, (total or counts["users"]) - counts["already_done"] - finished)
+        remaining = left / rate if rate else 0.0
+        print(
+            f"⏳ [FanOut] {job_name} {run_key}: {finished} done, {left} left "
+            f"({rate * 60:.1f} users/min, ~{_eta(remaining)}, {counts['failed']} failed)"
+        )
+        if deadline and not warned_deadline and datetime.utcnow() + timedelta(seconds=remaining) > deadline:
+            warned_deadline = True
+            print(f"⚠️ [FanOut] {job_name} {run_key} is on course to finish after {deadline:%Y-%m-%d %H:%M} UTC")
+
+    async def run_one(user: Row):
+        key = _tenant_key(user.neon_db_url)
+        tenant = tenants.setdefault(key, asyncio.Semaphore(tenant_limit)) if key else nullcontext()
+        # Wait for the tenant first so a busy server does not hold a global slot
+        async with tenant, slots:
+            user_started = time.perf_counter()
+            status, error = "succeeded", None
+            try:
+                await handler(user, ctx)
+            except Exception as e:
+                status, error = "failed", str(e)[:2000]
+                print(f"❌ [FanOut] {job_name} failed for {user.github_username}: {e}")
+            duration = time.perf_counter() - user_started
+            try:
+                await _checkpoint(job_name, run_key, user.id, status, duration, error)
+            except Exception as e:
+                print(f"⚠️ [FanOut] Could not checkpoint {job_name} for {user.github_username}: {e}")
+        durations.append(duration)
+        counts[status] += 1
+        report_progress()
+
+    def finished(task: asyncio.Task):
+        tasks.discard(task)
+        launch.release()
+
+    async for batch in batches:
+        counts["users"] += len(batch)
+        done = await _succeeded_users(job_name, run_key, [user.id for user in batch])
+        counts["already_done"] += len(done)
+        for user in batch:
+            if user.id in done:
+                continue
+            await launch.acquire()
+            task = asyncio.create_task(run_one(user))
+            tasks.add(task)
+            task.add_done_callback(finished)
+    await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    processed = counts["succeeded"] + counts["failed"]
+    report = {
+        "job": job_name,
+        "run_key": run_key,
+        **counts,
+        "processed": processed,
+        "seconds": round(elapsed, 1),
+        "users_per_minute": round(processed / elapsed * 60, 1) if elapsed and processed else None,
+        "per_user_p50": _percentile(list(durations), 50),
+        "per_user_p95": _percentile(list(durations), 95),
+        "deadline_met": datetime.utcnow() <= deadline if deadline else None,
+    }
+    resumed = f", {counts['already_done']} already done" if counts["already_done"] else ""
+    print(
+        f"📊 [FanOut] {job_name} {run_key}: {counts['succeeded']}/{processed} succeeded{resumed}, "
+        f"{counts['failed']} failed in {_eta(elapsed)} ({report['users_per_minute'] or 0} users/min, "
+        f"p95 {report['per_user_p95'] or 0}s per user)"
+    )
+    return report
+
+
+async def progress(db: AsyncSession, days: int = 8) -> List[Dict[str, Any]]:
+    """Outcome and throughput of recent fan-out runs, from the checkpoints"""
+    result = await db.execute(
+        select(
+            models.FanOutCheckpoint.job_name,
+            models.FanOutCheckpoint.run_key,
+            models.FanOutCheckpoint.status,
+            func.count(models.FanOutCheckpoint.id),
+            func.min(models.FanOutCheckpoint.finished_at),
+            func.max(models.FanOutCheckpoint.finished_at),
+            func.avg(models.FanOutCheckpoint.duration_seconds)
+        )
+        .filter(models.FanOutCheckpoint.finished_at >= datetime.utcnow() - timedelta(days=days))
+        .group_by(models.FanOutCheckpoint.job_name, models.FanOutCheckpoint.run_key, models.FanOutCheckpoint.status)
+    )
+    runs: Dict[tuple, Dict[str, Any]] = {}
+    for job_name, run_key, status, count, first, last, avg_duration in result.all():
+        run = runs.setdefault((job_name, run_key), {
+            "job": job_name, "run_key": run_key, "succeeded": 0, "failed": 0,
+            "first_finished_at": first, "last_finished_at": last, "avg_user_seconds": None
+        })
+        run[status] = count
+        run["first_finished_at"] = min(run["first_finished_at"], first)
+        run["last_finished_at"] = max(run["last_finished_at"], last)
+        if status == "succeeded" and avg_duration is not None:
+            run["avg_user_seconds"] = round(float(avg_duration), 2)
+
+    report = []
+    for run in runs.values():
+        span = (run["last_finished_at"] - run["first_finished_at"]).total_seconds()
+        total = run["succeeded"] + run["failed"]
+        run["users_per_minute"] = round(total / span * 60, 1) if span > 0 else None
+        report.append(run)
+    return sorted(report, key=lambda r: r["last_finished_at"], reverse=True)
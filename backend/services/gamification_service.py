@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import models
 from datetime import datetime
+from .domain_events import domain_events
 
 class GamificationService:
     async def award_xp(self, db: AsyncSession, user_id: int, amount: int, reason: str):
@@ -48,4 +49,5 @@ class GamificationService:
         user.last_activity_date = datetime.utcnow()
         await db.commit()
         await db.refresh(user)
+        domain_events.emit("streak.changed", user, current_streak=user.current_streak, best_streak=user.best_streak)
         return user
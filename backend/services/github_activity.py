@@ -0,0 +1,96 @@
+"""Recent GitHub activity from the events API, several windows per scan.
+
+``activity_windows`` reads ``/users/{login}/events`` 100 events per page,
+newest first, and stops at the first event older than the longest requested
+window, so the 1, 7 and 30 day views share one scan of at most 3 pages.
+
+Every page is kept with its ``ETag`` (and whether a next page followed it)
+and asked for again with ``If-None-Match``. GitHub answers an unchanged page
+with an empty 304 that does not count against the rate limit, so a dashboard
+or heatmap that polls an idle account spends nothing.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .github_async import AsyncGitHub, count_requests, parse_timestamp
+from .github_integration import MAX_EVENTS, ActivityWindows
+
+PER_PAGE = 100
+
+
+class EventPageCache:
+    """Events pages with their ETag and next-page flag, keyed by token, user and page number"""
+
+    def __init__(self, max_pages: int = 3000):
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[tuple, Tuple[str, List[Dict], bool]]" = OrderedDict()
+        self.not_modified = 0
+
+    def get(self, key: tuple) -> Optional[Tuple[str, List[Dict], bool]]:
+        entry = self._pages.get(key)
+        if entry is not None:
+            self._pages.move_to_end(key)
+        return entry
+
+    def set(self, key: tuple, etag: str, events: List[Dict], has_next: bool):
+        self._pages[key] = (etag, events, has_next)
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def clear(self):
+        self._pages.clear()
+        self.not_modified = 0
+
+
+event_page_cache = EventPageCache()
+
+
+async def _events_page(client: AsyncGitHub, username: str, page: int) -> Tuple[List[Dict], bool]:
+    """One page of events and whether GitHub has another one"""
+    key = (client.token, username.lower(), page)
+    cached = event_page_cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = await client.request(
+        "GET", f"/users/{username}/events", params={"per_page": PER_PAGE, "page": page}, headers=headers
+    )
+    if response.status_code == 304 and cached:
+        # A 304 need not repeat the Link header; the page and its successor are unchanged
+        event_page_cache.not_modified += 1
+        return cached[1], cached[2]
+    events = response.json()
+    has_next = 'rel="next"' in response.headers.get("link", "")
+    if response.headers.get("etag"):
+        event_page_cache.set(key, response.headers["etag"], events, has_next)
+    return events, has_next
+
+
+async def activity_windows(client: AsyncGitHub, username: str, windows: Iterable[int] = (1, 7, 30)) -> Dict:
+    """Commits per day for each window, e.g. ``result["windows"][7]["histogram"]``
+
+    Raises ``GitHubNotFound`` for unknown users and ``GitHubError`` otherwise.
+    """
+    activity = ActivityWindows(windows)
+    not_modified = event_page_cache.not_modified
+    with count_requests() as tally:
+        for page in range(1, MAX_EVENTS // PER_PAGE + 1):
+            events, has_next = await _events_page(client, username, page)
+            scanning = True
+            for event in events:
+                scanning = activity.add(
+                    parse_timestamp(event["created_at"]),
+                    event["type"],
+                    (event.get("repo") or {}).get("name"),
+                    event.get("payload")
+                )
+                if not scanning:
+                    break
+            if not scanning or not has_next:
+                break
+
+    return {
+        "username": username,
+        **activity.result(),
+        "requests": tally["requests"],
+        "not_modified": event_page_cache.not_modified - not_modified
+    }
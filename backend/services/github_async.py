@@ -0,0 +1,417 @@
+"""Async GitHub REST client.
+
+``GitHubAnalyzer`` walks PyGithub's lazy lists one request at a time and blocks
+the event loop while doing it. ``AsyncGitHub`` shares one pooled
+``httpx.AsyncClient``: list endpoints read the last page number from the
+``Link`` header of page 1 and fetch the remaining pages together, and per-repo
+calls fan out under a semaphore so a 500-repo account never has more than
+``GITHUB_CONCURRENCY`` requests in flight.
+
+In ``graphql`` mode (the default) the repo facts and each default branch's
+commit count come from one GraphQL query per 100 repos, so a 500-repo account
+costs 5 requests instead of ~440. Any GraphQL failure other than "user not
+found" falls back to the REST path, which produces the same dict.
+"""
+import asyncio
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from config import settings
+from .github_integration import commit_count_cache, summarize_repos
+
+
+# Per-operation request counts; gather() copies the context, so child tasks
+# share the same dict
+_tally: ContextVar[Optional[Dict[str, int]]] = ContextVar("github_request_tally", default=None)
+
+
+@contextmanager
+def count_requests():
+    """Count the GitHub requests and GraphQL points spent inside the block"""
+    tally = {"requests": 0, "graphql_cost": 0}
+    token = _tally.set(tally)
+    try:
+        yield tally
+    finally:
+        _tally.reset(token)
+
+
+class GitHubError(Exception):
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GitHubNotFound(GitHubError):
+    pass
+
+
+class GitHubRateLimited(GitHubError):
+    def __init__(self, message: str, status_code: int = None, reset_at: float = None):
+        super().__init__(message, status_code)
+        self.reset_at = reset_at
+
+
+_LAST_PAGE_RE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+def last_page(link_header: Optional[str]) -> int:
+    """Page count from a ``Link`` header (1 when there is no rel="last")"""
+    match = _LAST_PAGE_RE.search(link_header or "")
+    return int(match.group(1)) if match else 1
+
+
+# One page of the analyzer's repo facts; mirrors ``GET /users/{login}/repos``
+# (owned public repos, sorted by name unless asked otherwise) plus the default
+# branch's commit count. Without ``privacy: PUBLIC`` a token of the queried
+# user would also list their private repos, which REST never returns.
+REPOS_QUERY = """
+query($login: String!, $cursor: String, $orderField: RepositoryOrderField = NAME, $direction: OrderDirection = ASC) {
+  rateLimit { cost remaining }
+  user(login: $login) {
+    url
+    repositories(first: 100, after: $cursor, ownerAffiliations: OWNER, privacy: PUBLIC, orderBy: {field: $orderField, direction: $direction}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        isFork
+        diskUsage
+        pushedAt
+        createdAt
+        primaryLanguage { name }
+        defaultBranchRef { target { ... on Commit { history { totalCount } } } }
+      }
+    }
+  }
+}
+"""
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """GitHub ISO-8601 timestamp as naive UTC"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+@dataclass
+class RepoListing:
+    """Repo records (API order) and commit counts for owned, non-empty repos"""
+    profile_url: str
+    total_repos: int
+    records: List[Dict] = field(default_factory=list)
+    commit_counts: Dict[str, int] = field(default_factory=dict)
+    complete: bool = True # False when a listing stopped early at a known repo
+
+
+def repo_record(repo: Dict) -> Dict:
+    """The fields ``summarize_repos`` needs from a REST repo object"""
+    return {
+        "name": repo["name"],
+        "fork": repo["fork"],
+        "pushed_at": parse_timestamp(repo.get("pushed_at")),
+        "created_at": parse_timestamp(repo.get("created_at")),
+        "size": repo.get("size") or 0,
+        "language": repo.get("language")
+    }
+
+
+class AsyncGitHub:
+    def __init__(
+        self,
+        token: str = None,
+        base_url: str = None,
+        concurrency: int = None,
+        timeout: float = 30.0,
+        mode: str = None
+    ):
+        self.token = token or settings.GITHUB_TOKEN
+        self.base_url = (base_url or settings.GITHUB_API_BASE).rstrip("/")
+        self.concurrency = concurrency or settings.GITHUB_CONCURRENCY
+        self.timeout = timeout
+        self.mode = mode or settings.GITHUB_ANALYZER_MODE
+        self.stats = {"requests": 0, "graphql_cost": 0, "graphql_fallbacks": 0}
+        # From the latest x-ratelimit-* headers; reset is a unix timestamp
+        self.rate_limit: Dict[str, Optional[int]] = {"limit": None, "remaining": None, "reset": None}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        client = self.client
+        async with self._semaphore:
+            try:
+                response = await client.request(method, path, **kwargs)
+            except httpx.TransportError as e: # Timeouts, resets, unreachable host
+                raise GitHubError(f"GitHub {method} {path} failed: {type(e).__name__}: {e}") from e
+        self.stats["requests"] += 1
+        if _tally.get() is not None:
+            _tally.get()["requests"] += 1
+        self._update_rate_limit(response.headers)
+        if response.status_code == 404:
+            raise GitHubNotFound(f"Not found: {path}", 404)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            if response.status_code in (403, 429) and self.rate_limit["remaining"] == 0:
+                raise GitHubRateLimited(f"GitHub rate limit exhausted: {message}", response.status_code, self.rate_limit["reset"])
+            raise GitHubError(f"GitHub {response.status_code} on {path}: {message}", response.status_code)
+        return response
+
+    def _update_rate_limit(self, headers: httpx.Headers):
+        for key in ("limit", "remaining", "reset"):
+            value = headers.get(f"x-ratelimit-{key}")
+            if value is not None and value.isdigit():
+                self.rate_limit[key] = int(value)
+
+    async def get_json(self, path: str, params: Dict = None) -> Any:
+        return (await self.request("GET", path, params=params)).json()
+
+    async def paginate(self, path: str, params: Dict = None, per_page: int = 100) -> List[Dict]:
+        """Every item of a list endpoint; pages after the first are fetched concurrently"""
+        params = {**(params or {}), "per_page": per_page}
+        first = await self.request("GET", path, params=params)
+        pages = last_page(first.headers.get("link"))
+        rest = await asyncio.gather(*(
+            self.get_json(path, {**params, "page": page}) for page in range(2, pages + 1)
+        ))
+        items = first.json()
+        for page in rest:
+            items.extend(page)
+        return items
+
+    async def graphql(self, query: str, variables: Dict) -> Dict:
+        body = (await self.request("POST", "/graphql", json={"query": query, "variables": variables})).json()
+        errors = body.get("errors") or []
+        if any(e.get("type") == "NOT_FOUND" for e in errors):
+            raise GitHubNotFound(errors[0].get("message", "Not found"), 404)
+        if errors:
+            raise GitHubError("GraphQL: " + "; ".join(e.get("message", "") for e in errors))
+        data = body["data"]
+        cost = (data.get("rateLimit") or {}).get("cost", 1)
+        self.stats["graphql_cost"] += cost
+        if _tally.get() is not None:
+            _tally.get()["graphql_cost"] += cost
+        return data
+
+    async def count_commits(self, owner: str, repo: str, pushed_at: datetime = None) -> int:
+        """Total commits on the default branch, from one ``per_page=1`` request
+
+        The last page number in the ``Link`` header is the commit count. Counts are
+        cached until the repo's ``pushed_at`` changes.
+        """
+        full_name = f"{owner}/{repo}"
+        cached = commit_count_cache.get(full_name, pushed_at)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.request("GET", f"/repos/{full_name}/commits", params={"per_page": 1})
+            count = last_page(response.headers.get("link")) if response.headers.get("link") else len(response.json())
+        except GitHubError as e:
+            if e.status_code != 409: # 409: empty repository
+                print(f"!!! Warning: Could not fetch commits for repo {repo}: {e}")
+                return 0
+            count = 0
+        commit_count_cache.set(full_name, pushed_at, count)
+        return count
+
+    async def new_commits(
+        self,
+        owner: str,
+        repo: str,
+        known_sha: str = None,
+        since: datetime = None,
+        max_pages: int = 10
+    ) -> Tuple[List[Dict], bool]:
+        """Default-branch commits newer than ``known_sha``, newest first
+
+        Pages are read one at a time and the scan stops at ``known_sha``, so an
+        incremental sync usually costs one request. The flag is False when
+        ``known_sha`` was not found (first sync, or rewritten history); the list
+        then holds everything since ``since``, up to ``max_pages`` pages.
+        Items are ``{"sha", "author", "date"}`` with ``author`` the GitHub login.
+        """
+        params = {"per_page": 100}
+        if since:
+            params["since"] = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+        commits: List[Dict] = []
+        for page in range(1, max_pages + 1):
+            try:
+                response = await self.request("GET", f"/repos/{owner}/{repo}/commits", params={**params, "page": page})
+            except GitHubError as e:
+                if e.status_code == 409: # Empty repository
+                    return commits, False
+                raise
+            for item in response.json():
+                if item["sha"] == known_sha:
+                    return commits, True
+                commits.append({
+                    "sha": item["sha"],
+                    "author": (item.get("author") or {}).get("login"),
+                    "date": parse_timestamp(item["commit"]["author"]["date"])
+                })
+            if 'rel="next"' not in response.headers.get("link", ""):
+                break
+        return commits, False
+
+    async def _with_fallback(
+        self,
+        username: str,
+        mode: Optional[str],
+        graphql: Callable[[], Awaitable[RepoListing]],
+        rest: Callable[[], Awaitable[RepoListing]]
+    ) -> RepoListing:
+        if not self.token:
+            raise GitHubError("GitHub token not configured")
+
+        if (mode or self.mode) == "graphql":
+            try:
+                return await graphql()
+            except GitHubNotFound:
+                raise
+            except (GitHubError, httpx.HTTPError, KeyError, TypeError) as e:
+                self.stats["graphql_fallbacks"] += 1
+                print(f"⚠️ [GitHub] GraphQL listing failed for {username}, falling back to REST: {e}")
+        return await rest()
+
+    async def list_repos(self, username: str, mode: str = None) -> RepoListing:
+        """Every owned repo, sorted by name"""
+        return await self._with_fallback(
+            username, mode,
+            lambda: self._graphql_repos(username),
+            lambda: self._rest_repos(username)
+        )
+
+    async def list_pushed_since(self, username: str, known: Dict[str, datetime], mode: str = None) -> RepoListing:
+        """Repos pushed to since ``known`` (name -> pushed_at), newest push first
+
+        Walks the list sorted by ``pushed`` and stops at the first repo whose
+        ``pushed_at`` is unchanged: everything after it is older, so unchanged too.
+        """
+        def unchanged(record: Dict) -> bool:
+            return record["name"] in known and known[record["name"]] == record["pushed_at"]
+
+        return await self._with_fallback(
+            username, mode,
+            lambda: self._graphql_repos(username, order="PUSHED_AT", stop=unchanged),
+            lambda: self._rest_pushed_since(username, unchanged)
+        )
+
+    async def analyze(self, username: str, mode: str = None) -> dict:
+        """Same result as ``GitHubAnalyzer.analyze_user``; raises ``GitHubError``"""
+        listing = await self.list_repos(username, mode)
+        return summarize_repos(username, listing.records, listing.commit_counts, listing.profile_url)
+
+    async def _graphql_repos(
+        self,
+        username: str,
+        order: str = "NAME",
+        stop: Callable[[Dict], bool] = None
+    ) -> RepoListing:
+        listing = None
+        cursor = None
+        variables = {"login": username, "orderField": order, "direction": "ASC" if order == "NAME" else "DESC"}
+        while True:
+            user = (await self.graphql(REPOS_QUERY, {**variables, "cursor": cursor}))["user"]
+            if user is None:
+                raise GitHubNotFound(f"Not found: {username}", 404)
+            repositories = user["repositories"]
+            listing = listing or RepoListing(user["url"], repositories["totalCount"])
+            for node in repositories["nodes"]:
+                record = {
+                    "name": node["name"],
+                    "fork": node["isFork"],
+                    "pushed_at": parse_timestamp(node["pushedAt"]),
+                    "created_at": parse_timestamp(node["createdAt"]),
+                    "size": node["diskUsage"] or 0,
+                    "language": (node["primaryLanguage"] or {}).get("name")
+                }
+                if stop and stop(record):
+                    listing.complete = False
+                    return listing
+                listing.records.append(record)
+                if not record["fork"] and record["size"] > 0:
+                    history = ((node["defaultBranchRef"] or {}).get("target") or {}).get("history")
+                    count = history["totalCount"] if history else 0
+                    listing.commit_counts[record["name"]] = count
+                    commit_count_cache.set(f"{username}/{record['name']}", record["pushed_at"], count)
+            if not repositories["pageInfo"]["hasNextPage"]:
+                return listing
+            cursor = repositories["pageInfo"]["endCursor"]
+
+    async def _count_listed(self, username: str, repos: List[Dict], listing: RepoListing) -> RepoListing:
+        listing.records = [repo_record(repo) for repo in repos]
+        counted = [repo for repo in repos if not repo["fork"] and (repo.get("size") or 0) > 0]
+        counts = await asyncio.gather(*(
+            self.count_commits(repo["owner"]["login"], repo["name"], parse_timestamp(repo.get("pushed_at")))
+            for repo in counted
+        ))
+        listing.commit_counts = {repo["name"]: count for repo, count in zip(counted, counts)}
+        return listing
+
+    async def _rest_repos(self, username: str) -> RepoListing:
+        profile, repos = await asyncio.gather(
+            self.get_json(f"/users/{username}"),
+            self.paginate(f"/users/{username}/repos")
+        )
+        return await self._count_listed(username, repos, RepoListing(profile["html_url"], len(repos)))
+
+    async def _rest_pushed_since(self, username: str, unchanged: Callable[[Dict], bool]) -> RepoListing:
+        path = f"/users/{username}/repos"
+        params = {"sort": "pushed", "direction": "desc", "per_page": 100}
+        profile, first = await asyncio.gather(
+            self.get_json(f"/users/{username}"),
+            self.request("GET", path, params=params)
+        )
+        listing = RepoListing(profile["html_url"], profile.get("public_repos", 0))
+        pages = last_page(first.headers.get("link"))
+        repos, page, batch = [], 1, first.json()
+        while True:
+            for repo in batch:
+                if unchanged(repo_record(repo)):
+                    listing.complete = False
+                    return await self._count_listed(username, repos, listing)
+                repos.append(repo)
+            page += 1
+            if page > pages:
+                return await self._count_listed(username, repos, listing)
+            batch = await self.get_json(path, {**params, "page": page})
+
+    async def analyze_user(self, username: str) -> dict:
+        """``analyze`` with errors reported in the result, like ``GitHubAnalyzer``"""
+        if not self.token:
+            return {"error": "GitHub token not configured"}
+        try:
+            return await self.analyze(username)
+        except Exception as e:
+            print(f"!!! GitHubAnalyzer Error: {type(e).__name__} - {str(e)}")
+            return {"error": f"Failed to analyze GitHub user: {str(e)}"}
@@ -1,91 +1,223 @@
 from github import Github
 from datetime import datetime, timedelta
-from collections import Counter
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class CommitCountCache:
+    """Commit totals per repo, valid until the repo is pushed to again"""
+
+    def __init__(self, max_repos: int = 20000):
+        self.max_repos = max_repos
+        self._counts: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, full_name: str, pushed_at) -> Optional[int]:
+        entry = self._counts.get(full_name)
+        if entry is None or entry[0] != pushed_at:
+            self.misses += 1
+            return None
+        self._counts.move_to_end(full_name)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, full_name: str, pushed_at, count: int):
+        self._counts[full_name] = (pushed_at, count)
+        self._counts.move_to_end(full_name)
+        while len(self._counts) > self.max_repos:
+            self._counts.popitem(last=False)
+
+    def clear(self):
+        self._counts.clear()
+        self.hits = self.misses = 0
+
+
+commit_count_cache = CommitCountCache()
+
+
+def _naive(dt: Optional[datetime]) -> Optional[datetime]:
+    return dt.replace(tzinfo=None) if dt and dt.tzinfo else dt
+
+
+def summarize_repos(username: str, repos: List[Dict], commit_counts: Dict[str, int], profile_url: str) -> dict:
+    """Build the analysis dict from plain repo records
+
+    ``repos`` holds ``name``, ``fork``, ``pushed_at``, ``created_at``, ``size`` and
+    ``language`` for every repo in API order; ``commit_counts`` is keyed by name.
+    Shared by the PyGithub and async clients so both produce the same result.
+    """
+    # Time threshold for "active" repos
+    three_months_ago = datetime.now() - timedelta(days=90)
+
+    active_repos = []
+    total_commits = 0
+    languages = Counter()
+    started_not_finished = []
+
+    for repo in repos:
+        if repo["fork"]:
+            continue
+
+        # GitHub timestamps are UTC; compare them offset-naive
+        last_push = _naive(repo["pushed_at"])
+        is_active = bool(last_push and last_push > three_months_ago)
+
+        if is_active:
+            active_repos.append(repo["name"])
+
+        total_commits += commit_counts.get(repo["name"], 0)
+
+        # Language stats
+        if repo["language"]:
+            languages[repo["language"]] += 1
+
+        # Detect tutorial hell / unfinished projects
+        created_at = _naive(repo["created_at"])
+        if repo["size"] > 0 and not is_active and created_at > (datetime.now() - timedelta(days=180)):
+            started_not_finished.append({
+                "name": repo["name"],
+                "started": created_at.strftime("%Y-%m-%d"),
+                "last_activity": last_push.strftime("%Y-%m-%d") if last_push else "Unknown"
+            })
+
+    # Detect patterns
+    patterns = GitHubAnalyzer._detect_patterns(
+        total_repos=len(repos),
+        active_repos=len(active_repos),
+        started_not_finished=len(started_not_finished),
+        languages=languages
+    )
+
+    return {
+        "username": username,
+        "total_repos": len(repos),
+        "active_repos": len(active_repos),
+        "total_commits": total_commits,
+        "languages": dict(languages.most_common(5)),
+        "started_not_finished": started_not_finished[:5], # Limit to 5 examples
+        "patterns": patterns,
+        "profile_url": profile_url
+    }
+
+
+# The events API only returns the last 300 events from the last 90 days
+MAX_EVENTS = 300
+
+
+def push_commits(payload: Optional[Dict]) -> int:
+    """Commits in a PushEvent payload (``commits`` lists at most 20 of them)"""
+    if not payload:
+        return 0
+    if payload.get("size") is not None:
+        return payload["size"]
+    return len(payload.get("commits") or [])
+
+
+class ActivityWindows:
+    """Per-day commit counts for several trailing windows from one event scan
+
+    Feed events newest first; ``add`` returns False once an event is older
+    than the longest window, so the caller can stop fetching pages. A window
+    of N days covers today (UTC) and the N - 1 days before it.
+    """
+
+    def __init__(self, windows: Iterable[int] = (1, 7, 30), now: datetime = None):
+        self.windows = sorted(set(windows))
+        self.today = (now or datetime.utcnow()).date()
+        self.since = self.today - timedelta(days=self.windows[-1] - 1)
+        self.commits: Counter = Counter() # date -> commits
+        self.repos: Dict = {} # date -> repo names pushed to
+        self.scanned = 0
+        self.reached_end = False # True once an event older than the longest window was seen
+
+    def add(self, created_at: datetime, event_type: str, repo: Optional[str], payload: Optional[Dict]) -> bool:
+        self.scanned += 1
+        day = _naive(created_at).date()
+        if day < self.since:
+            self.reached_end = True
+            return False
+        if event_type == "PushEvent":
+            self.commits[day] += push_commits(payload)
+            if repo:
+                self.repos.setdefault(day, set()).add(repo)
+        return True
+
+    @property
+    def complete(self) -> bool:
+        """False when the events API ran out before covering the longest window"""
+        return self.reached_end or self.scanned < MAX_EVENTS
+
+    def window(self, days: int) -> Dict:
+        dates = [self.today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+        commits = sum(self.commits[d] for d in dates)
+        repos = set().union(*(self.repos.get(d, set()) for d in dates))
+        return {
+            "days": days,
+            "commits": commits,
+            "repos_touched": len(repos),
+            "active_days": sum(1 for d in dates if self.commits[d]),
+            "active": commits > 0,
+            "histogram": [{"date": d.isoformat(), "commits": self.commits[d]} for d in dates]
+        }
+
+    def result(self) -> Dict:
+        return {
+            "windows": {days: self.window(days) for days in self.windows},
+            "events_scanned": self.scanned,
+            "complete": self.complete
+        }
+
+
 class GitHubAnalyzer:
-    def __init__(self, token: str = None):
+    def __init__(self, token: str = None, base_url: str = None):
         self.token = token or os.getenv("GITHUB_TOKEN")
-        self.client = Github(self.token) if self.token else None
+        if not self.token:
+            self.client = None
+        elif base_url:
+            self.client = Github(self.token, base_url=base_url, per_page=100)
+        else:
+            self.client = Github(self.token, per_page=100)
 
     def analyze_user(self, username: str) -> dict:
-        """Analyze a GitHub user's repos and activity"""
+        """Analyze a GitHub user's repos and activity (blocking; see ``github_async``)"""
         if not self.client:
             return {"error": "GitHub token not configured"}
 
         try:
             user = self.client.get_user(username)
-            repos = list(user.get_repos())
-
-            # Time threshold for "active" repos
-            three_months_ago = datetime.now() - timedelta(days=90)
-
-            active_repos = []
-            total_commits = 0
-            languages = Counter()
-            started_not_finished = []
-
-            for repo in repos:
-                if repo.fork:
-                    continue
-
-                # Check if repo is active
-                last_push = repo.pushed_at
-                # Ensure last_push is timezone-aware or make three_months_ago offset-naive
-                # Assuming repo.pushed_at is offset-naive UTC or comparing doesn't need timezone
-                is_active = last_push and last_push.replace(tzinfo=None) > three_months_ago if last_push.tzinfo else last_push and last_push > three_months_ago
-
-
-                if is_active:
-                    active_repos.append(repo.name)
+            repos = []
+            commit_counts = {}
+
+            for repo in user.get_repos():
+                repos.append({
+                    "name": repo.name,
+                    "fork": repo.fork,
+                    "pushed_at": repo.pushed_at,
+                    "created_at": repo.created_at,
+                    "size": repo.size,
+                    "language": repo.language
+                })
 
                 # Count commits (handle potential exceptions more gracefully)
                 # Only count commits if the repo seems to have content
-                if repo.size > 0:
+                if not repo.fork and repo.size > 0:
                     try:
-                        # Fetch commits efficiently, maybe limit further if hitting rate limits
-                        commits = list(repo.get_commits().get_page(0)[:100]) # Get first page up to 100
-                        total_commits += len(commits)
+                        count = commit_count_cache.get(repo.full_name, _naive(repo.pushed_at))
+                        if count is None:
+                            # One per_page=1 request; the total comes from the Link header
+                            count = repo.get_commits().totalCount
+                            commit_count_cache.set(repo.full_name, _naive(repo.pushed_at), count)
+                        commit_counts[repo.name] = count
                     except Exception as commit_error:
                          # Log this error if needed, but don't stop analysis
                         print(f"!!! Warning: Could not fetch commits for repo {repo.name}: {commit_error}")
                         pass # Continue analyzing other aspects
 
-                # Language stats
-                if repo.language:
-                    languages[repo.language] += 1
-
-                # Detect tutorial hell / unfinished projects
-                # Ensure created_at is timezone-aware or make comparison offset-naive
-                created_at_naive = repo.created_at.replace(tzinfo=None) if repo.created_at.tzinfo else repo.created_at
-                if repo.size > 0 and not is_active and created_at_naive > (datetime.now() - timedelta(days=180)):
-                    started_not_finished.append({
-                        "name": repo.name,
-                        "started": repo.created_at.strftime("%Y-%m-%d"),
-                        "last_activity": last_push.strftime("%Y-%m-%d") if last_push else "Unknown"
-                    })
-
-            # Detect patterns
-            patterns = self._detect_patterns(
-                total_repos=len(repos),
-                active_repos=len(active_repos),
-                started_not_finished=len(started_not_finished),
-                languages=languages
-            )
-
-            return {
-                "username": username,
-                "total_repos": len(repos),
-                "active_repos": len(active_repos),
-                "total_commits": total_commits,
-                "languages": dict(languages.most_common(5)),
-                "started_not_finished": started_not_finished[:5], # Limit to 5 examples
-                "patterns": patterns,
-                "profile_url": user.html_url
-            }
+            return summarize_repos(username, repos, commit_counts, user.html_url)
 
         except Exception as e:
             # --- DEBUGGING LINE ADDED HERE ---
@@ -93,7 +225,8 @@ class GitHubAnalyzer:
             # Consider more specific exception handling (e.g., RateLimitExceededException, UnknownObjectException)
             return {"error": f"Failed to analyze GitHub user: {str(e)}"}
 
-    def _detect_patterns(self, total_repos, active_repos, started_not_finished, languages):
+    @staticmethod
+    def _detect_patterns(total_repos, active_repos, started_not_finished, languages):
         """Detect behavioral patterns from GitHub data"""
         patterns = []
 
@@ -150,49 +283,17 @@ class GitHubAnalyzer:
         return patterns
 
     def get_recent_activity(self, username: str, days: int = 7) -> dict:
-        """Get recent commit activity"""
+        """Get recent commit activity with a per-day histogram (blocking; see ``github_activity``)"""
         if not self.client:
             return {"error": "GitHub token not configured"}
 
         try:
-            user = self.client.get_user(username)
-            since = datetime.now() - timedelta(days=days)
-
-            # PyGithub returns a PaginatedList, which is iterable
-            events = user.get_events()
-            commit_count = 0
-            repos_touched = set()
-
-            # Iterate safely, GitHub API might limit event history
-            event_count = 0
-            max_events_to_check = 300 # Limit how many events we check to avoid excessive API calls
-
-            for event in events:
-                event_count += 1
-                if event_count > max_events_to_check:
-                    print(f"!!! Warning: Hit max event check limit ({max_events_to_check}) for recent activity.")
+            activity = ActivityWindows([days])
+            # Pages of 100 are fetched lazily; stop at the first event outside the window
+            for event in self.client.get_user(username).get_events():
+                if not activity.add(event.created_at, event.type, event.repo.name if event.repo else None, event.payload):
                     break
-
-                # Ensure event.created_at is offset-naive for comparison or make 'since' offset-aware
-                created_at_naive = event.created_at.replace(tzinfo=None) if event.created_at.tzinfo else event.created_at
-                if created_at_naive < since:
-                    break # Events are usually ordered newest first
-
-                if event.type == "PushEvent" and event.payload and 'commits' in event.payload:
-                    # Check if commits list is not None and is iterable
-                    commits_payload = event.payload.get("commits")
-                    if commits_payload:
-                         commit_count += len(commits_payload)
-                    if event.repo: # Ensure repo information is present
-                        repos_touched.add(event.repo.name)
-
-            return {
-                "days": days,
-                "commits": commit_count,
-                "repos_touched": len(repos_touched),
-                "active": commit_count > 0
-            }
+            return activity.window(days)
         except Exception as e:
-             # --- ADDED DEBUGGING HERE TOO ---
             print(f"!!! GitHubAnalyzer get_recent_activity Error: {type(e).__name__} - {str(e)}")
-            return {"error": f"Failed to get recent activity: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Failed to get recent activity: {str(e)}"}
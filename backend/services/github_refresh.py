@@ -0,0 +1,155 @@
+"""Incremental GitHub analysis backed by per-repo state in the tenant DB.
+
+The first analysis lists every repo and stores one ``GitHubRepoState`` row per
+repo. Later refreshes ask GitHub only for repos pushed since then (newest push
+first, stopping at the first unchanged repo) and reuse the stored facts and
+commit counts for the rest, so a daily refresh of an active account costs a
+couple of requests instead of hundreds.
+
+Aggregates and patterns are recomputed from the stored rows with
+``summarize_repos``: that is cheap, needs no API calls, and keeps the
+time-based "active in the last 90 days" split correct as repos age. Pushed
+repos also get their new commits appended to the commit series that feed the
+rhythm patterns (``commit_series``).
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+
+import models
+from .commit_series import HISTORY_DAYS, commit_rhythm, load_series, rhythm_patterns, sync_commit_series
+from .github_async import AsyncGitHub, count_requests
+from .github_integration import summarize_repos
+
+
+@dataclass
+class RefreshResult:
+    analysis: Dict
+    kind: str # "full" or "incremental"
+    changed_repos: int
+    requests: int
+    graphql_cost: int
+
+
+def _state_record(state: models.GitHubRepoState) -> Dict:
+    return {
+        "name": state.name,
+        "fork": state.fork,
+        "pushed_at": state.pushed_at,
+        "created_at": state.created_at,
+        "size": state.size,
+        "language": state.language
+    }
+
+
+async def save_snapshot(
+    db,
+    user_id: int,
+    username: str,
+    states: Iterable[models.GitHubRepoState],
+    profile_url: str,
+    reuse_latest: bool = False,
+    now: datetime = None
+) -> Dict:
+    """Recompute the analysis from stored repo states and save it (not committed)
+
+    With ``reuse_latest`` the newest ``GitHubAnalysis`` row is updated in place.
+    """
+    now = now or datetime.utcnow()
+    ordered = sorted(states, key=lambda s: s.name.lower())
+    analysis = summarize_repos(
+        username,
+        [_state_record(state) for state in ordered],
+        {state.name: state.commit_count or 0 for state in ordered if not state.fork and state.size > 0},
+        profile_url
+    )
+    names = {state.name for state in ordered}
+    await db.flush() # Series added by this refresh
+    rhythm = commit_rhythm(series for name, series in (await load_series(db, user_id)).items() if name in names)
+    analysis["patterns"] += rhythm_patterns(rhythm)
+    analysis["commit_rhythm"] = rhythm
+
+    snapshot = None
+    if reuse_latest:
+        result = await db.execute(select(models.GitHubAnalysis).filter(
+            models.GitHubAnalysis.user_id == user_id
+        ).order_by(models.GitHubAnalysis.analyzed_at.desc()).limit(1))
+        snapshot = result.scalars().first()
+    if snapshot is None:
+        snapshot = models.GitHubAnalysis(user_id=user_id, username=username)
+        db.add(snapshot)
+    snapshot.total_repos = analysis["total_repos"]
+    snapshot.active_repos = analysis["active_repos"]
+    snapshot.total_commits = analysis["total_commits"]
+    snapshot.languages = analysis["languages"]
+    snapshot.patterns = analysis["patterns"]
+    snapshot.commit_rhythm = rhythm
+    snapshot.analyzed_at = now
+    return analysis
+
+
+async def refresh_github_analysis(
+    client: AsyncGitHub,
+    db,
+    user_id: int,
+    username: str,
+    full: bool = False
+) -> RefreshResult:
+    """Bring the stored repo state up to date and save a ``GitHubAnalysis`` snapshot"""
+    result = await db.execute(select(models.GitHubRepoState).filter(models.GitHubRepoState.user_id == user_id))
+    states = {state.name: state for state in result.scalars().all()}
+
+    with count_requests() as tally:
+        listing = None
+        kind = "incremental"
+        if states and not full:
+            listing = await client.list_pushed_since(username, {name: s.pushed_at for name, s in states.items()})
+            if len(set(states) | {r["name"] for r in listing.records}) != listing.total_repos:
+                # A repo was deleted, renamed or made private; only a full listing shows which
+                listing = None
+        if listing is None:
+            kind = "full"
+            listing = await client.list_repos(username)
+            listed = {record["name"] for record in listing.records}
+            series = await load_series(db, user_id)
+            for name in set(states) - listed:
+                await db.delete(states.pop(name))
+            for name in set(series) - listed:
+                await db.delete(series[name])
+
+        # Commit timestamps for the rhythm detectors, from repos pushed to in the last year
+        recent = datetime.utcnow() - timedelta(days=HISTORY_DAYS)
+        await sync_commit_series(client, db, user_id, username, [
+            record["name"] for record in listing.records
+            if not record["fork"] and record["size"] > 0 and record["pushed_at"] and record["pushed_at"] > recent
+        ])
+
+    now = datetime.utcnow()
+    for record in listing.records:
+        state = states.get(record["name"])
+        if state is None:
+            state = states[record["name"]] = models.GitHubRepoState(user_id=user_id, name=record["name"])
+            db.add(state)
+        state.fork = record["fork"]
+        state.size = record["size"]
+        state.language = record["language"]
+        state.created_at = record["created_at"]
+        state.pushed_at = record["pushed_at"]
+        state.commit_count = listing.commit_counts.get(record["name"], 0)
+        state.refreshed_at = now
+
+    analysis = await save_snapshot(
+        db, user_id, username, states.values(), listing.profile_url,
+        # Nothing pushed: move the latest snapshot forward instead of adding a duplicate
+        reuse_latest=kind == "incremental" and not listing.records,
+        now=now
+    )
+    await db.commit()
+
+    print(
+        f"🔄 [GitHub] {username}: {kind} refresh, {len(listing.records)} repos fetched, "
+        f"{tally['requests']} requests, {tally['graphql_cost']} GraphQL points"
+    )
+    return RefreshResult(analysis, kind, len(listing.records), tally["requests"], tally["graphql_cost"])
@@ -0,0 +1,258 @@
+"""Scheduled GitHub refresh for every user, inside a shared API budget.
+
+Once per ``GITHUB_REFRESH_INTERVAL_MINUTES`` the ``github_refresh`` cron job
+walks all users with a database, most recently active first, and runs the
+incremental refresh for each. Users who have not been active for a week are
+only refreshed every ``GITHUB_REFRESH_IDLE_HOURS``.
+
+- Budget: every token in ``GITHUB_TOKENS`` may spend
+  ``GITHUB_REFRESH_BUDGET_FRACTION`` of its hourly limit per cycle; the rest is
+  left for interactive requests. A refresh goes to the token with the most
+  budget left, judged by what this cycle spent and by the token's
+  ``x-ratelimit-remaining``. When no token can afford the next user the cycle
+  stops, so it is the least active users that wait.
+- Spread: refreshes start evenly across the first 90% of the interval instead
+  of in one burst at the top of the hour.
+- Several app processes: the job runs on the shared ``scheduler``, so one
+  process runs each cycle and the budget is the tokens' budget, not each
+  process's. Within a cycle a refresh is also claimed with a conditional
+  update of ``User.github_refreshed_at``, so a user is refreshed once. A
+  refresh that fails for a transient reason (rate limit, 5xx, network) puts
+  the previous stamp back, so the user is due again in the next cycle.
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import Row, select, update, or_
+
+import models
+from config import settings
+from database import SystemSessionLocal, user_session_scope
+from .cache import invalidate_user_cache
+from .github_async import AsyncGitHub, GitHubNotFound, GitHubRateLimited
+from .github_refresh import refresh_github_analysis
+from .scheduler import scheduler
+from .user_stream import USER_COLUMNS
+
+# Requests assumed for a user we have not refreshed yet in this process
+DEFAULT_COST = 5
+# Share of the interval over which refresh starts are spread
+SPREAD = 0.9
+ACTIVE_DAYS = 7
+
+
+@dataclass
+class TokenBudget:
+    client: AsyncGitHub
+    allowance: int # Requests this token may spend per cycle
+    used: int = 0
+
+    @property
+    def available(self) -> int:
+        headroom = self.allowance - self.used
+        limit = self.client.rate_limit
+        if limit["remaining"] is not None and limit["reset"] and limit["reset"] > time.time():
+            # What is left on GitHub's side, minus the share kept for interactive use
+            headroom = min(headroom, limit["remaining"] - ((limit["limit"] or 0) - self.allowance))
+        return headroom
+
+
+class GitHubRefreshScheduler:
+    def __init__(
+        self,
+        tokens: List[str] = None,
+        interval_minutes: int = None,
+        budget_fraction: float = None,
+        hourly_limit: int = 5000,
+        concurrency: int = 2,
+        base_url: str = None
+    ):
+        if tokens is None:
+            tokens = [t.strip() for t in settings.GITHUB_TOKENS.split(",") if t.strip()]
+            tokens = tokens or ([settings.GITHUB_TOKEN] if settings.GITHUB_TOKEN else [])
+        fraction = budget_fraction or settings.GITHUB_REFRESH_BUDGET_FRACTION
+        self.interval = (interval_minutes or settings.GITHUB_REFRESH_INTERVAL_MINUTES) * 60
+        self.budgets = [
+            TokenBudget(AsyncGitHub(token, base_url=base_url), allowance=int(hourly_limit * fraction))
+            for token in tokens
+        ]
+        self.concurrency = concurrency
+
+        self._cost: Dict[int, int] = {} # user id -> requests spent on the last refresh
+        self._history: Deque[Tuple[float, str, int]] = deque() # (time, username, requests)
+        self._stats = {"cycles": 0, "refreshed": 0, "failed": 0, "skipped_budget": 0, "skipped_fresh": 0}
+
+    async def _due_users(self) -> List[Row]:
+        # Projected rows, most active first; the cycle needs the whole ordered list
+        # for its spacing, and rows stay small (no ORM objects)
+        async with SystemSessionLocal() as db:
+            result = await db.execute(
+                select(*USER_COLUMNS, models.User.github_refreshed_at)
+                .filter(models.User.neon_db_url != None, models.User.github_username != None)
+                .order_by(models.User.last_activity_date.desc().nullslast(), models.User.id)
+            )
+            return result.all()
+
+    def _min_age(self, user: Row) -> timedelta:
+        active_since = datetime.utcnow() - timedelta(days=ACTIVE_DAYS)
+        if user.last_activity_date and user.last_activity_date >= active_since:
+            return timedelta(seconds=self.interval * SPREAD)
+        return timedelta(hours=settings.GITHUB_REFRESH_IDLE_HOURS)
+
+    async def _claim(self, user: Row) -> Optional[datetime]:
+        """Mark the user as refreshed unless another process did so recently; returns the new stamp"""
+        now = datetime.utcnow()
+        async with SystemSessionLocal() as db:
+            result = await db.execute(
+                update(models.User)
+                .where(
+                    models.User.id == user.id,
+                    or_(models.User.github_refreshed_at == None, models.User.github_refreshed_at < now - self._min_age(user))
+                )
+                .values(github_refreshed_at=now)
+            )
+            await db.commit()
+        return now if result.rowcount == 1 else None
+
+    async def _release(self, user: Row, claimed_at: datetime):
+        """Put back the stamp ``_claim`` replaced, unless the user was claimed again since"""
+        try:
+            async with SystemSessionLocal() as db:
+                await db.execute(
+                    update(models.User)
+                    .where(models.User.id == user.id, models.User.github_refreshed_at == claimed_at)
+                    .values(github_refreshed_at=user.github_refreshed_at)
+                )
+                await db.commit()
+        except Exception as e:
+            print(f"⚠️ [GitHub] Could not release the refresh claim of {user.github_username}: {e}")
+
+    def _pick_budget(self, cost: int) -> Optional[TokenBudget]:
+        if not self.budgets:
+            return None
+        budget = max(self.budgets, key=lambda b: b.available)
+        return budget if budget.available >= cost else None
+
+    async def _refresh_user(self, user: Row, budget: TokenBudget, estimate: int, claimed_at: datetime):
+        spent = estimate
+        try:
+            async with user_session_scope(user.neon_db_url) as db:
+                result = await refresh_github_analysis(budget.client, db, user.id, user.github_username)
+            spent = result.requests
+            invalidate_user_cache(user.github_username)
+            self._stats["refreshed"] += 1
+            self._history.append((time.time(), user.github_username, spent))
+        except GitHubNotFound:
+            spent = 1
+            self._stats["failed"] += 1
+            print(f"⚠️ [GitHub] Scheduled refresh: GitHub user {user.github_username} not found")
+        except GitHubRateLimited as e:
+            self._stats["failed"] += 1
+            print(f"⏳ [GitHub] Scheduled refresh hit the rate limit for {user.github_username}: {e}")
+            await self._release(user, claimed_at)
+        except Exception as e:
+            self._stats["failed"] += 1
+            print(f"❌ [GitHub] Scheduled refresh failed for {user.github_username}: {e}")
+            await self._release(user, claimed_at)
+        finally:
+            budget.used += spent - estimate
+            self._cost[user.id] = max(1, spent)
+
+    async def run_cycle(self):
+        """Refresh every due user once, spread over the interval"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        users = await self._due_users()
+        spacing = self.interval * SPREAD / max(1, len(users))
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+
+        for i, user in enumerate(users):
+            delay = started + i * spacing - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            estimate = self._cost.get(user.id, DEFAULT_COST)
+            budget = self._pick_budget(estimate)
+            if budget is None:
+                self._stats["skipped_budget"] += len(users) - i
+                print(f"⏳ [GitHub] Refresh budget spent; {len(users) - i} less active user(s) wait for the next cycle")
+                break
+            claimed_at = await self._claim(user)
+            if claimed_at is None:
+                self._stats["skipped_fresh"] += 1
+                continue
+
+            budget.used += estimate
+            await slots.acquire()
+            task = asyncio.create_task(self._refresh_user(user, budget, estimate, claimed_at))
+            task.add_done_callback(lambda _: slots.release())
+            tasks.append(task)
+
+        await asyncio.gather(*tasks)
+        self._stats["cycles"] += 1
+
+    async def cycle(self):
+        """The ``github_refresh`` job: a cycle with the whole per-cycle budget"""
+        if not self.budgets:
+            print("⚠️ [GitHub] No GitHub token configured; skipping the scheduled refresh")
+            return
+        for budget in self.budgets:
+            budget.used = 0
+        await self.run_cycle()
+
+    def cron(self) -> str:
+        """The interval as a cron expression; it must divide an hour or a day"""
+        minutes = self.interval // 60
+        if minutes < 60 and 60 % minutes == 0:
+            return f"*/{minutes} * * * *"
+        if minutes % 60 == 0 and 24 % (minutes // 60) == 0:
+            return f"0 */{minutes // 60} * * *"
+        raise ValueError(f"GITHUB_REFRESH_INTERVAL_MINUTES={minutes} must divide 60 or 1440")
+
+    async def close(self):
+        for budget in self.budgets:
+            await budget.client.close()
+
+    def stats(self) -> Dict:
+        """Users refreshed and API calls per user over the last hour"""
+        cutoff = time.time() - 3600
+        while self._history and self._history[0][0] < cutoff:
+            self._history.popleft()
+        calls = [requests for _, _, requests in self._history]
+        return {
+            "users_refreshed_last_hour": len(calls),
+            "api_calls_last_hour": sum(calls),
+            "api_calls_per_user": round(sum(calls) / len(calls), 2) if calls else None,
+            "max_api_calls_per_user": max(calls) if calls else None,
+            "tokens": [
+                {
+                    "allowance": b.allowance,
+                    "used_this_cycle": b.used,
+                    "available": b.available,
+                    "github_remaining": b.client.rate_limit["remaining"]
+                }
+                for b in self.budgets
+            ],
+            "interval_minutes": self.interval // 60,
+            **self._stats,
+        }
+
+
+github_refresh_scheduler = GitHubRefreshScheduler()
+
+if settings.GITHUB_REFRESH_ENABLED:
+    # A cycle that outlasts its interval makes the scheduler skip the next slot;
+    # one missed or cut short by a deploy runs on start (claimed users are skipped)
+    scheduler.add(
+        "github_refresh",
+        github_refresh_scheduler.cron(),
+        github_refresh_scheduler.cycle,
+        jitter=60,
+        catch_up=github_refresh_scheduler.interval,
+        timeout=2 * github_refresh_scheduler.interval
+    )
@@ -0,0 +1,242 @@
+"""GitHub webhook ingestion: push, create and repository events.
+
+A verified delivery updates the tenant's stored repo state
+(``GitHubRepoState``) and per-day repo activity (``GitHubRepoActivity``), then
+recomputes the latest ``GitHubAnalysis`` from the stored states without
+calling the list endpoints. Pushes therefore show up on the dashboard within
+seconds, and the scheduled refresh finds nothing left to fetch.
+
+- Push: commits to the default branch are added to the repo's commit count.
+  Force pushes, and pushes to repos we have no state for, are recounted with
+  one ``per_page=1`` request instead. The pushed commits are appended to the
+  repo's commit series.
+- Create: branches and tags created, per repo and day.
+- Repository: created, deleted, renamed, publicized, privatized and transferred
+  repos are added to or removed from the stored state. Other actions refresh
+  its facts.
+
+Only public repos owned by the user are tracked, like the analysis itself.
+Each ``X-GitHub-Delivery`` id is stored with the changes it made, so a
+redelivery is acknowledged without being counted twice.
+"""
+import hashlib
+import hmac
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+import models
+from .commit_series import add_commits, load_series, series_for, sync_repo_series
+from .github_async import AsyncGitHub, GitHubError, parse_timestamp
+from .github_refresh import save_snapshot
+
+EVENTS = ("push", "create", "repository")
+# A push payload lists at most this many commits
+MAX_PUSH_COMMITS = 2048
+
+
+def sign(secret: str, body: bytes) -> str:
+    """``X-Hub-Signature-256`` value for ``body``"""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    # As bytes: compare_digest raises TypeError on non-ASCII strings (headers are latin-1)
+    return bool(signature) and hmac.compare_digest(
+        sign(secret, body).encode(), signature.encode("latin-1", "replace")
+    )
+
+
+def repo_owner(payload: Dict) -> Optional[str]:
+    owner = (payload.get("repository") or {}).get("owner") or {}
+    return owner.get("login") or owner.get("name")
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    """Push payloads use unix timestamps for the repo, other events ISO strings"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value)
+    return parse_timestamp(value)
+
+
+def _apply_repo(state: models.GitHubRepoState, repo: Dict):
+    state.fork = repo.get("fork", False)
+    state.size = repo.get("size") or 0
+    state.language = repo.get("language")
+    state.created_at = _timestamp(repo.get("created_at"))
+    state.pushed_at = _timestamp(repo.get("pushed_at"))
+    state.refreshed_at = datetime.utcnow()
+
+
+async def _activity(db, user_id: int, name: str, day) -> models.GitHubRepoActivity:
+    result = await db.execute(select(models.GitHubRepoActivity).filter(
+        models.GitHubRepoActivity.user_id == user_id,
+        models.GitHubRepoActivity.name == name,
+        models.GitHubRepoActivity.day == day
+    ))
+    row = result.scalars().first()
+    if row is None:
+        row = models.GitHubRepoActivity(user_id=user_id, name=name, day=day, commits=0, pushes=0, refs_created=0)
+        db.add(row)
+    return row
+
+
+async def _recount(client: AsyncGitHub, owner: str, state: models.GitHubRepoState):
+    try:
+        count = await client.count_commits(owner, state.name, state.pushed_at)
+    except GitHubError as e:
+        print(f"⚠️ [GitHub] Webhook recount failed for {owner}/{state.name}: {e}")
+        return
+    # count_commits answers 0 when the request fails; keep the stored count then
+    if count or not state.commit_count:
+        state.commit_count = count
+
+
+async def _on_push(client, db, user_id, owner, payload, states, changes):
+    repo = payload["repository"]
+    if payload.get("deleted"):
+        return
+    commits = payload.get("commits") or []
+    head = payload.get("head_commit") or {}
+    day = (_timestamp(head.get("timestamp")) or datetime.utcnow()).date()
+
+    activity = await _activity(db, user_id, repo["name"], day)
+    activity.pushes += 1
+    activity.commits += len(commits)
+    changes["commits"] = len(commits)
+
+    if not states or payload.get("ref") != f"refs/heads/{repo.get('default_branch')}":
+        return
+    state = states.get(repo["name"])
+    exact = state is not None and not payload.get("forced") and len(commits) < MAX_PUSH_COMMITS
+    if state is None:
+        state = states[repo["name"]] = models.GitHubRepoState(user_id=user_id, name=repo["name"], commit_count=0)
+        db.add(state)
+    _apply_repo(state, repo)
+    if exact:
+        state.commit_count = (state.commit_count or 0) + len(commits)
+    else:
+        await _recount(client, owner, state)
+    changes["commit_count"] = state.commit_count
+
+    series = series_for(db, await load_series(db, user_id), user_id, repo["name"])
+    if exact and series.head_sha and series.head_sha == payload.get("before"):
+        add_commits(series, [
+            _timestamp(commit["timestamp"]) for commit in commits
+            if ((commit.get("author") or {}).get("username") or "").lower() == owner.lower()
+        ])
+        series.head_sha = payload.get("after")
+    else:
+        try:
+            await sync_repo_series(client, owner, series)
+        except GitHubError as e:
+            print(f"⚠️ [GitHub] Webhook commit series sync failed for {owner}/{series.name}: {e}")
+
+
+async def _on_create(db, user_id, payload, changes):
+    if payload.get("ref_type") not in ("branch", "tag"):
+        return
+    activity = await _activity(db, user_id, payload["repository"]["name"], datetime.utcnow().date())
+    activity.refs_created += 1
+    changes["ref_created"] = f"{payload['ref_type']}:{payload.get('ref')}"
+
+
+async def _on_repository(db, user_id, payload, states, changes):
+    repo = payload["repository"]
+    action = payload.get("action")
+    changes["action"] = action
+    if not states:
+        return
+    if action == "renamed":
+        old_name = ((payload.get("changes") or {}).get("repository") or {}).get("name", {}).get("from")
+        if old_name in states:
+            state = states[repo["name"]] = states.pop(old_name)
+            state.name = repo["name"]
+            result = await db.execute(select(models.GitHubRepoActivity).filter(
+                models.GitHubRepoActivity.user_id == user_id,
+                models.GitHubRepoActivity.name == old_name
+            ))
+            for row in result.scalars().all():
+                row.name = repo["name"]
+            series = (await load_series(db, user_id)).get(old_name)
+            if series is not None:
+                series.name = repo["name"]
+    if action in ("deleted", "privatized", "transferred"):
+        if repo["name"] in states:
+            await db.delete(states.pop(repo["name"]))
+        series = (await load_series(db, user_id)).get(repo["name"])
+        if series is not None:
+            await db.delete(series)
+        return
+    state = states.get(repo["name"])
+    if state is None:
+        if action not in ("created", "publicized"):
+            return
+        state = states[repo["name"]] = models.GitHubRepoState(user_id=user_id, name=repo["name"], commit_count=0)
+        db.add(state)
+    _apply_repo(state, repo)
+
+
+async def ingest_event(
+    client: AsyncGitHub,
+    db,
+    user_id: int,
+    username: str,
+    event: str,
+    delivery_id: str,
+    payload: Dict
+) -> Dict:
+    """Apply one webhook delivery to the tenant DB and commit
+
+    Returns ``{"status": "processed" | "duplicate" | "ignored", ...}``.
+    """
+    repo = payload.get("repository") or {}
+    if event not in EVENTS or not repo:
+        return {"status": "ignored", "reason": f"unsupported event '{event}'"}
+    if repo.get("private"):
+        return {"status": "ignored", "reason": "private repository"}
+
+    for attempt in range(2):
+        result = await db.execute(select(models.GitHubWebhookDelivery).filter(
+            models.GitHubWebhookDelivery.delivery_id == delivery_id
+        ))
+        if result.scalars().first():
+            return {"status": "duplicate", "delivery_id": delivery_id}
+        db.add(models.GitHubWebhookDelivery(delivery_id=delivery_id, event=event, repo=repo.get("name")))
+
+        result = await db.execute(select(models.GitHubRepoState).filter(models.GitHubRepoState.user_id == user_id))
+        # Empty until the first analysis; that one lists every repo anyway
+        states = {state.name: state for state in result.scalars().all()}
+        changes: Dict[str, Any] = {}
+        if event == "push":
+            await _on_push(client, db, user_id, repo_owner(payload), payload, states, changes)
+        elif event == "create":
+            await _on_create(db, user_id, payload, changes)
+        else:
+            await _on_repository(db, user_id, payload, states, changes)
+
+        analysis = None
+        if states:
+            profile_url = (repo.get("owner") or {}).get("html_url") or f"https://github.com/{username}"
+            analysis = await save_snapshot(db, user_id, username, states.values(), profile_url, reuse_latest=True)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent delivery for the same repo and day (or a redelivery) won the insert
+            await db.rollback()
+            if attempt:
+                raise
+            continue
+
+        print(f"🔄 [GitHub] Webhook {event} for {username}/{repo.get('name')}: {changes}")
+        return {
+            "status": "processed",
+            "event": event,
+            "repo": repo.get("name"),
+            "changes": changes,
+            "analysis": analysis
+        }
@@ -0,0 +1,392 @@
+"""Rate-limit aware access to Groq.
+
+Groq enforces requests-per-minute and tokens-per-minute limits per API key
+and reports them in ``x-ratelimit-*`` response headers. Instead of firing
+requests until we get a 429, every call first takes its share from a
+per-key token bucket (one for requests, one for tokens). Callers wait in line
+when the budget is spent, and the buckets are corrected from the headers of
+every response. If a 429 still happens, the call is retried with jittered
+exponential backoff that honours ``retry-after``.
+
+Two entry points:
+- ``GroqClient.chat_completion`` talks to the OpenAI-compatible endpoint
+  directly over a pooled ``httpx.AsyncClient``.
+- ``groq_limiter.run`` wraps blocking CrewAI kickoffs. Headers seen by LiteLLM
+  inside the crew are fed back through a LiteLLM success callback.
+"""
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from config import settings
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call is still rate limited after all retries"""
+
+    def __init__(self, message: str, retry_after: float = 60.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_TRY_AGAIN_RE = re.compile(r"try again in ((?:\d+(?:\.\d+)?(?:ms|h|m|s))+)", re.IGNORECASE)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset durations such as ``"2m59.56s"``, ``"7.66s"`` or ``"250ms"`` into seconds"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    seconds = 0.0
+    matched = False
+    for amount, unit in _DURATION_RE.findall(value):
+        matched = True
+        amount = float(amount)
+        if unit == "h":
+            seconds += amount * 3600
+        elif unit == "m":
+            seconds += amount * 60
+        elif unit == "s":
+            seconds += amount
+        else:
+            seconds += amount / 1000
+    return seconds if matched else None
+
+
+def _key_id(api_key: Optional[str]) -> str:
+    """Stable, non-reversible bucket id for an API key"""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class TokenBucket:
+    """Continuously refilling bucket: ``capacity`` units per ``period`` seconds"""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.period = period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_take(self, amount: float) -> float:
+        """Take ``amount`` if available. Returns 0 on success, else seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # A single call larger than the bucket would otherwise wait forever
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def give_back(self, amount: float):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, limit: Optional[float] = None, remaining: Optional[float] = None, reset: Optional[float] = None):
+        """Align the bucket with what the provider reports"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit:
+                self.capacity = float(limit)
+            if remaining is not None:
+                # Never trust our own estimate over the server's count
+                self.tokens = min(self.tokens, float(remaining))
+                if reset and remaining <= 0:
+                    # Empty until the window resets
+                    self.tokens = -reset * self.rate
+
+
+class KeyBudget:
+    """Request and token buckets for one API key"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, period: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute, period)
+        self.tokens = TokenBucket(tokens_per_minute, period)
+        self.queue = asyncio.Lock()
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "waited_seconds": 0.0}
+
+    def snapshot(self) -> Dict:
+        return {
+            "requests_limit": self.requests.capacity,
+            "requests_available": round(self.requests.tokens, 1),
+            "tokens_limit": self.tokens.capacity,
+            "tokens_available": round(self.tokens.tokens, 1),
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.stats.items()},
+        }
+
+
+class GroqRateLimiter:
+    """Per-key RPM/TPM budgeting with pre-emptive queueing and backoff retries"""
+
+    def __init__(
+        self,
+        requests_per_minute: int = None,
+        tokens_per_minute: int = None,
+        max_retries: int = None,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        period: float = 60.0
+    ):
+        self.requests_per_minute = requests_per_minute or settings.GROQ_REQUESTS_PER_MINUTE
+        self.tokens_per_minute = tokens_per_minute or settings.GROQ_TOKENS_PER_MINUTE
+        self.max_retries = settings.GROQ_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.period = period
+        self._budgets: Dict[str, KeyBudget] = {}
+
+    def budget(self, api_key: Optional[str]) -> KeyBudget:
+        key = _key_id(api_key or settings.GROQ_API_KEY)
+        if key not in self._budgets:
+            self._budgets[key] = KeyBudget(self.requests_per_minute, self.tokens_per_minute, self.period)
+        return self._budgets[key]
+
+    async def acquire(self, api_key: Optional[str], tokens: int, requests: int = 1):
+        """Wait until the key has budget for ``requests`` calls using ``tokens`` tokens.
+
+        Waiters for the same key queue in FIFO order, so a large call is not
+        starved by a stream of small ones.
+        """
+        budget = self.budget(api_key)
+        async with budget.queue:
+            for bucket, amount in ((budget.requests, requests), (budget.tokens, tokens)):
+                while True:
+                    wait = bucket.try_take(amount)
+                    if wait <= 0:
+                        break
+                    budget.stats["waited_seconds"] += wait
+                    await asyncio.sleep(wait)
+
+    def release_unused(self, api_key: Optional[str], estimated_tokens: int, actual_tokens: Optional[int]):
+        """Reconcile an estimate with the usage reported by the provider"""
+        if actual_tokens is None:
+            return
+        # A negative difference puts the bucket into debt, delaying the next caller
+        self.budget(api_key).tokens.give_back(estimated_tokens - actual_tokens)
+
+    def update_from_headers(self, api_key: Optional[str], headers: Dict[str, Any]):
+        """Sync buckets with ``x-ratelimit-*`` headers (LiteLLM prefixes them with ``llm_provider-``)"""
+        if not headers:
+            return
+        normalized = {}
+        for name, value in dict(headers).items():
+            name = str(name).lower()
+            if name.startswith("llm_provider-"):
+                name = name[len("llm_provider-"):]
+            normalized[name] = value
+
+        def number(name):
+            try:
+                return float(normalized[name])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        budget = self.budget(api_key)
+        budget.requests.sync(
+            limit=number("x-ratelimit-limit-requests"),
+            remaining=number("x-ratelimit-remaining-requests"),
+            reset=parse_duration(normalized.get("x-ratelimit-reset-requests"))
+        )
+        budget.tokens.sync(
+            limit=number("x-ratelimit-limit-tokens"),
+            remaining=number("x-ratelimit-remaining-tokens"),
+            reset=parse_duration(normalized.get("x-ratelimit-reset-tokens"))
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's retry-after"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return delay
+
+    async def run(
+        self,
+        api_key: Optional[str],
+        estimated_tokens: int,
+        call: Callable[[], Awaitable[Any]],
+        requests: int = 1
+    ) -> Any:
+        """Run ``call`` within the key's budget, retrying rate-limit errors"""
+        budget = self.budget(api_key)
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(api_key, estimated_tokens, requests)
+            budget.stats["calls"] += 1
+            try:
+                return await call()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                budget.stats["rate_limited"] += 1
+                retry_after = retry_after_from_error(e)
+                if attempt >= self.max_retries:
+                    raise RateLimitExceeded(f"Groq rate limit exceeded after {attempt + 1} attempts: {e}", retry_after or 60.0) from e
+                delay = self.backoff(attempt, retry_after)
+                budget.stats["retries"] += 1
+                print(f"⏳ [Groq] Rate limited (attempt {attempt + 1}/{self.max_retries + 1}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {key: budget.snapshot() for key, budget in self._budgets.items()}
+
+
+class _HTTPRateLimitError(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"{response.status_code}: {response.text[:200]}")
+        self.response = response
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for 429s from our HTTP client, LiteLLM or CrewAI wrappers"""
+    if isinstance(error, _HTTPRateLimitError):
+        return True
+    if "RateLimit" in type(error).__name__:
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    # Not a bare "429": token counts and request ids contain it too
+    message = str(error).lower()
+    return "rate limit" in message or "rate_limit" in message
+
+
+def retry_after_from_error(error: Exception) -> Optional[float]:
+    """Extract the wait hint from a ``retry-after`` header or Groq's "try again in 7.66s" message"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after is not None:
+            return retry_after
+    match = _TRY_AGAIN_RE.search(str(error))
+    if match:
+        return parse_duration(match.group(1))
+    return None
+
+
+class GroqClient:
+    """Minimal OpenAI-compatible chat client on a pooled connection"""
+
+    def __init__(self, base_url: str = None, limiter: GroqRateLimiter = None, timeout: float = 60.0):
+        self.base_url = (base_url or settings.GROQ_API_BASE).rstrip("/")
+        self.limiter = limiter or groq_limiter
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        api_key: str = None,
+        model: str = None,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Dict:
+        from .context_builder import count_tokens
+
+        api_key = api_key or settings.GROQ_API_KEY
+        estimated = sum(count_tokens(m.get("content", "")) for m in messages) + max_tokens
+        payload = {
+            "model": model or settings.GROQ_MODEL,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            **kwargs
+        }
+
+        async def call():
+            response = await self.client.post(
+                "/chat/completions",
+                json=payload,
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+            self.limiter.update_from_headers(api_key, response.headers)
+            if response.status_code == 429:
+                raise _HTTPRateLimitError(response)
+            response.raise_for_status()
+            return response.json()
+
+        data = await self.limiter.run(api_key, estimated, call)
+        self.limiter.release_unused(api_key, estimated, (data.get("usage") or {}).get("total_tokens"))
+        return data
+
+
+async def run_crew(crew, api_key: str = None, run: Callable[[], Any] = None) -> Any:
+    """Kick off a CrewAI crew in a worker thread inside the key's Groq budget"""
+    from .context_builder import count_tokens
+
+    # Each task is at least one LLM call: its prompt, earlier task outputs and a completion
+    estimated_tokens = sum(count_tokens(task.description) for task in crew.tasks) + 1024 * len(crew.tasks)
+    return await groq_limiter.run(
+        api_key,
+        estimated_tokens,
+        lambda: asyncio.to_thread(run or crew.kickoff),
+        requests=len(crew.tasks)
+    )
+
+
+def _record_litellm_headers(kwargs, completion_response, start_time, end_time):
+    """LiteLLM success callback: feed provider rate-limit headers back into the limiter"""
+    try:
+        if not str(kwargs.get("model", "")).startswith("groq/") and kwargs.get("custom_llm_provider") != "groq":
+            return
+        hidden = getattr(completion_response, "_hidden_params", None) or {}
+        headers = hidden.get("additional_headers") or {}
+        api_key = kwargs.get("api_key") or (kwargs.get("litellm_params") or {}).get("api_key")
+        groq_limiter.update_from_headers(api_key, headers)
+    except Exception as e:
+        print(f"⚠️ [Groq] Could not record rate-limit headers: {e}")
+
+
+def register_litellm_callback():
+    try:
+        import litellm
+    except ImportError:
+        return
+    if _record_litellm_headers not in litellm.success_callback:
+        litellm.success_callback.append(_record_litellm_headers)
+
+
+groq_limiter = GroqRateLimiter()
+groq_client = GroqClient()
+register_litellm_callback()
@@ -0,0 +1,399 @@
+"""Durable background AI jobs backed by the system database.
+
+Endpoints persist the user's data first, then ``enqueue`` the AI step and
+return straight away. Worker coroutines started in the app lifespan claim
+``AIJob`` rows, run the registered handler and publish the result to the
+user's event stream.
+
+- Leasing: a claimed job is leased to one worker for ``lease_seconds`` and the
+  lease is renewed while the handler runs. If the process dies, the lease
+  expires and another worker picks the job up (visibility timeout).
+- Retries: failures are retried with exponential backoff (``run_after``) up to
+  ``max_attempts``; then the job is dead-lettered (status ``dead``) and the
+  handler's ``on_dead`` hook can write a fallback state for the UI.
+- Fairness: workers serve users round-robin, so one user's burst of jobs does
+  not starve everyone else.
+- Caps: total workers, running jobs per user and running jobs per type.
+
+Per-request Groq keys are kept in memory only and never written to the
+payload; a job picked up by another process falls back to the server key.
+"""
+import asyncio
+import os
+import random
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from config import settings
+from database import SystemSessionLocal
+from .event_stream import event_broker
+from .groq_client import RateLimitExceeded
+
+Handler = Callable[[models.AIJob, Optional[str]], Awaitable[Dict[str, Any]]]
+DeadHook = Callable[[models.AIJob], Awaitable[None]]
+
+# How many claimable jobs to look at when choosing the next tenant
+CLAIM_WINDOW = 100
+
+
+class PermanentJobError(Exception):
+    """A failure retrying cannot fix (missing rows, bad payload): dead-letter immediately"""
+
+
+@dataclass
+class JobType:
+    handler: Handler
+    max_attempts: int
+    concurrency: int
+    on_dead: Optional[DeadHook] = None
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int = None,
+        lease_seconds: int = None,
+        tenant_concurrency: int = None,
+        poll_interval: float = 2.0,
+        base_backoff: float = 5.0,
+        max_backoff: float = 600.0
+    ):
+        self.workers = workers or settings.AI_JOB_WORKERS
+        self.lease_seconds = lease_seconds or settings.AI_JOB_LEASE_SECONDS
+        self.tenant_concurrency = tenant_concurrency or settings.AI_JOB_TENANT_CONCURRENCY
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.types: Dict[str, JobType] = {}
+        self._api_keys: Dict[int, str] = {}
+        self._wakeup = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+        self._last_tenant: Optional[int] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stats = {"succeeded": 0, "retried": 0, "dead": 0, "lease_lost": 0}
+
+    def handler(
+        self,
+        job_type: str,
+        max_attempts: int = None,
+        concurrency: int = None,
+        on_dead: Optional[DeadHook] = None
+    ):
+        """Register ``func(job, api_key) -> result dict`` for a job type"""
+        def decorator(func: Handler) -> Handler:
+            self.types[job_type] = JobType(
+                handler=func,
+                max_attempts=max_attempts or settings.AI_JOB_MAX_ATTEMPTS,
+                concurrency=concurrency or settings.AI_JOB_TYPE_CONCURRENCY,
+                on_dead=on_dead
+            )
+            return func
+        return decorator
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        user: models.User,
+        job_type: str,
+        payload: Dict[str, Any],
+        api_key: Optional[str] = None
+    ) -> models.AIJob:
+        if job_type not in self.types:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+
+        job = models.AIJob(
+            user_id=user.id,
+            github_username=user.github_username,
+            job_type=job_type,
+            status="pending",
+            payload=payload,
+            max_attempts=self.types[job_type].max_attempts,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+
+        if api_key:
+            self._api_keys[job.id] = api_key
+        self._wakeup.set()
+        return job
+
+    async def get(self, db: AsyncSession, job_id: int) -> Optional[models.AIJob]:
+        result = await db.execute(select(models.AIJob).filter(models.AIJob.id == job_id))
+        return result.scalars().first()
+
+    # --- Claiming ---
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(models.AIJob.status == "pending", models.AIJob.run_after <= now),
+            and_(models.AIJob.status == "running", models.AIJob.lease_expires_at < now)
+        )
+
+    @staticmethod
+    def _leased(now: datetime):
+        return and_(models.AIJob.status == "running", models.AIJob.lease_expires_at >= now)
+
+    def _pick(self, candidates: List, running_by_user: Dict[int, int], running_by_type: Dict[str, int]) -> Optional[int]:
+        """Oldest eligible job of the next user in round-robin order"""
+        by_user: Dict[int, List] = {}
+        for job_id, user_id, job_type in candidates:
+            if running_by_user.get(user_id, 0) >= self.tenant_concurrency:
+                continue
+            job_spec = self.types.get(job_type)
+            if job_spec is None or running_by_type.get(job_type, 0) >= job_spec.concurrency:
+                continue
+            by_user.setdefault(user_id, []).append(job_id)
+        if not by_user:
+            return None
+
+        users = sorted(by_user)
+        if self._last_tenant is not None:
+            after = [u for u in users if u > self._last_tenant]
+            users = after + [u for u in users if u <= self._last_tenant]
+        self._last_tenant = users[0]
+        return by_user[users[0]][0]
+
+    async def _claim(self) -> Optional[models.AIJob]:
+        # One claimer per process keeps the caps exact locally. Across processes
+        # the conditional UPDATE prevents double claims; caps are best effort
+        async with self._claim_lock, SystemSessionLocal() as db:
+            for _ in range(5):
+                now = datetime.utcnow()
+                result = await db.execute(
+                    select(models.AIJob.id, models.AIJob.user_id, models.AIJob.job_type)
+                    .filter(self._claimable(now))
+                    .order_by(models.AIJob.id)
+                    .limit(CLAIM_WINDOW)
+                )
+                candidates = result.all()
+                if not candidates:
+                    return None
+
+                result = await db.execute(
+                    select(models.AIJob.user_id, func.count(models.AIJob.id))
+                    .filter(self._leased(now))
+                    .group_by(models.AIJob.user_id)
+                )
+                running_by_user = dict(result.all())
+                result = await db.execute(
+                    select(models.AIJob.job_type, func.count(models.AIJob.id))
+                    .filter(self._leased(now))
+                    .group_by(models.AIJob.job_type)
+                )
+                running_by_type = dict(result.all())
+
+                job_id = self._pick(candidates, running_by_user, running_by_type)
+                if job_id is None:
+                    return None
+
+                # Another process may have claimed it between the select and the update
+                claimed = await db.execute(
+                    update(models.AIJob)
+                    .where(models.AIJob.id == job_id, self._claimable(now))
+                    .values(
+                        status="running",
+                        locked_by=self.worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        started_at=now,
+                        attempts=models.AIJob.attempts + 1
+                    )
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    return await self.get(db, job_id)
+        return None
+
+    # --- Running ---
+
+    async def _renew_lease(self, job: models.AIJob):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            async with SystemSessionLocal() as db:
+                await db.execute(
+                    update(models.AIJob)
+                    .where(models.AIJob.id == job.id, models.AIJob.locked_by == self.worker_id, models.AIJob.status == "running")
+                    .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                )
+                await db.commit()
+
+    async def _settle(self, job: models.AIJob, **values) -> bool:
+        """Write the outcome if we still hold the lease"""
+        async with SystemSessionLocal() as db:
+            result = await db.execute(
+                update(models.AIJob)
+                .where(models.AIJob.id == job.id, models.AIJob.locked_by == self.worker_id, models.AIJob.status == "running")
+                .values(locked_by=None, lease_expires_at=None, **values)
+            )
+            await db.commit()
+        if result.rowcount != 1:
+            self._stats["lease_lost"] += 1
+            print(f"⚠️ [Jobs] Lost the lease on {job.job_type} #{job.id}; another worker owns it now")
+            return False
+        return True
+
+    def _backoff(self, attempts: int, error: Exception) -> float:
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+        delay = random.uniform(delay / 2, delay)
+        if isinstance(error, RateLimitExceeded):
+            delay = max(delay, error.retry_after)
+        return delay
+
+    async def _execute(self, job: models.AIJob):
+        job_spec = self.types[job.job_type]
+        if job.attempts > job.max_attempts:
+            # Reclaimed after its last lease expired: the worker died mid-run every time
+            await self._fail(job, job_spec, PermanentJobError("Lease expired on the final attempt"))
+            return
+
+        api_key = self._api_keys.get(job.id)
+        renew = asyncio.create_task(self._renew_lease(job))
+        try:
+            result = await job_spec.handler(job, api_key)
+        except Exception as e:
+            await self._fail(job, job_spec, e)
+            return
+        finally:
+            renew.cancel()
+
+        if await self._settle(job, status="succeeded", result=result, error=None, finished_at=datetime.utcnow()):
+            self._api_keys.pop(job.id, None)
+            self._stats["succeeded"] += 1
+            event_broker.publish(job.github_username, "job.completed", {
+                "job_id": job.id, "job_type": job.job_type, "result": result
+            })
+
+    @staticmethod
+    def public_error(error: Optional[str]) -> str:
+        """What a client is told about a dead job; the stored error may hold prompts, keys or URLs"""
+        reason = (error or "").lower()
+        if "rate limit" in reason or "ratelimit" in reason or "rate_limit" in reason:
+            return "AI analysis unavailable (rate limited, try again later)"
+        if "timed out" in reason or "timeout" in reason:
+            return "AI analysis unavailable (timed out)"
+        if "lease expired" in reason:
+            return "AI analysis unavailable (interrupted)"
+        return "AI analysis unavailable"
+
+    async def _fail(self, job: models.AIJob, job_spec: JobType, error: Exception):
+        permanent = isinstance(error, PermanentJobError)
+        if not permanent and job.attempts < job.max_attempts:
+            delay = self._backoff(job.attempts, error)
+            print(f"⏳ [Jobs] {job.job_type} #{job.id} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {delay:.0f}s: {error}")
+            if await self._settle(job, status="pending", error=str(error), run_after=datetime.utcnow() + timedelta(seconds=delay)):
+                self._stats["retried"] += 1
+            return
+
+        print(f"❌ [Jobs] {job.job_type} #{job.id} dead-lettered after {job.attempts} attempt(s): {error}")
+        if not await self._settle(job, status="dead", error=str(error), finished_at=datetime.utcnow()):
+            return
+        self._api_keys.pop(job.id, None)
+        self._stats["dead"] += 1
+        if job_spec.on_dead:
+            try:
+                await job_spec.on_dead(job)
+            except Exception as e:
+                print(f"❌ [Jobs] on_dead hook for {job.job_type} #{job.id} failed: {e}")
+        event_broker.publish(job.github_username, "job.failed", {
+            "job_id": job.id, "job_type": job.job_type, "error": self.public_error(str(error))
+        })
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"❌ [Jobs] Worker {index} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._execute(job)
+            # A finished job may unblock a capped tenant or type for idle workers
+            self._wakeup.set()
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"✅ [Jobs] Started {self.workers} AI job worker(s) as {self.worker_id}")
+
+    async def stop(self):
+        """Stop workers; jobs they were running are picked up again once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- Observability ---
+
+    async def stats(self, db: AsyncSession, window_minutes: int = 60) -> Dict[str, Any]:
+        """Queue depth by status and type, and wait/run latency over the recent window"""
+        now = datetime.utcnow()
+
+        result = await db.execute(
+            select(models.AIJob.status, models.AIJob.job_type, func.count(models.AIJob.id))
+            .group_by(models.AIJob.status, models.AIJob.job_type)
+        )
+        depth: Dict[str, Dict[str, int]] = {}
+        for status, job_type, count in result.all():
+            depth.setdefault(status, {})[job_type] = count
+
+        result = await db.execute(
+            select(func.min(models.AIJob.created_at)).filter(models.AIJob.status == "pending")
+        )
+        oldest_pending = result.scalar()
+
+        result = await db.execute(
+            select(models.AIJob.job_type, models.AIJob.created_at, models.AIJob.started_at, models.AIJob.finished_at)
+            .filter(models.AIJob.status == "succeeded", models.AIJob.finished_at >= now - timedelta(minutes=window_minutes))
+        )
+        latency: Dict[str, Dict[str, List[float]]] = {}
+        for job_type, created_at, started_at, finished_at in result.all():
+            entry = latency.setdefault(job_type, {"wait": [], "run": [], "total": []})
+            entry["wait"].append((started_at - created_at).total_seconds())
+            entry["run"].append((finished_at - started_at).total_seconds())
+            entry["total"].append((finished_at - created_at).total_seconds())
+
+        return {
+            "depth": {status: sum(types.values()) for status, types in depth.items()},
+            "depth_by_type": depth,
+            "oldest_pending_seconds": round((now - oldest_pending).total_seconds(), 1) if oldest_pending else None,
+            "latency_seconds": {
+                job_type: {
+                    "count": len(values["total"]),
+                    **{f"{name}_p50": _percentile(v, 50) for name, v in values.items()},
+                    **{f"{name}_p95": _percentile(v, 95) for name, v in values.items()},
+                }
+                for job_type, values in latency.items()
+            },
+            "window_minutes": window_minutes,
+            "workers": len(self._tasks),
+            "worker_id": self.worker_id,
+            **self._stats,
+        }
+
+
+def _percentile(values: List[float], pct: int) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return round(values[index], 2)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,121 @@
+"""Users' local time, so emails and reminders follow each user's day.
+
+Every user has a timezone (an IANA name, ``User.timezone``) and two preferred
+reminder windows:
+
+- ``morning_hour``: the daily digest, and nudges two hours later;
+- ``evening_hour``: the commitment reminders (the urgent one two hours later)
+  and, on Sundays, the weekly review two hours later.
+
+The email jobs no longer send to everyone at 08:00 server time. They run every
+``SLOT_MINUTES`` and take the users whose local hour has come:
+
+- ``local_slots`` reads the timezones in use (one ``DISTINCT`` query) and
+  groups them by their current local date. A group's filter selects the users
+  of those timezones whose window opened within the last ``window_hours``, so
+  a run the scheduler missed is made up by the next one.
+- The fan-out run key of a group is the local date (or ISO week), so the
+  checkpoints send each user one email per local day, also when a DST change
+  repeats an hour.
+
+Users are spread over the hours of their timezones and preferences, so the
+tenant databases see a few users per slot instead of all of them at once.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.sql import ColumnElement
+
+import models
+from database import SystemSessionLocal
+
+DEFAULT_TIMEZONE = "UTC"
+DEFAULT_MORNING_HOUR = 8
+DEFAULT_EVENING_HOUR = 18
+# Hours a user may choose; the later emails of a window stay on the same day
+MORNING_HOURS = range(5, 12)
+EVENING_HOURS = range(15, 22)
+SLOT_MINUTES = 15
+
+# Users' preferences with the defaults applied, for filters
+timezone_column = func.coalesce(models.User.timezone, DEFAULT_TIMEZONE)
+morning_hour = func.coalesce(models.User.morning_hour, DEFAULT_MORNING_HOUR)
+evening_hour = func.coalesce(models.User.evening_hour, DEFAULT_EVENING_HOUR)
+
+
+@lru_cache(maxsize=1024)
+def zone(name: Optional[str]) -> ZoneInfo:
+    """The zone called ``name``; UTC when unset or unknown"""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def local_now(tz_name: Optional[str], now: datetime = None) -> datetime:
+    """Wall clock time in ``tz_name`` at ``now`` (naive UTC, default the current time), naive"""
+    now = now or datetime.utcnow()
+    return now.replace(tzinfo=dt_timezone.utc).astimezone(zone(tz_name)).replace(tzinfo=None)
+
+
+def to_utc(local: datetime, tz_name: Optional[str]) -> datetime:
+    """Naive wall clock time in ``tz_name`` as naive UTC"""
+    return local.replace(tzinfo=zone(tz_name)).astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class LocalSlot:
+    day: date # Local date of every timezone in the group
+    filter: ColumnElement # On models.User
+    timezones: List[str]
+    ends_at: datetime # Naive UTC; the group's earliest local midnight
+
+
+async def timezones_in_use() -> List[str]:
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(timezone_column).distinct())
+        return [name for name, in result.all()]
+
+
+async def local_slots(hour: ColumnElement, window_hours: int, weekday: int = None, now: datetime = None) -> List[LocalSlot]:
+    """Users whose local ``hour`` came within the last ``window_hours``, grouped by local date
+
+    ``hour`` is a column expression such as ``morning_hour + 2``; with
+    ``weekday`` (Monday is 0) only local dates on that day are included.
+    """
+    now = now or datetime.utcnow()
+    by_day: Dict[date, Dict[int, List[str]]] = defaultdict(lambda: defaultdict(list))
+    ends_at: Dict[date, datetime] = {}
+    for name in await timezones_in_use():
+        local = local_now(name, now)
+        if weekday is not None and local.weekday() != weekday:
+            continue
+        by_day[local.date()][local.hour].append(name)
+        midnight = to_utc(datetime.combine(local.date() + timedelta(days=1), time()), name)
+        ends_at[local.date()] = min(ends_at.get(local.date(), midnight), midnight)
+
+    slots = []
+    for day, hours in sorted(by_day.items()):
+        slots.append(LocalSlot(
+            day=day,
+            filter=or_(*(
+                and_(timezone_column.in_(names), hour <= local_hour, hour > local_hour - window_hours)
+                for local_hour, names in hours.items()
+            )),
+            timezones=sorted(name for names in hours.values() for name in names),
+            ends_at=ends_at[day]
+        ))
+    return slots
@@ -0,0 +1,128 @@
+"""Notification rules, evaluated when something changes instead of by polling.
+
+``NotificationService.run_all_checks`` re-reads a user's check-ins,
+milestones, notifications and decisions on every run. Here each domain event
+runs only the check it can affect, for that user, seconds after the write:
+
+- ``checkin.created``: commitment reminders are scheduled for the user's
+  evening hour and two hours later, in their timezone, that day;
+- ``checkin.reviewed``: the reminders are cancelled and pattern alerts
+  (declining energy, missed commitments) are evaluated; a shipped commitment
+  also evaluates streak achievements, since the shipping streak just grew;
+- ``streak.changed``: streak achievements are evaluated (activity streaks
+  change once a day, not on every shipped commitment);
+- ``milestones.created``: a reminder is scheduled a week before each target date;
+- ``decision.created``: reflections are scheduled 30, 60 and 90 days later.
+
+Time-based triggers run on the timer wheel and call the same checks, so the
+notifications and their de-duplication are unchanged. A user who does nothing
+triggers nothing and costs no queries.
+"""
+from datetime import datetime, time, timedelta
+from typing import Any, Dict
+
+from sqlalchemy import select
+
+import models
+from database import SystemSessionLocal, user_session_scope
+from . import local_time
+from .domain_events import DomainEvent, domain_events
+from .notification_service import NotificationService
+from .timer_wheel import timer_wheel
+
+# Reminders after the start of the user's evening window (local_time.evening_hour)
+REMINDER_OFFSETS = (0, 2)
+MILESTONE_LEAD_DAYS = 7
+REFLECTION_DAYS = (30, 60, 90)
+# check_decision_reflection looks at decisions made within this many days of the interval
+REFLECTION_WINDOW_DAYS = 2
+
+
+def _reminder_keys(checkin_id: int):
+    return [f"commitment_reminder:{checkin_id}:{offset}" for offset in REMINDER_OFFSETS]
+
+
+# --- Events ---
+
+@domain_events.on("checkin.created")
+async def schedule_commitment_reminders(event: DomainEvent):
+    checkin_id = event.data["checkin_id"]
+    async with SystemSessionLocal() as db:
+        result = await db.execute(
+            select(models.User.timezone, models.User.evening_hour).filter(models.User.id == event.user_id)
+        )
+        timezone, evening_hour = result.first() or (None, None)
+    evening_hour = evening_hour or local_time.DEFAULT_EVENING_HOUR
+    now = datetime.utcnow()
+    today = local_time.local_now(timezone, now).date()
+    for offset, key in zip(REMINDER_OFFSETS, _reminder_keys(checkin_id)):
+        fire_at = local_time.to_utc(datetime.combine(today, time(evening_hour + offset)), timezone)
+        if fire_at > now:
+            await timer_wheel.schedule("commitment_reminder", event.user_id, key, fire_at, {"checkin_id": checkin_id})
+
+
+@domain_events.on("checkin.reviewed")
+async def on_commitment_reviewed(event: DomainEvent):
+    await timer_wheel.cancel(*_reminder_keys(event.data["checkin_id"]))
+    if event.database_url:
+        async with user_session_scope(event.database_url) as db:
+            await NotificationService.check_pattern_alerts(db, event.user_id)
+            if event.data.get("shipped"):
+                # De-duplicated per day, also against streak.changed
+                await NotificationService.check_streak_achievements(db, event.user_id)
+
+
+@domain_events.on("streak.changed")
+async def celebrate_streak(event: DomainEvent):
+    if event.database_url:
+        async with user_session_scope(event.database_url) as db:
+            await NotificationService.check_streak_achievements(db, event.user_id)
+
+
+@domain_events.on("milestones.created")
+async def schedule_milestone_reminders(event: DomainEvent):
+    now = datetime.utcnow()
+    for milestone in event.data["milestones"]:
+        if not milestone.get("target_date"):
+            continue
+        target = datetime.fromisoformat(milestone["target_date"])
+        if target > now:
+            await timer_wheel.schedule(
+                "milestone_due", event.user_id, f"milestone_due:{milestone['id']}",
+                max(now, target - timedelta(days=MILESTONE_LEAD_DAYS)), {"milestone_id": milestone["id"]}
+            )
+
+
+@domain_events.on("decision.created")
+async def schedule_decision_reflections(event: DomainEvent):
+    decided_at = datetime.fromisoformat(event.data["timestamp"])
+    for days in REFLECTION_DAYS:
+        await timer_wheel.schedule(
+            "decision_reflection", event.user_id, f"decision_reflection:{event.data['decision_id']}:{days}",
+            decided_at + timedelta(days=days - REFLECTION_WINDOW_DAYS), {"decision_id": event.data["decision_id"], "days": days}
+        )
+
+
+# --- Timers ---
+
+@timer_wheel.handler("commitment_reminder")
+async def send_commitment_reminder(user: models.User, payload: Dict[str, Any]):
+    # The check sends nothing once the commitment is reviewed, and at most one
+    # reminder per check-in and level (dedup_key "<checkin id>:high" or ":urgent")
+    if user.neon_db_url:
+        async with user_session_scope(user.neon_db_url) as db:
+            await NotificationService.check_commitment_reminder(db, user.id, user.timezone, user.evening_hour)
+
+
+@timer_wheel.handler("milestone_due")
+async def send_milestone_reminder(user: models.User, payload: Dict[str, Any]):
+    if user.neon_db_url:
+        async with user_session_scope(user.neon_db_url) as db:
+            await NotificationService.check_goal_milestones(db, user.id)
+
+
+@timer_wheel.handler("decision_reflection")
+async def send_decision_reflection(user: models.User, payload: Dict[str, Any]):
+    if user.neon_db_url:
+        async with user_session_scope(user.neon_db_url) as db:
+            await NotificationService.check_decision_reflection(db, user.id)
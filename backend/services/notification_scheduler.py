@@ -1,140 +1,154 @@
-```
-import time
-import schedule
+"""Notification and email jobs, run by the cron scheduler (``services.scheduler``).
+
+The email jobs run every ``SLOT_MINUTES`` and send to the users whose local
+reminder window has come (``services.local_time``), so each user gets them at
+their own morning or evening and the load is spread over the day.
+
+The jobs start with the API by default. To run them in their own process
+instead, set ``SCHEDULER_ENABLED=false`` for the API and start a worker from
+``backend/``:
+
+    python -m services.notification_scheduler
+"""
 import asyncio
-from database import SystemSessionLocal, get_user_db_engine
-from sqlalchemy import select
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import AsyncSession
+from functools import partial
+from typing import Callable
+from database import init_system_db, user_session_scope
+from sqlalchemy import Row
 import models
-from services import email_service
-from datetime import datetime
+from services import email_service, github_refresh_scheduler, local_time, sage_crew
+from services.digest_stats import DigestStats
+from services.fanout import FanOutContext, fan_out, pending_filter
+from services.scheduler import scheduler
+from services.timer_wheel import timer_wheel
+from services.user_stream import count_users, stream_users
+from datetime import date, datetime, timedelta
 
+SLOT_CRON = f"*/{local_time.SLOT_MINUTES} * * * *"
+# A user's email still goes out this many hours after their window opened
+# (the worker was down, or a run took long)
+SEND_WINDOW_HOURS = 4
+# Attempts per user and run key before a failing send is left alone
+MAX_SEND_ATTEMPTS = 3
+NUDGE_DELAY_HOURS = 2
+WEEKLY_REVIEW_DELAY_HOURS = 2
+
+@scheduler.job("check_notifications", "*/5 * * * *")
 async def check_notifications():
-    """Check notifications for all active users (Async)"""
-    async with SystemSessionLocal() as db:
-        try:
-            result = await db.execute(select(models.User))
-            users = result.scalars().all()
-            
-            print(f"🔔 Checking notifications for {len(users)} users...")
-            # Logic for notifications would go here, potentially using NotificationService
-            # For now, we just print
-            
-        except Exception as e:
-            print(f"❌ Error in notification check: {str(e)}")
+    """Arm the notification timers coming due; the rules run on domain events, not by polling users"""
+    try:
+        armed = await timer_wheel.load()
+        if armed:
+            print(f"🔔 Armed {armed} notification timer(s)")
+    except Exception as e:
+        print(f"❌ Error in notification check: {str(e)}")
+
+async def _fan_out_emails(job_name: str, run_key: str, handler, *filters, prefetch: DigestStats = None, **options):
+    """Fan ``handler`` out over the users with an email address matching ``filters``
+
+    With ``prefetch``, each batch's digest stats are loaded before its users are handled.
+    """
+    filters = (models.User.email != None, *filters)
+    total = await count_users(*filters)
+    if not total:
+        return None
+    batches = stream_users(*filters)
+    if prefetch is not None:
+        batches = prefetch.batches(batches)
+    return await fan_out(job_name, run_key, batches, handler, total=total, **options)
+
+async def _fan_out_local(job_name: str, hour, run_key: Callable[[date], str], handler, *filters, weekday: int = None, **options) -> int:
+    """``_fan_out_emails`` for each local date, over the users whose local ``hour`` has come
+
+    Users already sent to under the day's run key are left out of the query.
+    Returns how many users were handled.
+    """
+    handled = 0
+    for slot in await local_time.local_slots(hour, SEND_WINDOW_HOURS, weekday=weekday):
+        key = run_key(slot.day)
+        report = await _fan_out_emails(
+            job_name, key, handler, slot.filter, pending_filter(job_name, key, MAX_SEND_ATTEMPTS), *filters,
+            deadline=slot.ends_at, **options
+        )
+        handled += report["processed"] if report else 0
+    return handled
 
+def _check_sent(sent: bool):
+    # send_email reports failures instead of raising; without an API key it only logs
+    if not sent and email_service.api_key:
+        raise RuntimeError("Email was not accepted by the provider")
+
+async def _send_daily_digest(digests: DigestStats, user: Row, ctx: FanOutContext):
+    # Streak, today's tasks and due problems, loaded for the whole batch by DigestStats
+    stats = await digests.pop(user)
+    # The run key is the user's local date
+    _check_sent(await email_service.send_daily_digest(user.email, user.github_username, stats, date.fromisoformat(ctx.run_key)))
+
+@scheduler.job("daily_digest", SLOT_CRON, jitter=60, catch_up=local_time.SLOT_MINUTES * 60)
 async def process_daily_emails():
-    """Send daily digest emails"""
-    print("📧 Processing daily emails...")
-    async with SystemSessionLocal() as system_db:
-        try:
-            result = await system_db.execute(select(models.User))
-            users = result.scalars().all()
-            
-            for user in users:
-                if not user.email or not user.neon_db_url:
-                    continue
-                    
-                try:
-                    # In a real implementation, we would fetch user stats here
-                    # For now, we send a generic digest
-                    stats = {
-                        "streak": 0, # Placeholder
-                        "pending_tasks": ["Check your Action Plan", "Review your Goals"],
-                        "quote": "Consistency is the key to mastery."
-                    }
-                    await email_service.send_daily_digest(user.email, user.github_username, stats)
-                except Exception as e:
-                    print(f"❌ Error sending daily email to {user.github_username}: {e}")
-        except Exception as e:
-             print(f"❌ Error fetching users for daily email: {e}")
+    """Send daily digest emails at each user's morning hour"""
+    digests = DigestStats()
+    handled = await _fan_out_local(
+        "daily_digest", local_time.morning_hour, date.isoformat, partial(_send_daily_digest, digests),
+        models.User.neon_db_url != None, prefetch=digests
+    )
+    if handled:
+        print(f"📊 [Digest] {digests.counters}")
+
+async def _send_weekly_review(user: Row, ctx: FanOutContext):
+    # Take the LLM slot before opening the tenant session, so no connection idles in the queue
+    async with ctx.llm, user_session_scope(user.neon_db_url) as user_db:
+        report = await sage_crew.weekly_goals_review(user.id, user_db)
+    _check_sent(await email_service.send_weekly_review(user.email, user.github_username, report))
+    print(f"✅ Sent weekly review to {user.github_username}")
 
+def _iso_week(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+@scheduler.job("weekly_review", SLOT_CRON, jitter=60, catch_up=local_time.SLOT_MINUTES * 60, timeout=6 * 3600)
 async def process_weekly_emails():
-    """Send weekly review emails"""
-    print("📧 Processing weekly emails...")
-    async with SystemSessionLocal() as system_db:
-        try:
-            result = await system_db.execute(select(models.User))
-            users = result.scalars().all()
-            
-            for user in users:
-                if not user.email or not user.neon_db_url:
-                    continue
-                    
-                try:
-                    # Create user DB session
-                    engine = get_user_db_engine(user.neon_db_url)
-                    UserSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-                    
-                    async with UserSessionLocal() as user_db:
-                        # Generate report using Sage Crew
-                        from services import sage_crew
-                        report = await sage_crew.weekly_goals_review(user.id, user_db)
-                        
-                        # Send email
-                        await email_service.send_weekly_review(user.email, user.github_username, report)
-                        print(f"✅ Sent weekly review to {user.github_username}")
-                    
-                except Exception as e:
-                    print(f"❌ Error sending weekly email to {user.github_username}: {e}")
-        except Exception as e:
-             print(f"❌ Error fetching users for weekly email: {e}")
+    """Send weekly review emails on Sunday evening, local time; meant to be done by the user's midnight"""
+    await _fan_out_local(
+        "weekly_review", local_time.evening_hour + WEEKLY_REVIEW_DELAY_HOURS, _iso_week, _send_weekly_review,
+        models.User.neon_db_url != None, weekday=6
+    )
+
+async def _send_nudge(user: Row, ctx: FanOutContext):
+    days_inactive = (datetime.utcnow() - user.last_activity_date).days
+    _check_sent(await email_service.send_nudge_email(user.email, user.github_username, days_inactive))
+    print(f"✅ Sent nudge email to {user.github_username} ({days_inactive} days inactive)")
 
+@scheduler.job("nudge_emails", SLOT_CRON, jitter=60, catch_up=local_time.SLOT_MINUTES * 60)
 async def process_nudge_emails():
-    """Send nudge emails to inactive users"""
-    print("📧 Processing nudge emails...")
-    async with SystemSessionLocal() as system_db:
-        try:
-            result = await system_db.execute(select(models.User))
-            users = result.scalars().all()
-            
-            for user in users:
-                if not user.email:
-                    continue
-                
-                # Check inactivity
-                if user.last_activity_date:
-                    days_inactive = (datetime.utcnow() - user.last_activity_date).days
-                    if days_inactive >= 2:
-                        try:
-                            await email_service.send_nudge_email(user.email, user.github_username, days_inactive)
-                            print(f"✅ Sent nudge email to {user.github_username} ({days_inactive} days inactive)")
-                        except Exception as e:
-                            print(f"❌ Error sending nudge to {user.github_username}: {e}")
-        except Exception as e:
-            print(f"❌ Error checking inactivity: {e}")
-
-def run_async_job(job_func):
-    """Helper to run async jobs synchronously"""
-    asyncio.run(job_func())
-
-def run_scheduler():
-    """Run the notification scheduler"""
+    """Send nudge emails to inactive users, a little after their morning hour"""
+    await _fan_out_local(
+        "nudge_emails", local_time.morning_hour + NUDGE_DELAY_HOURS, date.isoformat, _send_nudge,
+        models.User.last_activity_date <= datetime.utcnow() - timedelta(days=2)
+    )
+
+async def run_scheduler():
+    """Run the scheduled jobs in this process until interrupted"""
     print("🚀 Starting Sage Scheduler...")
-    print("⏰ Schedule:")
-    print("   - Notifications: Every 30 mins")
-    print("   - Daily Digest: 08:00 AM")
-    print("   - Weekly Review: Sunday 08:00 PM")
-    print("   - Nudge Emails: Daily 10:00 AM")
+    print("⏰ Schedule (UTC; emails follow each user's local time):")
+    for job in scheduler.jobs.values():
+        print(f"   - {job.name}: {job.cron.expression}")
     print("Press Ctrl+C to stop\n")
     
-    # Schedule jobs
-    schedule.every(30).minutes.do(lambda: run_async_job(check_notifications))
-    schedule.every().day.at("08:00").do(lambda: run_async_job(process_daily_emails))
-    schedule.every().sunday.at("20:00").do(lambda: run_async_job(process_weekly_emails))
-    schedule.every().day.at("10:00").do(lambda: run_async_job(process_nudge_emails))
-    
-    # Run once on startup for testing (optional, maybe comment out in prod)
-    # run_async_job(check_notifications)
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    await init_system_db()
+    await scheduler.start()
+    await timer_wheel.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await timer_wheel.stop()
+        await scheduler.stop()
+        # Flush queued emails and let batches in flight finish, as the API does on shutdown
+        await email_service.close()
+        await github_refresh_scheduler.close()
 
 if __name__ == "__main__":
     try:
-        run_scheduler()
+        asyncio.run(run_scheduler())
     except KeyboardInterrupt:
         print("\n\n👋 Scheduler stopped")
-```
\ No newline at end of file
@@ -0,0 +1,420 @@
+"""Asyncio cron scheduler for periodic jobs.
+
+Jobs are coroutine functions registered with a cron expression. They run as
+tasks on one long-lived event loop, either the API's (started in the app
+lifespan) or a standalone worker's (``python -m services.notification_scheduler``),
+so database engines and HTTP clients stay bound to the loop that created
+them, and a slow job does not hold up the others.
+
+- Cron: five fields (minute, hour, day of month, month, day of week) in UTC,
+  with ``*``, lists, ranges, ``/`` steps and names (``mon``, ``jan``).
+- Overlap: a job does not start while its previous run is still going, in this
+  process or, judging by the leases in ``SchedulerJobRun``, in another one.
+- Several processes: a run is claimed by inserting its ``SchedulerJobRun`` row;
+  the unique (job, slot) key lets exactly one process run each slot.
+- Catch-up: on start, the latest slot missed within the job's ``catch_up``
+  window (a deploy at 08:00) runs once; older misses are dropped. A run cut
+  short in that window (shutdown, or a crash: its lease stops being renewed)
+  is started again; fan-out jobs then skip the users they already finished.
+- Jitter: a run starts up to ``jitter`` seconds after its slot, so jobs that
+  share a slot do not all hit the databases at the same instant.
+- Metrics: the duration and outcome of every run are stored; ``stats`` reports
+  p50/p95 durations, failures and skipped runs per job.
+"""
+import asyncio
+import os
+import random
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import SystemSessionLocal
+from .job_queue import _percentile
+
+JobFunc = Callable[[], Awaitable[Any]]
+
+MONTHS = {name: i for i, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1
+)}
+WEEKDAYS = {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+# Longest single sleep; wall clock jumps (suspend, NTP) are noticed within this
+MAX_SLEEP = 300
+# Recent durations kept per job for the in-process metrics
+DURATION_HISTORY = 100
+# Lease of a running run, renewed every third of it
+LEASE_SECONDS = 180
+
+
+class CronSchedule:
+    """Standard five-field cron expression, evaluated in UTC"""
+
+    # (lowest, highest, names) per field; day of week accepts 7 for Sunday
+    FIELDS = ((0, 59, None), (0, 23, None), (1, 31, None), (1, 12, MONTHS), (0, 7, WEEKDAYS))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron expression '{expression}' must have 5 fields")
+        self.expression = expression
+        minutes, hours, days, months, weekdays = (
+            self._parse(part, *spec) for part, spec in zip(parts, self.FIELDS)
+        )
+        self.minutes, self.hours = sorted(minutes), sorted(hours)
+        self.days, self.months = days, months
+        self.weekdays = {d % 7 for d in weekdays}
+        # Like cron: when both day fields are restricted, either may match
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(part: str, lo: int, hi: int, names: Optional[Dict[str, int]]) -> Set[int]:
+        def value(token: str) -> int:
+            number = (names or {}).get(token)
+            return number if number is not None else int(token)
+
+        values: Set[int] = set()
+        for item in part.lower().split(","):
+            base, _, step = item.partition("/")
+            try:
+                if base == "*":
+                    start, end = lo, hi
+                elif "-" in base:
+                    start, end = (value(token) for token in base.split("-", 1))
+                else:
+                    start = value(base)
+                    end = hi if step else start
+                step = int(step) if step else 1
+            except ValueError:
+                raise ValueError(f"invalid cron field '{part}'")
+            if not lo <= start <= end <= hi or step < 1:
+                raise ValueError(f"cron field '{part}' out of range {lo}-{hi}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return in_week
+        if self._any_weekday:
+            return in_month
+        return in_month or in_week
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First slot strictly after ``moment`` (naive UTC)"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        # Four years covers schedules that only match on Feb 29
+        for _ in range(4 * 366 + 1):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        slot = datetime(day.year, day.month, day.day, hour, minute)
+                        if slot >= start:
+                            return slot
+            day += timedelta(days=1)
+        raise ValueError(f"cron expression '{self.expression}' never fires")
+
+
+def _interrupted(run: models.SchedulerJobRun, now: datetime) -> bool:
+    if run.status == "interrupted":
+        return True
+    return run.status == "running" and (run.lease_expires_at is None or run.lease_expires_at <= now)
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    cron: CronSchedule
+    func: JobFunc
+    jitter: int # Seconds; each run starts at a random point this long after its slot
+    catch_up: int # Seconds; a slot missed this recently still runs on start
+    timeout: int # Seconds
+    next_run: Optional[datetime] = None
+    durations: Deque[float] = field(default_factory=lambda: deque(maxlen=DURATION_HISTORY))
+    counters: Dict[str, int] = field(default_factory=lambda: {
+        "runs": 0, "failed": 0, "timed_out": 0, "caught_up": 0, "skipped_overlap": 0, "skipped_claimed": 0
+    })
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._loops: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def add(
+        self,
+        name: str,
+        cron: str,
+        func: JobFunc,
+        jitter: int = 0,
+        catch_up: int = 0,
+        timeout: int = 3600
+    ) -> ScheduledJob:
+        schedule = CronSchedule(cron)
+        schedule.next_after(datetime.utcnow()) # Fail at import time on dates that never occur
+        job = self.jobs[name] = ScheduledJob(name, schedule, func, jitter, catch_up, timeout)
+        return job
+
+    def job(self, name: str, cron: str, **options):
+        """Decorator form of ``add``"""
+        def register(func: JobFunc) -> JobFunc:
+            self.add(name, cron, func, **options)
+            return func
+        return register
+
+    # --- Running ---
+
+    async def _sleep_until(self, moment: datetime):
+        while True:
+            remaining = (moment - datetime.utcnow()).total_seconds()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, MAX_SLEEP))
+
+    async def _missed_slot(self, job: ScheduledJob) -> Tuple[Optional[datetime], Optional[int]]:
+        """Latest slot within the catch-up window that no process ran to the end
+
+        Returns the slot and, when its run was interrupted, the run's id.
+        """
+        if not job.catch_up:
+            return None, None
+        now = datetime.utcnow()
+        window_start = now - timedelta(seconds=job.catch_up)
+        async with SystemSessionLocal() as db:
+            result = await db.execute(
+                select(models.SchedulerJobRun)
+                .filter(models.SchedulerJobRun.job_name == job.name)
+                .order_by(models.SchedulerJobRun.scheduled_for.desc())
+                .limit(1)
+            )
+            last_run = result.scalars().first()
+        if last_run is None:
+            # First deployment of this job: nothing was missed
+            return None, None
+        if last_run.scheduled_for >= window_start and _interrupted(last_run, now):
+            return last_run.scheduled_for, last_run.id
+
+        slot, cursor = None, max(last_run.scheduled_for, window_start)
+        while True:
+            cursor = job.cron.next_after(cursor)
+            if cursor > now:
+                return slot, None
+            slot = cursor
+
+    def _launch(self, job: ScheduledJob, slot: datetime, caught_up: bool = False, resume_id: int = None):
+        running = self._running.get(job.name)
+        if running and not running.done():
+            job.counters["skipped_overlap"] += 1
+            print(f"⚠️ [Scheduler] {job.name} is still running; skipping the {slot:%Y-%m-%d %H:%M} run")
+            return
+        self._running[job.name] = asyncio.create_task(self._execute(job, slot, caught_up, resume_id))
+
+    async def _claim(self, job: ScheduledJob, slot: datetime, caught_up: bool, resume_id: int = None) -> Optional[int]:
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=LEASE_SECONDS)
+        async with SystemSessionLocal() as db:
+            result = await db.execute(
+                select(func.count(models.SchedulerJobRun.id)).filter(
+                    models.SchedulerJobRun.job_name == job.name,
+                    models.SchedulerJobRun.status == "running",
+                    models.SchedulerJobRun.lease_expires_at > now
+                )
+            )
+            if result.scalar():
+                job.counters["skipped_overlap"] += 1
+                print(f"⚠️ [Scheduler] {job.name} is still running elsewhere; skipping the {slot:%Y-%m-%d %H:%M} run")
+                return None
+
+            if resume_id:
+                # Take the interrupted run over unless another process just did
+                result = await db.execute(
+                    update(models.SchedulerJobRun)
+                    .where(
+                        models.SchedulerJobRun.id == resume_id,
+                        or_(
+                            models.SchedulerJobRun.status == "interrupted",
+                            and_(models.SchedulerJobRun.status == "running", models.SchedulerJobRun.lease_expires_at <= now)
+                        )
+                    )
+                    .values(status="running", worker_id=self.worker_id, caught_up=True, started_at=now, lease_expires_at=lease)
+                )
+                await db.commit()
+                if result.rowcount != 1:
+                    job.counters["skipped_claimed"] += 1
+                    return None
+                return resume_id
+
+            run = models.SchedulerJobRun(
+                job_name=job.name,
+                scheduled_for=slot,
+                status="running",
+                worker_id=self.worker_id,
+                caught_up=caught_up,
+                started_at=now,
+                lease_expires_at=lease
+            )
+            db.add(run)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another process claimed this slot
+                await db.rollback()
+                job.counters["skipped_claimed"] += 1
+                return None
+            return run.id
+
+    async def _renew_lease(self, run_id: int):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            try:
+                async with SystemSessionLocal() as db:
+                    await db.execute(
+                        update(models.SchedulerJobRun)
+                        .where(models.SchedulerJobRun.id == run_id, models.SchedulerJobRun.worker_id == self.worker_id)
+                        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS))
+                    )
+                    await db.commit()
+            except Exception as e:
+                print(f"⚠️ [Scheduler] Could not renew the lease of run {run_id}: {e}")
+
+    async def _finish(self, run_id: int, status: str, duration: float, error: Optional[str]):
+        async with SystemSessionLocal() as db:
+            await db.execute(
+                update(models.SchedulerJobRun)
+                .where(models.SchedulerJobRun.id == run_id)
+                .values(status=status, finished_at=datetime.utcnow(), duration_seconds=round(duration, 3), error=error)
+            )
+            await db.commit()
+
+    async def _execute(self, job: ScheduledJob, slot: datetime, caught_up: bool, resume_id: int = None):
+        try:
+            run_id = await self._claim(job, slot, caught_up, resume_id)
+        except Exception as e:
+            print(f"❌ [Scheduler] Could not claim {job.name}: {e}")
+            return
+        if run_id is None:
+            return
+
+        status, error = "succeeded", None
+        started = time.perf_counter()
+        renew = asyncio.create_task(self._renew_lease(run_id))
+        try:
+            await asyncio.wait_for(job.func(), timeout=job.timeout)
+        except asyncio.TimeoutError:
+            status, error = "timed_out", f"Exceeded {job.timeout}s"
+            print(f"⏳ [Scheduler] {job.name} timed out after {job.timeout}s")
+        except asyncio.CancelledError:
+            await self._finish(run_id, "interrupted", time.perf_counter() - started, "Cancelled at shutdown")
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)[:2000]
+            print(f"❌ [Scheduler] {job.name} failed: {e}")
+        finally:
+            renew.cancel()
+        duration = time.perf_counter() - started
+
+        job.durations.append(duration)
+        job.counters["runs"] += 1
+        job.counters["caught_up"] += caught_up
+        if status != "succeeded":
+            job.counters[status] += 1
+        try:
+            await self._finish(run_id, status, duration, error)
+        except Exception as e:
+            print(f"❌ [Scheduler] Could not record the {job.name} run: {e}")
+
+    async def _loop(self, job: ScheduledJob):
+        try:
+            missed, resume_id = await self._missed_slot(job)
+        except Exception as e:
+            missed, resume_id = None, None
+            print(f"❌ [Scheduler] Could not check missed runs of {job.name}: {e}")
+        if missed:
+            what = "Resuming" if resume_id else "Catching up on"
+            print(f"🔄 [Scheduler] {what} {job.name} of {missed:%Y-%m-%d %H:%M}")
+            self._launch(job, missed, caught_up=True, resume_id=resume_id)
+
+        after = datetime.utcnow()
+        while True:
+            slot = job.next_run = job.cron.next_after(after)
+            await self._sleep_until(slot + timedelta(seconds=random.uniform(0, job.jitter)))
+            self._launch(job, slot)
+            # After a suspend, skip the slots that passed meanwhile instead of running each
+            after = max(slot, datetime.utcnow() - timedelta(seconds=job.jitter))
+
+    async def start(self):
+        self._loops = [asyncio.create_task(self._loop(job)) for job in self.jobs.values()]
+        print(f"✅ [Scheduler] Started {len(self._loops)} scheduled job(s) as {self.worker_id}")
+
+    async def stop(self):
+        """Cancel the loops and any runs in progress (recorded as interrupted)"""
+        tasks = self._loops + list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops = []
+        self._running = {}
+
+    # --- Observability ---
+
+    async def stats(self, db: AsyncSession, window_hours: int = 24) -> Dict[str, Any]:
+        """Per job: schedule, next run, outcomes and durations over the recent window"""
+        since = datetime.utcnow() - timedelta(hours=window_hours)
+        result = await db.execute(
+            select(
+                models.SchedulerJobRun.job_name,
+                models.SchedulerJobRun.status,
+                models.SchedulerJobRun.duration_seconds,
+                models.SchedulerJobRun.scheduled_for,
+                models.SchedulerJobRun.started_at
+            )
+            .filter(models.SchedulerJobRun.started_at >= since)
+            .order_by(models.SchedulerJobRun.started_at)
+        )
+        runs: Dict[str, Dict[str, Any]] = {}
+        for name, status, duration, scheduled_for, started_at in result.all():
+            entry = runs.setdefault(name, {"by_status": {}, "durations": [], "start_delays": []})
+            entry["by_status"][status] = entry["by_status"].get(status, 0) + 1
+            if duration is not None:
+                entry["durations"].append(duration)
+            entry["start_delays"].append((started_at - scheduled_for).total_seconds())
+            entry["last_started_at"] = started_at
+            entry["last_status"] = status
+
+        jobs = {}
+        for name, job in self.jobs.items():
+            entry = runs.get(name, {"by_status": {}, "durations": [], "start_delays": []})
+            running = self._running.get(name)
+            jobs[name] = {
+                "cron": job.cron.expression,
+                "next_run": job.next_run,
+                "running_here": bool(running and not running.done()),
+                "last_started_at": entry.get("last_started_at"),
+                "last_status": entry.get("last_status"),
+                "runs_by_status": entry["by_status"],
+                "duration_p50": _percentile(entry["durations"], 50),
+                "duration_p95": _percentile(entry["durations"], 95),
+                "duration_max": round(max(entry["durations"]), 2) if entry["durations"] else None,
+                "start_delay_p95": _percentile(entry["start_delays"], 95),
+                "this_process": {
+                    **job.counters,
+                    "duration_p50": _percentile(list(job.durations), 50),
+                },
+            }
+        return {"window_hours": window_hours, "worker_id": self.worker_id, "jobs": jobs}
+
+
+scheduler = Scheduler()
@@ -0,0 +1,329 @@
+"""Structured agent output: JSON blocks validated into Pydantic models.
+
+Agents are asked to end their answer with a JSON object matching a schema
+(``schema_prompt``). ``JSONScanner`` finds top-level objects in one pass over
+the text, string-aware so braces inside values do not confuse it, and can be
+fed chunk by chunk as output streams in. The last object that validates wins.
+
+When the block is malformed (truncated, trailing commas, wrong types) only that
+fragment is sent back to the model in JSON mode together with the schema and
+the validation error, instead of re-running the whole crew. Callers keep their
+old heuristics as a last resort for answers with no JSON at all.
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Literal, Optional, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from .groq_client import groq_client
+from .context_builder import count_tokens
+
+M = TypeVar("M", bound=BaseModel)
+
+
+# --- Output models ---
+
+class Action(BaseModel):
+    action: str
+    priority: Literal["high", "medium", "low"] = "medium"
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _priority(cls, value):
+        value = str(value or "medium").lower()
+        if value == "critical":
+            return "high"
+        return value if value in ("high", "medium", "low") else "medium"
+
+
+class PlanProposal(BaseModel):
+    type: Literal["plan_proposal"] = "plan_proposal"
+    title: str
+    description: str = ""
+    focus_area: str = ""
+    skills: List[str] = Field(default_factory=list)
+    duration_days: int = 30
+    daily_time_minutes: int = 60
+
+
+class DeliberationOutcome(BaseModel):
+    """Closing summary of a multi-agent deliberation"""
+    key_insights: List[str] = Field(default_factory=list, description="Up to 5 short findings")
+    actions: List[Action] = Field(default_factory=list, description="Up to 3 concrete next actions")
+    plan_proposal: Optional[PlanProposal] = None
+
+    @field_validator("key_insights", mode="after")
+    @classmethod
+    def _top_insights(cls, value):
+        return value[:5]
+
+    @field_validator("actions", mode="after")
+    @classmethod
+    def _top_actions(cls, value):
+        return value[:3]
+
+
+class GoalMilestone(BaseModel):
+    title: str
+    description: str = ""
+    target_date: Optional[str] = Field(None, description="YYYY-MM-DD")
+
+
+class GoalPlan(BaseModel):
+    description: str
+    milestones: List[GoalMilestone] = Field(default_factory=list)
+    success_criteria: List[str] = Field(default_factory=list)
+    goal_type: Literal["career", "personal", "financial", "health", "learning", "project"] = "personal"
+    priority: Literal["low", "medium", "high", "critical"] = "medium"
+
+    @field_validator("goal_type", "priority", mode="before")
+    @classmethod
+    def _lower(cls, value):
+        return str(value).lower() if value is not None else value
+
+
+class SuggestedSubGoal(BaseModel):
+    title: str
+    order: int = 0
+
+
+class GoalAnalysis(BaseModel):
+    insights: List[str] = Field(default_factory=list)
+    obstacles: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+    feasibility_score: int = Field(7, ge=1, le=10)
+    estimated_duration: str = "3-6 months"
+    suggested_subgoals: List[SuggestedSubGoal] = Field(default_factory=list, description="3-5 subgoals in order")
+
+    @field_validator("feasibility_score", mode="before")
+    @classmethod
+    def _score(cls, value):
+        # "8/10", 7.5 and "8" are all common answers
+        if isinstance(value, str):
+            match = re.search(r"\d+(?:\.\d+)?", value)
+            value = match.group(0) if match else 7
+        return min(10, max(1, round(float(value))))
+
+    @field_validator("suggested_subgoals", mode="after")
+    @classmethod
+    def _number_subgoals(cls, value):
+        for i, subgoal in enumerate(value[:5]):
+            subgoal.order = subgoal.order or i + 1
+        return value[:5]
+
+
+# --- Prompting ---
+
+def _strip_titles(schema: Any) -> Any:
+    if isinstance(schema, dict):
+        return {k: _strip_titles(v) for k, v in schema.items() if k != "title"}
+    if isinstance(schema, list):
+        return [_strip_titles(v) for v in schema]
+    return schema
+
+
+@lru_cache(maxsize=None)
+def compact_schema(model: Type[BaseModel]) -> str:
+    """JSON schema without titles, on one line"""
+    return json.dumps(_strip_titles(model.model_json_schema()), separators=(",", ":"))
+
+
+def schema_prompt(model: Type[BaseModel]) -> str:
+    """Instruction appended to a task so its answer ends with a parseable block"""
+    return f"""
+
+            End your response with a single ```json block containing one object that matches this JSON schema:
+            {compact_schema(model)}
+            Use double quotes, no comments and no trailing commas."""
+
+
+# --- Scanning ---
+
+@dataclass
+class Fragment:
+    text: str
+    start: int
+    end: int
+    complete: bool = True
+    closers: str = ""  # What a truncated fragment needs to be balanced
+
+
+_STRUCTURAL = re.compile(r'[{}\[\]"\\]')
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_FENCE_OPEN = re.compile(r"```(?:json)?\s*$")
+_FENCE_CLOSE = re.compile(r"^\s*```")
+
+
+class JSONScanner:
+    """Incremental, string-aware scanner for top-level JSON objects in free text"""
+
+    def __init__(self, offset: int = 0):
+        self.fragments: List[Fragment] = []
+        self._text = ""  # Text of the object being read
+        self._start = 0
+        self._offset = offset
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped_at = -1
+        self._broken = False
+
+    def feed(self, chunk: str) -> List[Fragment]:
+        """Scan the next chunk; returns objects completed by it"""
+        completed = []
+        # Only structural characters matter, so skip straight between them
+        for match in _STRUCTURAL.finditer(chunk):
+            ch = match.group()
+            pos = self._offset + match.start()
+            if not self._stack:
+                if ch == "{":
+                    self._stack.append("}")
+                    self._start = pos
+                    self._text = ""
+                    self._broken = False
+                continue
+            if pos == self._escaped_at:
+                continue
+            if self._in_string:
+                if ch == "\\":
+                    self._escaped_at = pos + 1
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._stack.append("}")
+            elif ch == "[":
+                self._stack.append("]")
+            elif ch in "}]":
+                self._broken = self._broken or ch != self._stack[-1]
+                self._stack.pop()
+                if not self._stack:
+                    end = pos + 1
+                    text = self._text + chunk[max(0, self._start - self._offset):end - self._offset]
+                    fragment = Fragment(text, self._start, end, complete=not self._broken)
+                    self.fragments.append(fragment)
+                    completed.append(fragment)
+
+        if self._stack:
+            self._text += chunk[max(0, self._start - self._offset):]
+        self._offset += len(chunk)
+        return completed
+
+    def close(self) -> Optional[Fragment]:
+        """End of input; returns the unterminated object, if any"""
+        if not self._stack:
+            return None
+        closers = ('"' if self._in_string else "") + "".join(reversed(self._stack))
+        fragment = Fragment(self._text, self._start, self._offset, complete=False, closers=closers)
+        self.fragments.append(fragment)
+        self._stack = []
+        self._in_string = False
+        return fragment
+
+
+def scan(text: str) -> List[Fragment]:
+    """Objects in ``text``, starting at the last ```json fence when there is one
+
+    Stray quotes and braces in the prose before the block could otherwise pull
+    the scanner out of step with it.
+    """
+    fence = text.rfind("```json")
+    scanner = JSONScanner(offset=max(fence, 0))
+    scanner.feed(text[max(fence, 0):])
+    scanner.close()
+    return scanner.fragments
+
+
+def _loads(fragment: Fragment) -> Optional[Any]:
+    """Strict parse, then the cheap local fixes: trailing commas and truncation"""
+    try:
+        return json.loads(fragment.text)
+    except ValueError:
+        pass
+    text = _TRAILING_COMMA.sub(r"\1", fragment.text + fragment.closers)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+# --- Parsing ---
+
+@dataclass
+class ParseResult:
+    value: Optional[BaseModel]
+    prose: str  # The text without the JSON block
+    fragment: Optional[Fragment] = None
+    error: Optional[str] = None
+    repaired: bool = False
+
+
+def _prose(text: str, fragment: Optional[Fragment]) -> str:
+    if fragment is None:
+        return text.strip()
+    head = _FENCE_OPEN.sub("", text[:fragment.start])
+    tail = _FENCE_CLOSE.sub("", text[fragment.end:], count=1)
+    return (head.rstrip() + "\n" + tail.lstrip()).strip()
+
+
+def parse(text: str, model: Type[M]) -> ParseResult:
+    """Validate the last matching JSON object in ``text`` into ``model``"""
+    broken: Optional[Fragment] = None
+    error = None
+    for fragment in reversed(scan(text)):
+        data = _loads(fragment)
+        if not isinstance(data, dict):
+            if broken is None:
+                broken, error = fragment, "Invalid JSON"
+            continue
+        try:
+            return ParseResult(model.model_validate(data), _prose(text, fragment), fragment)
+        except ValidationError as e:
+            if broken is None:
+                broken, error = fragment, str(e)
+    return ParseResult(None, _prose(text, broken), broken, error)
+
+
+async def repair(fragment: Fragment, model: Type[M], error: str = None, api_key: str = None) -> Optional[M]:
+    """Ask the model to fix just this fragment, in JSON mode"""
+    max_tokens = min(2048, count_tokens(fragment.text) + 256)
+    data = await groq_client.chat_completion(
+        [
+            {
+                "role": "system",
+                "content": "You fix malformed JSON. Reply with only a JSON object that matches this JSON schema, "
+                           f"keeping the original content:\n{compact_schema(model)}"
+            },
+            {"role": "user", "content": f"Problem: {error or 'Invalid JSON'}\n\nJSON:\n{fragment.text}"}
+        ],
+        api_key=api_key,
+        max_tokens=max_tokens,
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+    content = data["choices"][0]["message"]["content"]
+    return parse(content, model).value
+
+
+async def parse_structured(text: str, model: Type[M], api_key: str = None, label: str = "") -> ParseResult:
+    """``parse`` with targeted repair of a malformed block"""
+    result = parse(text, model)
+    if result.value is not None or result.fragment is None:
+        if result.value is None:
+            print(f"⚠️ [Output] {label or model.__name__}: no JSON block, using text heuristics")
+        return result
+
+    try:
+        result.value = await repair(result.fragment, model, result.error, api_key)
+    except Exception as e:
+        print(f"❌ [Output] {label or model.__name__}: repair failed: {e}")
+        return result
+
+    if result.value is not None:
+        result.repaired = True
+        print(f"🔧 [Output] {label or model.__name__}: repaired {len(result.fragment.text)} chars of JSON")
+    return result
@@ -0,0 +1,200 @@
+"""Hashed timer wheel for time-based notification triggers.
+
+Timers are rows in ``NotificationTimer`` (kind, user, fire time, payload) with
+a unique key, so scheduling the same reminder twice replaces it and ``cancel``
+removes it. A timer due within the wheel's span (``slots`` x ``tick``, an hour
+by default) is also armed in memory: the wheel advances one slot per tick and
+fires what lands in the current slot, so arming, cancelling and firing cost
+O(1) however many timers are pending, and nothing is polled per user.
+
+- Later timers stay in the table until ``load`` (on start, then from the
+  ``check_notifications`` cron job) arms those coming within the span.
+- Overdue timers (the process was down) fire on the next tick after loading.
+- Firing claims the row by deleting it, so with several processes each timer
+  fires once. A failing handler is retried a few times, a minute apart.
+"""
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import SystemSessionLocal
+
+TimerHandler = Callable[[models.User, Dict[str, Any]], Awaitable[None]]
+
+MAX_ATTEMPTS = 3
+RETRY_SECONDS = 60
+
+
+@dataclass
+class ArmedTimer:
+    key: str
+    kind: str
+    user_id: int
+    payload: Dict[str, Any]
+    fire_at: datetime
+    cancelled: bool = False
+
+
+class TimerWheel:
+    def __init__(self, tick: float = 1.0, slots: int = 3600):
+        self.tick = tick
+        self.slots = slots
+        self.handlers: Dict[str, TimerHandler] = {}
+        self._wheel: List[List[ArmedTimer]] = [[] for _ in range(slots)]
+        self._armed: Dict[str, ArmedTimer] = {}
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+        self._firing: Set[asyncio.Task] = set()
+        self._stats = {"scheduled": 0, "cancelled": 0, "fired": 0, "failed": 0, "retried": 0, "claimed_elsewhere": 0}
+
+    @property
+    def span(self) -> timedelta:
+        return timedelta(seconds=self.tick * self.slots)
+
+    def handler(self, kind: str):
+        """Register ``func(user, payload)`` for a timer kind"""
+        def decorator(func: TimerHandler) -> TimerHandler:
+            self.handlers[kind] = func
+            return func
+        return decorator
+
+    async def schedule(self, kind: str, user_id: int, key: str, fire_at: datetime, payload: Dict[str, Any] = None, attempts: int = 0):
+        """Persist a timer (replacing one with the same key) and arm it if it is due soon"""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for timer kind '{kind}'")
+        async with SystemSessionLocal() as db:
+            result = await db.execute(select(models.NotificationTimer).filter(models.NotificationTimer.key == key))
+            row = result.scalars().first()
+            if row is None:
+                row = models.NotificationTimer(key=key)
+                db.add(row)
+            row.kind, row.user_id, row.payload, row.fire_at, row.attempts = kind, user_id, payload or {}, fire_at, attempts
+            await db.commit()
+        self._stats["scheduled"] += 1
+        self._disarm(key)
+        self._arm(ArmedTimer(key, kind, user_id, payload or {}, fire_at))
+
+    async def cancel(self, *keys: str):
+        async with SystemSessionLocal() as db:
+            await db.execute(delete(models.NotificationTimer).where(models.NotificationTimer.key.in_(keys)))
+            await db.commit()
+        for key in keys:
+            if self._disarm(key):
+                self._stats["cancelled"] += 1
+
+    def _arm(self, timer: ArmedTimer) -> bool:
+        if self._task is None or timer.key in self._armed:
+            return False
+        ticks = math.ceil((timer.fire_at - datetime.utcnow()).total_seconds() / self.tick)
+        if ticks >= self.slots:
+            return False # Loaded again when it comes within the span
+        self._wheel[(self._cursor + max(1, ticks)) % self.slots].append(timer)
+        self._armed[timer.key] = timer
+        return True
+
+    def _disarm(self, key: str) -> bool:
+        # Left in its slot and skipped when the wheel gets there
+        timer = self._armed.pop(key, None)
+        if timer is not None:
+            timer.cancelled = True
+        return timer is not None
+
+    async def load(self) -> int:
+        """Arm the stored timers due within the wheel's span; returns how many were new"""
+        async with SystemSessionLocal() as db:
+            result = await db.execute(
+                select(models.NotificationTimer)
+                .filter(models.NotificationTimer.fire_at <= datetime.utcnow() + self.span)
+                .order_by(models.NotificationTimer.fire_at)
+            )
+            rows = result.scalars().all()
+        return sum(self._arm(ArmedTimer(row.key, row.kind, row.user_id, row.payload or {}, row.fire_at)) for row in rows)
+
+    async def _run(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            # Late wake-ups (a busy loop) catch up one slot per iteration
+            next_tick += self.tick
+            self._cursor = (self._cursor + 1) % self.slots
+            due, self._wheel[self._cursor] = self._wheel[self._cursor], []
+            for timer in due:
+                if timer.cancelled:
+                    continue
+                self._armed.pop(timer.key, None)
+                task = asyncio.create_task(self._fire(timer))
+                self._firing.add(task)
+                task.add_done_callback(self._firing.discard)
+
+    async def _claim(self, timer: ArmedTimer) -> Optional[int]:
+        """Delete the timer's row if it is still this timer; its attempts so far, or None"""
+        async with SystemSessionLocal() as db:
+            result = await db.execute(select(models.NotificationTimer.attempts).filter(
+                models.NotificationTimer.key == timer.key,
+                models.NotificationTimer.fire_at == timer.fire_at
+            ))
+            attempts = result.scalar()
+            claimed = await db.execute(delete(models.NotificationTimer).where(
+                models.NotificationTimer.key == timer.key,
+                models.NotificationTimer.fire_at == timer.fire_at
+            ))
+            await db.commit()
+        return (attempts or 0) if claimed.rowcount == 1 else None
+
+    async def _fire(self, timer: ArmedTimer):
+        attempts = None
+        try:
+            attempts = await self._claim(timer)
+            if attempts is None:
+                # Fired by another process, or rescheduled or cancelled there
+                self._stats["claimed_elsewhere"] += 1
+                return
+            async with SystemSessionLocal() as db:
+                result = await db.execute(select(models.User).filter(models.User.id == timer.user_id))
+                user = result.scalars().first()
+            if user is None:
+                return
+            await self.handlers[timer.kind](user, timer.payload)
+            self._stats["fired"] += 1
+        except Exception as e:
+            self._stats["failed"] += 1
+            print(f"❌ [Timers] {timer.key} failed: {e}")
+            if attempts is not None and attempts + 1 < MAX_ATTEMPTS:
+                self._stats["retried"] += 1
+                retry_at = datetime.utcnow() + timedelta(seconds=RETRY_SECONDS * (attempts + 1))
+                await self.schedule(timer.kind, timer.user_id, timer.key, retry_at, timer.payload, attempts + 1)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        armed = await self.load()
+        print(f"✅ [Timers] Timer wheel started ({armed} timer(s) due within {self.span})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, *self._firing, return_exceptions=True)
+        self._task = None
+        self._wheel = [[] for _ in range(self.slots)]
+        self._armed.clear()
+
+    async def stats(self, db: AsyncSession) -> Dict[str, Any]:
+        """Counters of this process, plus the stored timers per kind"""
+        result = await db.execute(
+            select(models.NotificationTimer.kind, func.count(models.NotificationTimer.id), func.min(models.NotificationTimer.fire_at))
+            .group_by(models.NotificationTimer.kind)
+        )
+        pending = {kind: {"pending": count, "next_fire_at": next_fire_at} for kind, count, next_fire_at in result.all()}
+        return {**self._stats, "running": self._task is not None, "armed": len(self._armed), "by_kind": pending}
+
+
+timer_wheel = TimerWheel()
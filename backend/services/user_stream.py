@@ -0,0 +1,65 @@
+"""Keyset-paginated, column-projected user iteration for scheduled jobs.
+
+Jobs that visit every user read them in pages of ``BATCH_SIZE`` instead of
+``select(models.User)`` plus ``.all()``:
+
+- Keyset: each page is ``WHERE id > <last id> ORDER BY id LIMIT n``, so late
+  pages cost the same as the first one (no OFFSET scans), and users created
+  while a job runs are still picked up.
+- Projection: only the columns jobs use (``USER_COLUMNS``); no ORM objects,
+  identity map or unused columns.
+- Short sessions: every page is streamed through ``AsyncSession.stream`` on
+  its own session, so no connection is held while a job works on a batch.
+
+A job's memory therefore depends on the batch size, not on the user count.
+"""
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import Row, Select, func, select
+
+import models
+from database import SystemSessionLocal
+
+BATCH_SIZE = 500
+
+# What the scheduled jobs need; github_username names the user in emails and logs
+USER_COLUMNS = (
+    models.User.id,
+    models.User.github_username,
+    models.User.email,
+    models.User.neon_db_url,
+    models.User.last_activity_date,
+    models.User.current_streak,
+)
+
+
+async def keyset_batches(query: Select, key, batch_size: int = BATCH_SIZE) -> AsyncIterator[List[Row]]:
+    """Rows of ``query`` in ascending ``key`` order, one page at a time
+
+    ``key`` must be unique and among the selected columns.
+    """
+    last: Optional[object] = None
+    while True:
+        page = query.order_by(key).limit(batch_size)
+        if last is not None:
+            page = page.where(key > last)
+        async with SystemSessionLocal() as db:
+            result = await db.stream(page)
+            rows = [row async for row in result]
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]._mapping[key]
+
+
+def stream_users(*filters, columns=USER_COLUMNS, batch_size: int = BATCH_SIZE) -> AsyncIterator[List[Row]]:
+    """Batches of user rows (``columns`` only) matching ``filters``, by id"""
+    return keyset_batches(select(*columns).filter(*filters), models.User.id, batch_size)
+
+
+async def count_users(*filters) -> int:
+    async with SystemSessionLocal() as db:
+        result = await db.execute(select(func.count(models.User.id)).filter(*filters))
+        return result.scalar() or 0